@@ -0,0 +1,49 @@
+"""Measure the memory used per exchange object in the first round of a model.
+
+Usage: python benchmarks/exchange_memory.py [data set] [--store]
+"""
+
+import sys
+import tracemalloc
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.log import logger
+from decide.model.equalgain import EqualGainModel
+
+
+def bytes_per_exchange(data_set: str = "cop21.csv", store: bool = False) -> dict:
+    model = ModelFactory(InputDataFile.open(input_folder / data_set))(EqualGainModel, store=store)
+
+    model.calc_nbs()
+    model.determine_positions()
+    model.calc_combinations()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    model.determine_groups_and_calculate_exchanges()
+
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    exchanges = len(model.exchanges)
+
+    return {
+        "data_set": data_set,
+        "store": store,
+        "exchanges": exchanges,
+        "bytes": after - before,
+        "bytes_per_exchange": (after - before) // exchanges,
+        "peak": peak - before,
+    }
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+
+    logger.info(
+        "Exchange memory",
+        **bytes_per_exchange(*arguments[:1], store="--store" in sys.argv),
+    )
@@ -0,0 +1,72 @@
+"""Measure the time the SQLite observer needs to write a repetition of a model.
+
+The repetition is recorded once and replayed on an event handler with only the SQLite observer, so the
+model itself is not part of the measurement.
+
+Usage: python benchmarks/sqlite_writes.py [data set] [iterations] [p] [profile] [snapshots]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from decide import input_folder
+from decide.data import database as db
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.log import logger
+from decide.model import parallel
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.observers.sqliteobserver import SQLiteObserver
+
+
+def write_time(
+    data_set: str = "cop21.csv",
+    iterations: int = 10,
+    p: str = "0.5",
+    profile: str | None = None,
+    snapshots: str = "full",
+) -> dict:
+    factory = ModelFactory(InputDataFile.open(input_folder / data_set))
+    model = factory(EqualGainModel, randomized_value=p, numeric="float64", seed=1)
+
+    batches = parallel.record_repetition(model, 0, iterations)
+
+    with tempfile.TemporaryDirectory() as directory:
+        event_handler = Observable(model_ref=model, output_directory=Path(directory))
+        SQLiteObserver(event_handler, str(Path(directory) / "benchmark.db"), profile, snapshots)
+
+        start = time.perf_counter()
+
+        event_handler.before_model()
+        event_handler.before_repetitions(1, iterations, p, 1)
+        parallel.replay(event_handler, batches)
+        event_handler.after_model()
+
+        seconds = time.perf_counter() - start
+
+        rows = {table.__name__: table.select().count() for table in db.Manager.tables}
+
+        db.connection.close()
+
+    return {
+        "data_set": data_set,
+        "iterations": iterations,
+        "p": p,
+        "profile": profile,
+        "snapshots": snapshots,
+        "seconds": round(seconds, 3),
+        "rows": sum(rows.values()),
+        **rows,
+    }
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+
+    logger.info(
+        "SQLite writes",
+        **write_time(*arguments[:1], *map(int, arguments[1:2]), *arguments[2:5]),
+    )
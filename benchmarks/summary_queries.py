@@ -0,0 +1,54 @@
+"""Measure the time the summaries of the model runs in a database take.
+
+Run it on a database before and after the migrate command to compare the DECIMAL and REAL columns.
+
+Usage: python benchmarks/summary_queries.py database
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from decide import results
+from decide.data import database as db
+from decide.log import logger
+
+
+def summary_times(database: str) -> dict:
+    manager = db.Manager(f"sqlite:///{database}")
+    manager.init_database()
+
+    model_run_ids = [model_run.id for model_run in db.ModelRun.select().order_by(db.ModelRun.id)]
+    actor_issues = db.ActorIssue.select().count()
+
+    summaries = {
+        "externalities": results.externalities.write_summary_result,
+        "descriptives": results.descriptives.write_summary_result,
+        "issuecomparison": results.issuecomparison.write_summary_result,
+        "nashbargainingsolution": results.nashbargainingsolution.write_summary_result,
+    }
+
+    times = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write_summary_result in summaries.items():
+            start = time.perf_counter()
+
+            write_summary_result(db.connection, model_run_ids, Path(directory))
+
+            times[name] = round(time.perf_counter() - start, 3)
+
+    db.connection.close()
+
+    return {
+        "database": database,
+        "model_runs": len(model_run_ids),
+        "actor_issues": actor_issues,
+        "seconds": round(sum(times.values()), 3),
+        **times,
+    }
+
+
+if __name__ == "__main__":
+    logger.info("Summary queries", **summary_times(*sys.argv[1:2]))
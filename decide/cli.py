@@ -1,21 +1,25 @@
 from __future__ import annotations
 
 import shutil
-from datetime import UTC
-from datetime import datetime
 from pathlib import Path
 from typing import Annotated
 from typing import Literal
 
+import matplotlib
 import typer
 
 from decide import input_folder
+from decide import results
+from decide.data import database as db
+from decide.data.merge import merge_databases
 from decide.data.modelfactory import ModelFactory
 from decide.data.reader import InputDataFile
 from decide.log import logger
 from decide.model import base
 from decide.model import equalgain
+from decide.model import parallel
 from decide.model import randomrate
+from decide.model.checkpoint import Checkpoint
 from decide.model.observers.exchanges_writer import ExchangesWriter
 from decide.model.observers.externalities import Externalities
 from decide.model.observers.issue_development import IssueDevelopment
@@ -23,7 +27,10 @@ from decide.model.observers.logger import Logger
 from decide.model.observers.observer import Observable
 from decide.model.observers.observer import Observer
 from decide.model.observers.sqliteobserver import SQLiteObserver
-from decide.model.utils import ModelLoop
+from decide.model.observers.statistics import StatisticsWriter
+from decide.model.observers.stopping import RepetitionStopping
+from decide.model.runner import Runner
+from decide.model.utils import Convergence
 
 
 class ProgressObserver(Observer):
@@ -51,10 +58,24 @@ def init_event_handlers(
     database_file: Path | None,
     *,
     write_csv=True,
+    asynchronous=False,
+    database_profile: str | None = None,
+    snapshots: str = "full",
 ) -> Observable:
-    event_handler = Observable(model_ref=model, output_directory=output_directory)
+    if asynchronous:
+        # the observers write the results on a thread while the model continues, the plots are
+        # drawn on that thread as well, which the interactive backends do not support
+        matplotlib.use("Agg")
+        event_handler = parallel.AsyncObservable(model_ref=model, output_directory=output_directory)
+    else:
+        event_handler = Observable(model_ref=model, output_directory=output_directory)
 
-    SQLiteObserver(event_handler, str(database_file or output_directory))
+    SQLiteObserver(
+        event_handler,
+        str(database_file or output_directory),
+        database_profile,
+        snapshots,
+    )
 
     Logger(event_handler)
     Logger.LOG_LEVEL = 99
@@ -135,11 +156,50 @@ def p_values_param(p: list[str] | None, start: str, step: str, stop: str) -> lis
     return p_values
 
 
+def shard_param(args: str | None) -> tuple[int, int] | None:
+    """Parse the K/N notation of a shard, K counts from 1."""
+    if not args:
+        return None
+
+    try:
+        shard, shards = (int(x) for x in args.split("/"))
+    except ValueError:
+        msg = f"Invalid shard '{args}', use K/N, e.g. 1/4"
+        raise typer.BadParameter(msg) from None
+
+    if not 1 <= shard <= shards:
+        msg = f"Invalid shard '{args}', K should be between 1 and N"
+        raise typer.BadParameter(msg)
+
+    return shard, shards
+
+
+def shard_units(
+    p_values: list[str],
+    repetitions: int,
+    shard: tuple[int, int] | None = None,
+) -> list[tuple[str, int]]:
+    """The (p, repetition) units of work of the sweep, only the units of the shard when given.
+
+    The units are dealt round-robin over the shards, so each shard gets about the same number of repetitions
+    of each p, with the same configuration the assignment is the same on every machine.
+    """
+    units = [(p, repetition) for p in p_values for repetition in range(repetitions)]
+
+    if shard is None:
+        return units
+
+    k, n = shard
+
+    return units[k - 1 :: n]
+
+
 app = typer.Typer()
 
 
-@app.command()
+@app.callback(invoke_without_command=True)
 def main(  # noqa: PLR0913
+    ctx: typer.Context,
     input_file: Annotated[
         Path,
         typer.Option(
@@ -168,9 +228,7 @@ def main(  # noqa: PLR0913
             help="The number of round the model needs to be executed",
         ),
     ] = 10,
-    p: Annotated[
-        list[str] | None, typer.Option("--p", "-p", help="Randomized Equal Gain")
-    ] = None,
+    p: Annotated[list[str] | None, typer.Option("--p", "-p", help="Randomized Equal Gain")] = None,
     start: Annotated[str, typer.Option("--start")] = "0.0",
     step: Annotated[str, typer.Option("--step")] = "0.00",
     stop: Annotated[str, typer.Option("--stop")] = "0.00",
@@ -185,15 +243,175 @@ def main(  # noqa: PLR0913
         str | None,
         typer.Option("--database", help="The SQLite database"),
     ] = None,
+    db_profile: Annotated[
+        Literal["safe", "wal", "fast"],
+        typer.Option(
+            "--db-profile",
+            help='The storage profile of the database. "safe" keeps the defaults of SQLite, "wal" '
+            'writes to a write-ahead log and syncs less often, "fast" does not wait for the disk '
+            "and builds the indexes at the end, a crash can corrupt the database",
+        ),
+    ] = "safe",
+    snapshots: Annotated[
+        Literal["full", "delta"],
+        typer.Option(
+            "--snapshots",
+            help='The actor issues stored per iteration. "delta" stores the first snapshot of a '
+            "repetition in full and then only the actor issues that changed",
+        ),
+    ] = "full",
+    numeric: Annotated[
+        Literal["decimal", "float64"],
+        typer.Option(
+            "--numeric",
+            help='The number type of the model. "decimal" is the reference, "float64" is faster but drifts',
+        ),
+    ] = "decimal",
+    store: Annotated[
+        bool,
+        typer.Option(
+            "--store",
+            help="Keep the actor issues of the model in arrays instead of separate objects, "
+            "the results are the same. Implied by --numeric float64",
+        ),
+    ] = False,
+    stats: Annotated[
+        Path | None,
+        typer.Option(
+            "--stats",
+            help="Write the wall time per phase and the counters of each iteration as JSON to this file",
+        ),
+    ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            help="Run the repetitions on a pool of this many processes, 1 runs them in this process",
+        ),
+    ] = 1,
+    async_observers: Annotated[
+        bool,
+        typer.Option(
+            "--async-observers",
+            help="Write the results on a background thread while the model continues",
+        ),
+    ] = False,
+    seed: Annotated[
+        int | None,
+        typer.Option(
+            "--seed",
+            help="Seed of the run, each repetition derives its own seed from it and the p value",
+        ),
+    ] = None,
+    shard: Annotated[
+        str | None,
+        typer.Option(
+            "--shard",
+            help="Run only shard K of N of the (p, repetition) units, e.g. 2/4. "
+            "Combine the shards with the merge command",
+        ),
+    ] = None,
+    candidate_workers: Annotated[
+        int,
+        typer.Option(
+            "--candidate-workers",
+            help="Calculate the candidate exchanges of each iteration on a pool of this many processes. "
+            "Only for the Equal Gain model with --numeric float64",
+        ),
+    ] = 1,
+    checkpoint_every: Annotated[
+        int,
+        typer.Option(
+            "--checkpoint-every",
+            help="Save the progress to the output directory every N iterations, 0 saves nothing",
+        ),
+    ] = 0,
+    resume: Annotated[
+        Path | None,
+        typer.Option(
+            "--resume",
+            help="Continue the interrupted run of this output directory, with the options of that run",
+        ),
+    ] = None,
+    convergence_tolerance: Annotated[
+        float | None,
+        typer.Option(
+            "--convergence-tolerance",
+            help="Stop a repetition before the last iteration when no position and no NBS moved "
+            "more than this on the 0-100 scale for --convergence-rounds rounds in a row. "
+            "0 stops after a round without exchanges",
+        ),
+    ] = None,
+    convergence_rounds: Annotated[
+        int,
+        typer.Option(
+            "--convergence-rounds",
+            help="The rounds in a row that have to stand still, see --convergence-tolerance",
+        ),
+    ] = 1,
+    target_error: Annotated[
+        float | None,
+        typer.Option(
+            "--target-error",
+            help="Stop the repetitions of a p value when the standard error of the final NBS of "
+            "every issue is at most this, on the 0-100 scale. --repetitions is the maximum",
+        ),
+    ] = None,
+    min_repetitions: Annotated[
+        int,
+        typer.Option(
+            "--min-repetitions",
+            help="The repetitions of a p value before --target-error can stop them",
+        ),
+    ] = 10,
 ) -> None:
+    """Run the model, use the merge command to combine the databases of a sharded run."""
+    if ctx.invoked_subcommand is not None:
+        return
+
     if p is None:
         p = []
     p_values = p_values_param(p, start, step, stop)
+    shard = shard_param(shard)
+
+    if candidate_workers > 1 and (workers > 1 or numeric != "float64" or model != "equal"):
+        msg = "--candidate-workers needs --numeric float64, the equal model and a single worker"
+        raise typer.BadParameter(msg)
+
+    if convergence_tolerance is not None and (convergence_tolerance < 0 or convergence_rounds < 1):
+        msg = "--convergence-tolerance cannot be negative and --convergence-rounds needs at least 1"
+        raise typer.BadParameter(msg)
+
+    if target_error is not None and (target_error <= 0 or shard is not None):
+        msg = "--target-error needs to be positive and cannot be combined with --shard"
+        raise typer.BadParameter(msg)
 
     data_file = InputDataFile.open(input_file)
 
     data_set_name = Path(name or input_file).stem
 
+    # a resumed run needs the same options, the output directory is given by --resume
+    options = {
+        "input_file": str(input_file),
+        "model": model,
+        "repetitions": repetitions,
+        "iterations": iterations,
+        "p_values": p_values,
+        "issues": issues,
+        "actors": actors,
+        "name": data_set_name,
+        "database": database,
+        "numeric": numeric,
+        "stats": stats,
+        "workers": workers,
+        "seed": seed,
+        "shard": shard,
+        "convergence_tolerance": convergence_tolerance,
+        "convergence_rounds": convergence_rounds,
+        "target_error": target_error,
+        "min_repetitions": min_repetitions,
+    }
+
     factory = ModelFactory(
         data_file,
         actor_whitelist=actors_param(actors),
@@ -203,11 +421,23 @@ def main(  # noqa: PLR0913
     # Initial the right model from the given arguments
     model_klass = equalgain.EqualGainModel if model == "equal" else randomrate.RandomRateModel
 
-    model = factory(model_klass=model_klass, randomized_value=p_values[0])
+    # the float64 mode prefilters the Equal Gain candidates on the arrays of the store, the candidate
+    # pool shares the store with its processes
+    model_kwargs = {"numeric": numeric, "store": store or numeric == "float64"}
+
+    model = factory(model_klass=model_klass, randomized_value=p_values[0], **model_kwargs)
 
     # The event handlers for logging and writing the results to the disk.
 
     output_directory = output_dir / data_set_name
+
+    if shard:
+        # each shard writes its own database and output tree
+        output_directory = output_directory / "shard-{}-of-{}".format(*shard)
+
+    if resume:
+        output_directory = resume
+
     output_directory.mkdir(parents=True, exist_ok=True)
     # store the input file among the output files
     shutil.copy(input_file, output_directory / "input.csv")
@@ -217,56 +447,139 @@ def main(  # noqa: PLR0913
         output_directory=output_directory,
         database_file=database,
         write_csv=True,
+        asynchronous=async_observers,
+        database_profile=db_profile,
+        snapshots=snapshots,
     )
 
+    if stats:
+        StatisticsWriter(event_handler, stats)
+
     event_handler.before_model()
 
     ProgressObserver(event_handler, repetitions=repetitions, iterations=iterations)
 
+    stopping = None
+
+    if target_error is not None:
+        stopping = RepetitionStopping(event_handler, target_error, min_repetitions)
+
+    checkpoint = None
+
+    if resume:
+        try:
+            checkpoint = Checkpoint.resume(
+                output_directory,
+                options,
+                event_handler,
+                checkpoint_every,
+            )
+        except (FileNotFoundError, ValueError) as e:
+            raise typer.BadParameter(str(e)) from None
+    elif checkpoint_every > 0:
+        checkpoint = Checkpoint(output_directory, options, checkpoint_every)
+
+    # the repetitions can stop early, each one gets a copy of this Convergence
+    convergence = None
+
+    if convergence_tolerance is not None:
+        convergence = Convergence(convergence_tolerance, convergence_rounds)
+
+    runner = Runner(
+        event_handler,
+        factory,
+        model_klass,
+        output_directory,
+        repetitions,
+        iterations,
+        seed,
+        convergence,
+        checkpoint,
+        stopping,
+        **model_kwargs,
+    )
+
     # in therms of REX, 0.0 is EqualGain and 1.0 the maximum variation
-    for randomized_value in p_values:
-        start_time = datetime.now(UTC)
+    units = shard_units(p_values, repetitions, shard)
 
-        run_output_dir = output_dir / data_set_name / str(randomized_value)
-        run_output_dir.mkdir(parents=True, exist_ok=True)
+    if checkpoint is not None:
+        units = [
+            unit
+            for unit in units
+            if unit not in checkpoint.completed and unit[0] not in checkpoint.finished
+        ]
 
-        event_handler.update_output_directory(run_output_dir)
+        if checkpoint.open and runner.enough_repetitions(checkpoint.open[0]):
+            units = [unit for unit in units if unit[0] != checkpoint.open[0]]
 
-        event_handler.log(message=f"Start calculation at {start_time}")
-        event_handler.log(message="Parsed file")
+        # all the repetitions of the started p value are done, but the run of it is not finished
+        if checkpoint.open and checkpoint.open[0] not in {p for p, _ in units}:
+            runner.after_repetitions(checkpoint.open[1])
 
-        event_handler.before_repetitions(
-            repetitions=repetitions,
-            iterations=iterations,
-            randomized_value=randomized_value,
-        )
+    runner.run(units, workers, candidate_workers)
 
-        for repetition in range(repetitions):
-            model = factory(model_klass=model_klass, randomized_value=randomized_value)
+    event_handler.after_model()
 
-            event_handler.update_model_ref(model)
+    if checkpoint is not None:
+        checkpoint.remove()
 
-            model_loop = ModelLoop(model, event_handler, repetition)
+    logger.info("Done")
 
-            event_handler.before_iterations(repetition)
 
-            for iteration_number in range(iterations):
-                logger.info(
-                    "Round completed",
-                    repetition=repetition,
-                    iteration_number=iteration_number,
-                )
-                model_loop.loop()
+@app.command()
+def merge(
+    databases: Annotated[
+        list[Path],
+        typer.Argument(help="The databases of the shards"),
+    ],
+    output_dir: Annotated[
+        Path,
+        typer.Option(
+            "--output-dir",
+            "--output_dir",
+            help="Output directory for the merged database and the summaries",
+        ),
+    ] = Path("../data/output/"),
+) -> None:
+    """Merge the databases of a sharded run and write the summaries over all the model runs."""
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-            event_handler.after_iterations(repetition)
+    try:
+        model_run_ids = merge_databases(databases, output_dir / "decide-data.sqlite.db")
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from None
 
-        event_handler.after_repetitions()
+    if len(model_run_ids) <= 1:
+        logger.info("Cannot calculate summary results, there is only 1 model run")
+        return
 
-        event_handler.log(message=f"Finished in {datetime.now(UTC) - start_time}")
+    results.write_summary_results(db.connection, model_run_ids, output_dir)
 
-    event_handler.after_model()
     logger.info("Done")
 
 
+@app.command()
+def migrate(
+    databases: Annotated[
+        list[Path],
+        typer.Argument(help="The databases to convert"),
+    ],
+) -> None:
+    """Convert the DECIMAL columns of databases written by an older version to REAL columns."""
+    for database in databases:
+        manager = db.Manager(f"sqlite:///{database}")
+        manager.init_database()
+
+        tables = manager.migrate_numeric_columns()
+
+        if tables:
+            # the copied tables leave their old pages behind
+            db.connection.execute_sql("VACUUM")
+
+        logger.info("Migrate database", database=str(database), tables=tables)
+
+        db.connection.close()
+
+
 if __name__ == "__main__":
     app()
@@ -1,8 +1,11 @@
 import os
 
 import pytest
+from typer.testing import CliRunner
 
 from decide import input_folder
+from decide.cli import app
+from decide.data import database as db
 from decide.data.modelfactory import ModelFactory
 from decide.data.reader import InputDataFile
 from decide.model.equalgain import EqualGainModel
@@ -24,3 +27,75 @@ def sample_model():
     factory = ModelFactory(date_file=date_file)
 
     return factory(EqualGainModel)
+
+
+class SampleRun:
+    """Runs the CLI on the sample data: p 0.0 and 0.5, 2 repetitions of 3 iterations, seed 1."""
+
+    ARGS = [
+        "--iterations",
+        "3",
+        "--repetitions",
+        "2",
+        "--start",
+        "0.0",
+        "--step",
+        "0.5",
+        "--stop",
+        "0.5",
+        "--seed",
+        "1",
+    ]
+
+    def __init__(self, tmp_path) -> None:
+        self.tmp_path = tmp_path
+        self.runner = CliRunner()
+
+    def __call__(self, name: str, *args: str) -> list:
+        """Run into the output directory name with the extra arguments, returns the dump()."""
+        result = self.invoke(*self.ARGS, *args, "--output-dir", str(self.tmp_path / name))
+        assert result.exit_code == 0, result.output
+
+        return self.dump()
+
+    def invoke(self, *args: str):
+        return self.runner.invoke(app, list(args))
+
+    def output(self, name: str):
+        """The output directory of the data set of the run."""
+        return self.tmp_path / name / "sample_data"
+
+    @staticmethod
+    def dump() -> list:
+        """The actor issues of the current database, in the order they were stored."""
+        rows = (
+            db.ActorIssue.select(db.ActorIssue, db.Iteration, db.Repetition, db.ModelRun)
+            .join(db.Iteration)
+            .join(db.Repetition)
+            .join(db.ModelRun)
+            .order_by(db.ActorIssue.id)
+        )
+
+        return [
+            (
+                row.iteration.repetition.model_run.p,
+                row.iteration.repetition.pointer,
+                row.iteration.repetition.seed,
+                row.iteration.pointer,
+                row.type,
+                str(row.position),
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def indexes() -> set[str]:
+        """The names of the indexes of the current database."""
+        cursor = db.connection.execute_sql("SELECT name FROM sqlite_master WHERE type = 'index'")
+
+        return {name for (name,) in cursor}
+
+
+@pytest.fixture
+def sample_run(tmp_path) -> SampleRun:
+    return SampleRun(tmp_path)
@@ -1,10 +1,37 @@
 import datetime
+import re
 
 import peewee
 from playhouse.db_url import connect
+from playhouse.migrate import SchemaMigrator
+from playhouse.migrate import migrate
+
+from decide.log import logger
 
 connection = peewee.DatabaseProxy()
 
+# the pragmas per storage profile. The safe profile keeps the defaults of SQLite: a rollback journal
+# and synchronous=FULL. The wal profile writes to a write-ahead log, which leaves -wal and -shm files
+# next to the database while it is open and survives a crash of the process but not always one of the
+# machine. The fast profile does not wait for the disk at all.
+PROFILES = {
+    "safe": {},
+    "wal": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -64 * 1024,
+        "temp_store": "memory",
+        "mmap_size": 256 * 1024 * 1024,
+    },
+    "fast": {
+        "journal_mode": "wal",
+        "synchronous": "off",
+        "cache_size": -256 * 1024,
+        "temp_store": "memory",
+        "mmap_size": 1024 * 1024 * 1024,
+    },
+}
+
 
 class DictionaryIndexMixin:
     hash_field = "id"
@@ -69,6 +96,13 @@ class ModelRun(BaseModel):
     p = peewee.DecimalField(max_digits=3, decimal_places=2)
     iterations = peewee.IntegerField()
     repetitions = peewee.IntegerField()
+    # the repetitions that ran, fewer than repetitions when the standard error reached its target
+    repetitions_used = peewee.IntegerField(null=True)
+    # the --seed of the run, the repetitions derive their own seed from it
+    seed = peewee.BigIntegerField(null=True)
+    # "delta" when the actor issues after the first snapshot of a repetition are only the ones that
+    # changed, the actorissue_full view has the complete snapshots
+    snapshots = peewee.CharField(null=True)
 
     data_set = peewee.ForeignKeyField(DataSet, on_delete="CASCADE")
 
@@ -77,6 +111,10 @@ class Repetition(DictionaryIndexMixin, BaseModel):
     """A repetition for a data set."""
 
     pointer = peewee.IntegerField()
+    # the seed of the model, enough to run this repetition again
+    seed = peewee.BigIntegerField(null=True)
+    # the iterations that ran, fewer than those of the model run when the repetition converged
+    iterations = peewee.IntegerField(null=True)
 
     hash_field = "pointer"
 
@@ -93,15 +131,19 @@ class Iteration(DictionaryIndexMixin, BaseModel):
 
 
 class ActorIssue(BaseModel):
-    """Snapshot of a position of an actor on an issue."""
+    """Snapshot of a position of an actor on an issue.
+
+    The values of the result tables are REAL columns, older databases have DECIMAL columns, see
+    Manager.migrate_numeric_columns.
+    """
 
     issue = peewee.ForeignKeyField(Issue, on_delete="CASCADE")
 
     actor = peewee.ForeignKeyField(Actor, on_delete="CASCADE")
 
-    power = peewee.DecimalField(max_digits=20, decimal_places=15)
-    position = peewee.DecimalField(max_digits=20, decimal_places=15)
-    salience = peewee.DecimalField(max_digits=20, decimal_places=15)
+    power = peewee.FloatField()
+    position = peewee.FloatField()
+    salience = peewee.FloatField()
 
     iteration = peewee.ForeignKeyField(Iteration, on_delete="CASCADE")
 
@@ -117,14 +159,11 @@ class ExchangeActor(BaseModel):
 
     demand_issue = peewee.ForeignKeyField(Issue, on_delete="CASCADE")
 
-    x = peewee.DecimalField(max_digits=20, decimal_places=15)  # begin position
-    y = peewee.DecimalField(max_digits=20, decimal_places=15)  # end position
-    eu = peewee.DecimalField(
-        max_digits=20,
-        decimal_places=15,
-    )  # expected utility or gain
+    x = peewee.FloatField()  # begin position
+    y = peewee.FloatField()  # end position
+    eu = peewee.FloatField()  # expected utility or gain
 
-    demand_position = peewee.DecimalField(max_digits=20, decimal_places=15)
+    demand_position = peewee.FloatField()
 
     # shortcut
     other_actor = peewee.ForeignKeyField("self", null=True, on_delete="CASCADE")
@@ -150,15 +189,39 @@ class Externality(BaseModel):
     supply = peewee.ForeignKeyField(Issue, on_delete="CASCADE")
     demand = peewee.ForeignKeyField(Issue, on_delete="CASCADE")
 
-    own = peewee.DecimalField(max_digits=20, decimal_places=15, null=True)
-    inner_positive = peewee.DecimalField(max_digits=20, decimal_places=15, null=True)
-    inner_negative = peewee.DecimalField(max_digits=20, decimal_places=15, null=True)
-    outer_positive = peewee.DecimalField(max_digits=20, decimal_places=15, null=True)
-    outer_negative = peewee.DecimalField(max_digits=20, decimal_places=15, null=True)
+    own = peewee.FloatField(null=True)
+    inner_positive = peewee.FloatField(null=True)
+    inner_negative = peewee.FloatField(null=True)
+    outer_positive = peewee.FloatField(null=True)
+    outer_negative = peewee.FloatField(null=True)
 
     iteration = peewee.ForeignKeyField(Iteration)
 
 
+# Every snapshot of the actor issues. An actor issue that is missing in a snapshot is the one of the
+# last snapshot of the same type in the repetition that has it, for the model runs with delta snapshots.
+ACTOR_ISSUE_VIEW = """
+CREATE VIEW IF NOT EXISTS actorissue_full AS
+WITH stored AS (
+    SELECT
+        ai.*,
+        i.repetition_id,
+        i.pointer,
+        LEAD(i.pointer) OVER (
+            PARTITION BY i.repetition_id, ai.actor_id, ai.issue_id, ai.type
+            ORDER BY i.pointer
+        ) AS next_pointer
+    FROM actorissue ai
+        JOIN iteration i ON ai.iteration_id = i.id
+)
+SELECT s.id, s.issue_id, s.actor_id, s.power, s.position, s.salience, i.id AS iteration_id, s.type
+FROM stored s
+    JOIN iteration i ON i.repetition_id = s.repetition_id
+        AND i.pointer >= s.pointer
+        AND (s.next_pointer IS NULL OR i.pointer < s.next_pointer)
+"""
+
+
 class Manager:
     """Helper for manage the state of the database."""
 
@@ -175,16 +238,140 @@ class Manager:
         Externality,
     ]
 
-    def __init__(self, database_path) -> None:
+    def __init__(self, database_path, profile: str | None = None) -> None:
+        """:param profile: the storage profile of PROFILES, None for the defaults of SQLite"""
         self.database_path = database_path
+        self.profile = profile
 
     def init_database(self) -> None:
         global connection
-        db = connect(self.database_path)
+        db = connect(self.database_path, pragmas=PROFILES.get(self.profile, {}))
         connection.initialize(db)
 
+    # the tables the observers load in bulk, with the fast profile their indexes follow the load
+    bulk_tables = [ActorIssue, ExchangeActor, Exchange, Externality]
+
     def create_tables(self) -> None:
-        connection.create_tables(self.tables, safe=True)
+        if self.profile == "fast":
+            connection.create_tables(
+                [table for table in self.tables if table not in self.bulk_tables],
+                safe=True,
+            )
+
+            for table in self.bulk_tables:
+                table._schema.create_table(safe=True)
+        else:
+            connection.create_tables(self.tables, safe=True)
+
+        self.add_missing_columns()
+        connection.execute_sql(ACTOR_ISSUE_VIEW)
+
+        if self.decimal_columns():
+            logger.info("The database has DECIMAL columns, the migrate command makes them REAL")
+
+    def create_indexes(self) -> None:
+        """Create the indexes that are missing, the ones the fast profile leaves out during the load."""
+        with connection.atomic():
+            for table in self.bulk_tables:
+                table._schema.create_indexes(safe=True)
+
+    def checkpoint(self) -> None:
+        """Move the write-ahead log into the database file, so the file is complete on its own.
+
+        Nothing happens without a write-ahead log.
+        """
+        connection.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def add_missing_columns(self) -> None:
+        """Add the nullable columns that are missing in a database created by an older version."""
+        migrator = SchemaMigrator.from_database(connection.obj)
+        operations = []
+
+        for table in self.tables:
+            columns = {column.name for column in connection.get_columns(table._meta.table_name)}
+
+            for field in table._meta.sorted_fields:
+                if field.column_name not in columns and field.null:
+                    operations.append(
+                        migrator.add_column(table._meta.table_name, field.column_name, field),
+                    )
+
+        if operations:
+            migrate(*operations)
+
+    def decimal_columns(self) -> dict[type[BaseModel], list[str]]:
+        """The REAL columns of the models that are DECIMAL in an older database, per table."""
+        columns = {}
+
+        for table in self.tables:
+            types = {
+                column.name: column.data_type.upper()
+                for column in connection.get_columns(table._meta.table_name)
+            }
+
+            names = [
+                field.column_name
+                for field in table._meta.sorted_fields
+                if isinstance(field, peewee.FloatField)
+                and types.get(field.column_name, "").startswith("DECIMAL")
+            ]
+
+            if names:
+                columns[table] = names
+
+        return columns
+
+    def migrate_numeric_columns(self) -> list[str]:
+        """Convert the DECIMAL columns of an older database to REAL columns.
+
+        SQLite cannot change the type of a column. The table is copied into a table with the same
+        definition apart from the types, which replaces it, and the indexes are created again.
+
+        :return: the names of the tables that were converted
+        """
+        migrated = []
+        columns = self.decimal_columns()
+
+        if columns:
+            # SQLite does not rename a table while a view refers to a table that is dropped
+            connection.execute_sql("DROP VIEW IF EXISTS actorissue_full")
+
+        for table, names in columns.items():
+            name = table._meta.table_name
+
+            (sql,) = connection.execute_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (name,),
+            ).fetchone()
+            indexes = [
+                index
+                for (index,) in connection.execute_sql(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                    "AND sql IS NOT NULL",
+                    (name,),
+                )
+            ]
+
+            for column in names:
+                sql = re.sub(rf'"{column}" DECIMAL(\([^)]*\))?', f'"{column}" REAL', sql)
+
+            sql = sql.replace(f'"{name}"', f'"{name}_real"', 1)
+
+            with connection.atomic():
+                connection.execute_sql(sql)
+                connection.execute_sql(f'INSERT INTO "{name}_real" SELECT * FROM "{name}"')
+                connection.execute_sql(f'DROP TABLE "{name}"')
+                connection.execute_sql(f'ALTER TABLE "{name}_real" RENAME TO "{name}"')
+
+                for index in indexes:
+                    connection.execute_sql(index)
+
+            migrated.append(name)
+
+        if columns:
+            connection.execute_sql(ACTOR_ISSUE_VIEW)
+
+        return migrated
 
     def delete_tables(self) -> None:
         connection.drop_tables(self.tables)
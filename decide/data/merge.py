@@ -0,0 +1,137 @@
+"""Combine the databases of the shards of a sweep into a single database.
+
+The data sets, actors, issues and model runs are matched on their natural key, a model run of the same p
+in two shards becomes a single model run. All the other rows are copied with their ids shifted past the
+ids that are already in the target, so the references between them stay intact. The target cannot have
+model runs of its own, these could be matched as well.
+"""
+
+from pathlib import Path
+
+import peewee
+
+from decide.data import database as db
+from decide.log import logger
+
+# the tables that are matched on these columns instead of copied
+NATURAL_KEYS = {
+    db.DataSet: ("name",),
+    db.Actor: ("data_set", "key"),
+    db.Issue: ("data_set", "key"),
+    db.ModelRun: ("data_set", "p", "iterations", "repetitions", "seed", "snapshots"),
+}
+
+
+def _column_expression(field: peewee.Field, offsets: dict) -> str:
+    """The SQL expression that gives the value of the column in the target, for a row s of the shard."""
+    column = f"s.{field.column_name}"
+
+    if not isinstance(field, peewee.ForeignKeyField):
+        return column
+
+    table = field.rel_model._meta.table_name
+
+    if field.rel_model in NATURAL_KEYS:
+        return f"(SELECT new FROM temp.map_{table} WHERE old = {column})"
+
+    return f"{column} + {offsets[field.rel_model]}"
+
+
+def _merge_natural(table: type[db.BaseModel], offsets: dict) -> None:
+    """Add the rows of the shard that are missing in the target and map the shard ids to the target ids."""
+    name = table._meta.table_name
+    fields = [field for field in table._meta.sorted_fields if field.name != "id"]
+    columns = ", ".join(field.column_name for field in fields)
+    values = ", ".join(_column_expression(field, offsets) for field in fields)
+
+    matches = " AND ".join(
+        f"t.{table._meta.fields[key].column_name} "
+        f"IS {_column_expression(table._meta.fields[key], offsets)}"
+        for key in NATURAL_KEYS[table]
+    )
+
+    db.connection.execute_sql(
+        f"INSERT INTO main.{name} ({columns}) SELECT {values} FROM shard.{name} s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM main.{name} t WHERE {matches})",
+    )
+    db.connection.execute_sql(f"DROP TABLE IF EXISTS temp.map_{name}")
+    db.connection.execute_sql(
+        f"CREATE TEMP TABLE map_{name} AS SELECT s.id AS old, MIN(t.id) AS new "
+        f"FROM shard.{name} s JOIN main.{name} t ON {matches} GROUP BY s.id",
+    )
+
+
+def _copy(table: type[db.BaseModel], offsets: dict) -> None:
+    """Copy all the rows of the shard with the ids shifted by the offset of the table."""
+    name = table._meta.table_name
+    fields = table._meta.sorted_fields
+    columns = ", ".join(field.column_name for field in fields)
+    values = ", ".join(
+        f"s.id + {offsets[table]}" if field.name == "id" else _column_expression(field, offsets)
+        for field in fields
+    )
+
+    db.connection.execute_sql(
+        f"INSERT INTO main.{name} ({columns}) SELECT {values} FROM shard.{name} s",
+    )
+
+
+def merge_database(source: Path) -> list[int]:
+    """Merge a single shard database into the current database.
+
+    :return: the ids of the model runs of the shard in the current database
+    """
+    offsets = {
+        table: db.connection.execute_sql(
+            f"SELECT COALESCE(MAX(id), 0) FROM main.{table._meta.table_name}",
+        ).fetchone()[0]
+        for table in db.Manager.tables
+    }
+
+    db.connection.execute_sql("ATTACH DATABASE ? AS shard", (str(source),))
+
+    try:
+        with db.connection.atomic():
+            # the manager lists the tables with a natural key first, the others use their maps
+            for table in db.Manager.tables:
+                if table in NATURAL_KEYS:
+                    _merge_natural(table, offsets)
+                else:
+                    _copy(table, offsets)
+    finally:
+        db.connection.execute_sql("DETACH DATABASE shard")
+
+    return [new for (new,) in db.connection.execute_sql("SELECT new FROM temp.map_modelrun")]
+
+
+def merge_databases(sources: list[Path], target: Path) -> list[int]:
+    """Merge the shard databases into the target database.
+
+    :param sources: the databases of the shards, e.g. shard-1-of-4/decide-data.sqlite.db
+    :param target: the database to create, a database without model runs
+    :return: the ids of the merged model runs
+    """
+    manager = db.Manager(f"sqlite:///{target}")
+    manager.init_database()
+    manager.create_tables()
+
+    # the model runs of the shards are matched on their settings only, an unrelated run in the
+    # target with the same settings would take their repetitions
+    if db.ModelRun.select().exists():
+        msg = f"The target {target} already has model runs, merge the shards into a new database"
+        raise ValueError(msg)
+
+    model_run_ids = set()
+
+    for source in sources:
+        logger.info("Merge database", source=str(source), target=str(target))
+        model_run_ids.update(merge_database(source))
+
+    # the model runs of the shards are combined, count their repetitions again
+    db.ModelRun.update(
+        repetitions_used=db.Repetition.select(peewee.fn.COUNT(db.Repetition.id)).where(
+            db.Repetition.model_run == db.ModelRun.id,
+        ),
+    ).execute()
+
+    return sorted(model_run_ids)
@@ -4,7 +4,11 @@ from decide.model.base import AbstractModel
 
 
 class ModelFactory:
-    """The goal of this object is to initiate a model object with the correct begin state."""
+    """The goal of this object is to initiate a model object with the correct begin state.
+
+    The begin state is built once in a prototype per numeric mode and store, the models are cheap
+    copies of the prototype: they share the actors and issues and copy the positions.
+    """
 
     def __init__(
         self,
@@ -18,6 +22,7 @@ class ModelFactory:
         self.data_file = date_file
         self.actor_whitelist = actor_whitelist
         self.issue_whitelist = issue_whitelist
+        self.prototypes = {}
 
     def filter_actors(self) -> dict[str, types.PartialActor]:
         if not self.actor_whitelist or len(self.actor_whitelist) == 0:
@@ -46,6 +51,28 @@ class ModelFactory:
 
     def create(self, *args, model_klass=AbstractModel, **kwargs):
         model = model_klass(*args, **kwargs)
+        model.copy_actor_issues(self.prototype(model.numeric, store=model.store is not None))
+
+        return model
+
+    def prototype(self, numeric: str, store: bool) -> AbstractModel:
+        """The model with the begin state of the data file, it is built once and never runs.
+
+        :param numeric: the numeric mode of the model
+        :param store: if the model keeps the actor issue values in a store
+        """
+        key = (
+            numeric,
+            store,
+            tuple(self.actor_whitelist or ()),
+            tuple(self.issue_whitelist or ()),
+        )
+
+        if key in self.prototypes:
+            return self.prototypes[key]
+
+        # a fixed seed, the prototype does not draw from the random module
+        model = AbstractModel(store=store, numeric=numeric, seed=0)
 
         filtered_actors = self.filter_actors()
         filtered_issues = self.filter_issues()
@@ -75,6 +102,8 @@ class ModelFactory:
                 power=actor_issue.power,
             )
 
+        self.prototypes[key] = model
+
         return model
 
     def __call__(self, model_klass, *args, **kwargs):
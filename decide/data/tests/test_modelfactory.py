@@ -1,3 +1,8 @@
+from decimal import Decimal
+
+import pytest
+
+from decide import input_folder
 from decide.data import reader
 from decide.data import types
 from decide.data.modelfactory import ModelFactory
@@ -100,3 +105,35 @@ def test_actor_issue_filter() -> None:
 
     assert count == len(filtered_actor_issues)
     assert isinstance(model, EqualGainModel)
+
+
+def positions(model) -> dict:
+    return {
+        (issue.name, actor.actor_id): actor_issue.position
+        for issue, actor_issues in model.actor_issues.items()
+        for actor, actor_issue in actor_issues.items()
+    }
+
+
+@pytest.mark.parametrize("store", [False, True])
+def test_models_are_copies_of_the_prototype(store) -> None:
+    factory = ModelFactory(reader.InputDataFile.open(input_folder / "sample_data.txt"))
+
+    model = factory(EqualGainModel, store=store)
+    other = factory(EqualGainModel, store=store)
+
+    assert len(factory.prototypes) == 1
+    assert positions(model) == positions(other)
+
+    issue = next(iter(model.issues))
+    actor_issue = next(iter(model.actor_issues[issue].values()))
+    expected = actor_issue.position
+
+    actor_issue.position = Decimal(50)
+
+    # the position is copied, the actors and issues are shared
+    assert other.actor_issues[issue][actor_issue.actor].position == expected
+    prototype = factory.prototype(model.numeric, store=store)
+
+    assert prototype.actor_issues[issue][actor_issue.actor].position == expected
+    assert other.issues[issue] is issue
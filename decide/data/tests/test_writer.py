@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from decide.data import database as db
+from decide.data.writer import BulkWriter
+
+
+def test_bulk_writer(sqlite_db) -> None:
+    data_set = db.DataSet.create(name="bulk")
+    actor = db.Actor.create(name="Actor", key="a", data_set=data_set)
+    issue = db.Issue.create(name="Issue", key="i", lower=0, upper=100, data_set=data_set)
+    model_run = db.ModelRun.create(p=0, iterations=1, repetitions=1, data_set=data_set)
+    repetition = db.Repetition.create(pointer=0, model_run=model_run)
+
+    # the writer counts on from the rows that are already there
+    existing = db.Iteration.create(pointer=0, repetition=repetition)
+
+    writer = BulkWriter()
+
+    iteration = writer.add(db.Iteration, pointer=1, repetition=repetition)
+    writer.add(
+        db.ActorIssue,
+        issue=issue,
+        actor=actor.id,
+        power=Decimal("0.5"),
+        salience=Decimal("0.25"),
+        position=Decimal(30),
+        iteration=iteration,
+    )
+
+    assert iteration == existing.id + 1
+    assert db.ActorIssue.select().count() == 0
+
+    writer.flush()
+
+    actor_issue = db.ActorIssue.get()
+
+    assert actor_issue.iteration.pointer == 1
+    assert actor_issue.iteration.repetition == repetition
+    assert actor_issue.actor.name == "Actor"
+    assert actor_issue.position == 30
+    # the default of the field
+    assert actor_issue.type == "before"
+
+    assert not writer.rows
@@ -0,0 +1,72 @@
+"""Write the rows of the observers in bulk instead of one by one.
+
+Saving a model instance builds and executes an insert per row. The writer keeps the rows of a table in a
+buffer and writes them with a single executemany, the references between the buffered rows are resolved
+through the ids the writer gives out.
+"""
+
+import peewee
+
+from decide.data import database as db
+
+
+class BulkWriter:
+    """Buffers the rows per table and writes them in a single transaction on flush.
+
+    The ids are given out by the writer, counting on from the highest id of the table, so a row can refer
+    to a row that is not written yet. Nothing else should write the tables between two flushes.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[type[db.BaseModel], list[tuple]] = {}
+        self.next_ids: dict[type[db.BaseModel], int] = {}
+        self.size = 0
+
+    def add(self, table: type[db.BaseModel], **values) -> int:
+        """Buffer a row of the table, the values are given per field name.
+
+        :return: the id of the row
+        """
+        if table not in self.next_ids:
+            self.next_ids[table] = (table.select(peewee.fn.MAX(table.id)).scalar() or 0) + 1
+
+        row_id = self.next_ids[table]
+        self.next_ids[table] += 1
+
+        row = [row_id]
+
+        for field in table._meta.sorted_fields[1:]:
+            if field.name in values:
+                value = values[field.name]
+            else:
+                value = field.default() if callable(field.default) else field.default
+
+            row.append(field.db_value(value))
+
+        self.rows.setdefault(table, []).append(tuple(row))
+        self.size += 1
+
+        return row_id
+
+    def flush(self) -> None:
+        """Write the buffered rows, the tables in the order of their first row.
+
+        A row is added after the rows it refers to, so these are written first.
+        """
+        if self.rows:
+            with db.connection.atomic():
+                for table, rows in self.rows.items():
+                    db.connection.cursor().executemany(self._insert(table), rows)
+
+        self.rows = {}
+        self.size = 0
+        # another writer may add rows after the flush, start again from the highest id
+        self.next_ids = {}
+
+    @staticmethod
+    def _insert(table: type[db.BaseModel]) -> str:
+        fields = table._meta.sorted_fields
+        columns = ", ".join(f'"{field.column_name}"' for field in fields)
+        parameters = ", ".join("?" for _ in fields)
+
+        return f'INSERT INTO "{table._meta.table_name}" ({columns}) VALUES ({parameters})'
@@ -1,21 +1,38 @@
 import logging
+import random
 from collections import defaultdict
+from collections.abc import Iterator
 from decimal import Decimal
 from itertools import combinations
 from typing import NoReturn
 
+import numpy as np
+
+from decide.model import kernels
+from decide.model.queue import ExchangeList
+from decide.model.stats import ModelStats
+from decide.model.store import ActorIssueStore
+
+# the numeric types a model can calculate with, Decimal is the reference implementation
+NUMERIC_TYPES = {"decimal": Decimal, "float64": float}
+
 
 class Issue:
-    def __init__(self, name, lower=None, upper=None) -> None:
+    def __init__(self, name, lower=None, upper=None, number=Decimal) -> None:
         """Refers an issue
         :param name: str
         :param lower: int
         :param upper: int.
+        :param number: the numeric type of the normalized values, Decimal or float
         """
         self.delta = 0
         self.step_size = 0
 
+        # dense integer id, given by the model when the issue is added
+        self.id = None
+
         self.name = name
+        self.number = number
 
         self.lower = lower
         self.upper = upper
@@ -26,6 +43,16 @@ class Issue:
             self.calculate_delta()
             self.calculate_step_size()
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value) -> None:
+        self._name = value
+        # the hash is used in the inner loops of the model, so it is calculated once
+        self._hash = hash(value)
+
     @property
     def issue_id(self):
         return self.name
@@ -35,18 +62,20 @@ class Issue:
 
     def calculate_step_size(self) -> None:
         if self.delta != 0:
-            self.step_size = Decimal(100 / self.delta)
+            self.step_size = self.number(100 / self.delta)
         else:
             self.step_size = 0
 
     def de_normalize(self, value):
+        lower = self.number(self.lower)
+
         if value == 0:
-            return self.lower
+            return lower
 
-        return value / self.step_size + self.lower
+        return value / self.step_size + lower
 
-    def normalize(self, value) -> Decimal:
-        return Decimal(value - self.lower) * self.step_size
+    def normalize(self, value) -> Decimal | float:
+        return self.number(value - self.lower) * self.step_size
 
     def __str__(self) -> str:
         return self.__repr__()
@@ -55,11 +84,21 @@ class Issue:
         return f"{self.name} [{self.lower} - {self.upper}]"
 
     def __eq__(self, other):
-        if isinstance(other, str):
-            return self.issue_id == other
+        if other is self:
+            return True
 
         if isinstance(other, Issue):
-            return self.issue_id == other.issue_id
+            return self._name == other._name
+
+        return self.equals_key(other)
+
+    def equals_key(self, other) -> bool:
+        """Compare the issue with a key that is not an Issue, like the issue id or its hash.
+        :param other: str or int
+        :return:
+        """
+        if isinstance(other, str):
+            return self.issue_id == other
 
         if isinstance(other, int):
             h = self.__hash__()
@@ -71,7 +110,7 @@ class Issue:
         raise NotImplementedError
 
     def __hash__(self) -> int:
-        return hash(self.issue_id)
+        return self._hash
 
     def __lt__(self, other):
         """Needed for sorting
@@ -87,20 +126,44 @@ class Actor:
         self.name = name
         self.comment = ""
 
+        # dense integer id, given by the model when the actor is added
+        self.id = None
+
         if actor_id:
             self.actor_id = actor_id
         else:
             self.actor_id = name
 
+    @property
+    def actor_id(self):
+        return self._actor_id
+
+    @actor_id.setter
+    def actor_id(self, value) -> None:
+        self._actor_id = value
+        # the hash is used in the inner loops of the model, so it is calculated once
+        self._hash = hash(value)
+
     def __eq__(self, other):
+        if other is self:
+            return True
+
+        if isinstance(other, Actor):
+            return self._actor_id == other._actor_id
+
+        return self.equals_key(other)
+
+    def equals_key(self, other) -> bool:
+        """Compare the actor with a key that is not an Actor: the actor id, its hash or the database Actor.
+        :param other: str, int or decide.data.database.Actor
+        :return:
+        """
         from decide.data.database import Actor as ModelActor
 
         if isinstance(other, str):
             return self.actor_id == str(other)
         if isinstance(other, int):
             return self.__hash__() == other
-        if isinstance(other, Actor):
-            return self.actor_id == other.actor_id
         if isinstance(other, ModelActor):
             return self.actor_id == other.key
         if not other:
@@ -122,7 +185,7 @@ class Actor:
         """Hashing is based on the id
         :return:
         """
-        return hash(self.actor_id)
+        return self._hash
 
     def __str__(self) -> str:
         """Human representation of this object
@@ -131,24 +194,10 @@ class Actor:
         return self.name
 
 
-class ActorIssue:
-    """Represents a combination between an actor and issue."""
+class BaseActorIssue:
+    """The behaviour shared by the actor issues and the supply and demand views on them."""
 
-    def __init__(
-        self, actor: Actor, issue: Issue, position: Decimal, salience: Decimal, power: Decimal
-    ) -> None:
-        """:param actor: Actor
-        :param issue: Issue
-        :param position: Double
-        :param salience: Double
-        :param power: Double
-        """
-        self.actor = actor
-        self.power = Decimal(power)
-        self.position = Decimal(position)
-        self.salience = Decimal(salience)
-        self.left = False  # left of nbs
-        self.issue = issue
+    __slots__ = ()
 
     def is_left_to_nbs(self, nbs) -> bool:
         """True when the position is lower than the Nash Bargaining Solution for this issue.
@@ -166,7 +215,7 @@ class ActorIssue:
         :param other:
         :return:
         """
-        if isinstance(other, ActorIssue):
+        if isinstance(other, BaseActorIssue):
             return self.actor == other.actor and self.issue == other.issue
 
         raise NotImplementedError
@@ -175,40 +224,169 @@ class ActorIssue:
         return self.actor < other.actor
 
 
-class DemandActorIssue(ActorIssue):
-    """Object for a demand issue, has the same properties as a ActorIssue."""
+class ActorIssue(BaseActorIssue):
+    """Represents a combination between an actor and issue."""
 
-    def __init__(self, actor_issue: ActorIssue) -> None:
-        super().__init__(
-            actor_issue.actor,
-            actor_issue.issue,
-            actor_issue.position,
-            actor_issue.salience,
-            actor_issue.power,
-        )
+    __slots__ = ("actor", "issue", "position", "salience", "power", "left", "group")
 
+    def __init__(
+        self,
+        actor: Actor,
+        issue: Issue,
+        position: Decimal,
+        salience: Decimal,
+        power: Decimal,
+        number=Decimal,
+    ) -> None:
+        """:param actor: Actor
+        :param issue: Issue
+        :param position: Double
+        :param salience: Double
+        :param power: Double
+        :param number: the numeric type to store the values in, Decimal or float
+        """
+        self.actor = actor
+        self.power = number(power)
+        self.position = number(position)
+        self.salience = number(salience)
+        self.left = False  # left of nbs
+        self.issue = issue
+
+    def copy(self) -> "ActorIssue":
+        """A new actor issue with the same values, without converting them again."""
+        actor_issue = ActorIssue.__new__(ActorIssue)
+        actor_issue.actor = self.actor
+        actor_issue.issue = self.issue
+        actor_issue.position = self.position
+        actor_issue.salience = self.salience
+        actor_issue.power = self.power
+        actor_issue.left = self.left
+
+        return actor_issue
+
+
+class StoredActorIssue(BaseActorIssue):
+    """An ActorIssue that reads and writes its values in the ActorIssueStore of the model."""
+
+    __slots__ = ("actor", "issue", "store", "index", "group")
+
+    def __init__(self, actor: Actor, issue: Issue, store: ActorIssueStore) -> None:
+        """:param actor: Actor
+        :param issue: Issue
+        :param store: the store holding the values for this actor and issue
+        """
+        self.actor = actor
+        self.issue = issue
+        self.store = store
+        self.index = store.index(actor, issue)
+
+    @property
+    def position(self):
+        return self.store.position[self.index]
+
+    @position.setter
+    def position(self, value) -> None:
+        self.store.position[self.index] = value
+
+    @property
+    def salience(self):
+        return self.store.salience[self.index]
+
+    @salience.setter
+    def salience(self, value) -> None:
+        self.store.salience[self.index] = value
+
+    @property
+    def power(self):
+        return self.store.power[self.index]
+
+    @power.setter
+    def power(self, value) -> None:
+        self.store.power[self.index] = value
+
+    @property
+    def left(self) -> bool:
+        return bool(self.store.left[self.index])
+
+    @left.setter
+    def left(self, value: bool) -> None:
+        self.store.left[self.index] = value
+
+
+class ActorIssueView(BaseActorIssue):
+    """A view on the ActorIssue of the model for an exchange.
+
+    The actor, issue, salience and power are read from the underlying ActorIssue. Only the position is kept
+    by the view, because an exchange moves the position without changing the model.
+    """
+
+    __slots__ = ("actor_issue", "position")
+
+    def __init__(self, actor_issue: BaseActorIssue) -> None:
         self.actor_issue = actor_issue
+        self.position = actor_issue.position
+
+    @property
+    def actor(self) -> Actor:
+        return self.actor_issue.actor
 
+    @property
+    def issue(self) -> Issue:
+        return self.actor_issue.issue
 
-class SupplyActorIssue(ActorIssue):
+    @property
+    def salience(self):
+        return self.actor_issue.salience
+
+    @property
+    def power(self):
+        return self.actor_issue.power
+
+    @property
+    def left(self) -> bool:
+        return self.actor_issue.left
+
+
+class DemandActorIssue(ActorIssueView):
+    """Object for a demand issue, has the same properties as a ActorIssue."""
+
+    __slots__ = ()
+
+
+class SupplyActorIssue(ActorIssueView):
     """Object for a demand issue, has a extra voting_position (self.y)."""
 
-    def __init__(self, actor_issue: ActorIssue, y=None) -> None:
-        super().__init__(
-            actor_issue.actor,
-            actor_issue.issue,
-            actor_issue.position,
-            actor_issue.salience,
-            actor_issue.power,
-        )
+    __slots__ = ("y",)
+
+    def __init__(self, actor_issue: BaseActorIssue, y=None) -> None:
+        super().__init__(actor_issue)
 
         self.y = y
-        self.actor_issue = actor_issue
 
 
 class AbstractExchangeActor:
     """Represents an exchange actor. Contains his demand and supply issues and voting-position."""
 
+    __slots__ = (
+        "actor",
+        "supply",
+        "demand",
+        "y",
+        "start_position",
+        "eu",
+        "opposite_actor",
+        "move",
+        "moves",
+        "nbs_0",
+        "nbs_1",
+        "exchange",
+        "model",
+        "is_adjusted_by_nbs",
+    )
+
+    # the attributes that are set by the calculation of the exchange
+    calculated_attributes = ("y", "eu", "move", "moves", "nbs_0", "nbs_1", "is_adjusted_by_nbs")
+
     def __init__(
         self,
         model: "AbstractModel",
@@ -256,6 +434,13 @@ class AbstractExchangeActor:
 
         self.is_adjusted_by_nbs = False
 
+    def get_calculated_state(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.calculated_attributes)
+
+    def set_calculated_state(self, state: tuple) -> None:
+        for name, value in zip(self.calculated_attributes, state):
+            setattr(self, name, value)
+
     def is_move_valid(self, move) -> bool | None:
         """Cheks if a move not exceeds the interval [0,100].
 
@@ -291,6 +476,7 @@ class AbstractExchangeActor:
             y=self.y,
             salience_weight=self.model.SALIENCE_WEIGHT,
             fixed_weight=self.model.FIXED_WEIGHT,
+            number=self.model.number,
         )
 
     def actor_issues(self):
@@ -308,7 +494,9 @@ class AbstractExchangeActor:
     def adjust_nbs(self, position: Decimal | None):
         actor_issues = self.actor_issues()
 
-        updates = self.exchange.updates[self.supply.issue]
+        updates = self.exchange.updates.get(self.supply.issue, {})
+
+        self.model.stats.count("nbs_evaluations")
 
         from . import calculations  # TODO should be global import
 
@@ -318,6 +506,7 @@ class AbstractExchangeActor:
             actor=self.actor,
             new_position=position,
             denominator=self.model.nbs_denominators[self.supply.issue],
+            numerator=self.model.cached_numerator(self.supply.issue),
         )
 
     def equals_actor_demand_issue(self, other: "AbstractExchangeActor"):
@@ -388,11 +577,12 @@ class AbstractExchangeActor:
             delta = abs(
                 calculations.adjusted_nbs_by_position(
                     actor_issues=self.actor_issues(),
-                    updates=self.exchange.updates[self.supply.issue],
+                    updates=self.exchange.updates.get(self.supply.issue, {}),
                     actor=self.actor,
                     x_pos=self.supply.position,
                     new_nbs=self.opposite_actor.demand.position,
                     denominator=self.model.nbs_denominators[self.supply.issue],
+                    numerator=self.model.cached_numerator(self.supply.issue),
                 ),
             )
 
@@ -478,8 +668,26 @@ class AbstractExchangeActor:
 class AbstractExchange:
     """An exchange between two actors and two issues. Each actor has a demand and supply issue."""
 
+    __slots__ = (
+        "model",
+        "groups",
+        "gain",
+        "is_valid",
+        "re_calc",
+        "p",
+        "q",
+        "dp",
+        "dq",
+        "updates",
+        "i",
+        "j",
+    )
+
     actor_class = AbstractExchangeActor
 
+    # the attributes that are set by calculate, next to the ones of the exchange actors
+    calculated_attributes = ("gain", "is_valid", "dp", "dq")
+
     def __init__(self, i, j, p, q, m, groups) -> None:
         """An exchange between two actors and two issues. Each actor has a demand and supply issue
         :param i: Actor
@@ -553,6 +761,27 @@ class AbstractExchange:
         """Method stub to be overriden."""
         raise NotImplementedError
 
+    def calculate_from(self, state) -> NoReturn:
+        """Method stub to be overriden, finish the exchange with a state calculated elsewhere."""
+        raise NotImplementedError
+
+    def get_calculated_state(self) -> tuple:
+        """The result of calculate as plain values, so it can be sent to another process."""
+        return (
+            tuple(getattr(self, name) for name in self.calculated_attributes),
+            self.i.get_calculated_state(),
+            self.j.get_calculated_state(),
+        )
+
+    def set_calculated_state(self, state: tuple) -> None:
+        exchange, i, j = state
+
+        for name, value in zip(self.calculated_attributes, exchange):
+            setattr(self, name, value)
+
+        self.i.set_calculated_state(i)
+        self.j.set_calculated_state(j)
+
     def invalidate_move(self) -> None:
         self.i.moves.pop()
         self.j.moves.pop()
@@ -663,6 +892,7 @@ class AbstractExchange:
                 self.re_calc = True
 
         if self.re_calc:
+            self.model.stats.count("exchanges_recalculated")
             self.calculate()
 
     def validate_groups(self) -> bool:
@@ -715,20 +945,71 @@ class AbstractModel:
     FIXED_WEIGHT = 0.1
     VERBOSE = True  # verbose messages for debugging
 
-    def __init__(self, *args, **kwargs) -> None:
+    # the maximum difference between the gains of both actors before they are considered unequal
+    GAIN_THRESHOLDS = {"decimal": 1e-20, "float64": 1e-8}
+
+    def __init__(
+        self,
+        *args,
+        store: bool = False,
+        numeric: str = "decimal",
+        seed: int | None = None,
+        **kwargs,
+    ) -> None:
+        """:param store: keep the actor issue values in a dense ActorIssueStore instead of separate objects
+        :param numeric: "decimal" for the reference implementation or "float64" for native floats
+        :param seed: the seed of the random stream of the model, drawn from the random module when None
+        """
+        if numeric not in NUMERIC_TYPES:
+            msg = f"Unknown numeric mode '{numeric}', choose from {', '.join(NUMERIC_TYPES)}"
+            raise ValueError(msg)
+
+        self.numeric = numeric
+        self.number = NUMERIC_TYPES[numeric]
+        self.gain_threshold = self.GAIN_THRESHOLDS[numeric]
+
         self.issues = {}
         self.actor_issues = defaultdict(dict)
         self.actors = {}
-        self.exchanges: list[AbstractExchange] = []
+        self.exchanges: ExchangeList = ExchangeList()
+        # the exchanges that became invalid outside remove_invalid_exchanges, it drops them
+        self.invalid_exchanges: list[AbstractExchange] = []
         self.nbs = {}
         self.issue_combinations = []
         self.groups = {}
         self.moves = {}  # dict with issue,actor[move_1,move_2,move_3]
         self.nbs_denominators = {}
+        self.nbs_numerators = {}
         self.data_set_name = ""
         self.model_name = "abstract"
         self.tie_count = 0
 
+        # all the random draws of the model come from its own stream, so a model can be run again in isolation
+        if seed is None:
+            seed = random.getrandbits(63)
+
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        # timings and counters of the current iteration
+        self.stats = ModelStats()
+
+        self.store: ActorIssueStore | None = None
+
+        if store:
+            self.store = ActorIssueStore(dtype=object if numeric == "decimal" else np.float64)
+
+    def cached_numerator(self, issue: Issue):
+        """The NBS numerator of the issue to adjust for the actors that move, only in the float64 mode.
+
+        The Decimal mode returns None, the adjusted NBS is then summed over all the actors again so the
+        reference model keeps its exact results.
+        """
+        if self.numeric == "decimal":
+            return None
+
+        return self.nbs_numerators[issue]
+
     def get_actor_issue(self, actor: Actor, issue: Issue):
         """Getter function for an ActorIssue
         :param actor: the id of the actor
@@ -746,6 +1027,9 @@ class AbstractModel:
         :param field: str
         :return: Double.
         """
+        if self.store is not None:
+            return self._get_stored_value(actor, issue, field)
+
         a = self.actor_issues[issue][actor]
 
         if a is not False:
@@ -759,6 +1043,31 @@ class AbstractModel:
         msg = "ActorIssue not found"
         raise ValueError(msg)
 
+    def _get_stored_value(self, actor: Actor, issue: Issue, field):
+        """Same as get_value, but reads directly from the store."""
+        index = self.store.index(actor, issue)
+
+        if self.store.present[index]:
+            if field == "c":
+                return self.store.power[index]
+            if field == "s":
+                return self.store.salience[index]
+            if field == "x":
+                return self.store.position[index]
+
+        msg = "ActorIssue not found"
+        raise ValueError(msg)
+
+    @staticmethod
+    def intern(table: dict, item) -> int:
+        """The dense integer id for an actor or issue: the id of the equal item already in the table, or the
+        next free id. The ids are the rows and columns of the store.
+        """
+        if item in table:
+            return table[item].id
+
+        return len(table)
+
     def add_actor(self, actor_name, actor_id=None, comment: str = "") -> Actor:
         """Add an actor to the model
         :param comment:
@@ -768,7 +1077,12 @@ class AbstractModel:
         """
         actor = Actor(actor_name, actor_id)
         actor.comment = comment
+        actor.id = self.intern(self.actors, actor)
         self.actors[actor] = actor
+
+        if self.store is not None:
+            self.store.add_actor(actor)
+
         return actor
 
     def add_issue(self, issue_name, issue_id=None, comment: str = "") -> Issue:
@@ -777,9 +1091,14 @@ class AbstractModel:
         :param issue_id:
         :param issue_name:
         """
-        issue = Issue(issue_name)
+        issue = Issue(issue_name, number=self.number)
         issue.comment = comment
+        issue.id = self.intern(self.issues, issue)
         self.issues[issue] = issue
+
+        if self.store is not None:
+            self.store.add_issue(issue)
+
         return issue
 
     def add_actor_issue(self, actor, issue, position, salience, power):
@@ -818,29 +1137,78 @@ class AbstractModel:
         issue.calculate_step_size()
         normalized_position = issue.normalize(position)
 
+        if self.store is not None:
+            self.store.add(
+                actor,
+                issue,
+                self.number(normalized_position),
+                self.number(salience),
+                self.number(power),
+            )
+            self.actor_issues[issue][actor] = StoredActorIssue(actor, issue, self.store)
+
+            return self.actor_issues[issue][actor]
+
         self.actor_issues[issue][actor] = ActorIssue(
             actor,
             issue,
             normalized_position,
             salience,
             power,
+            number=self.number,
         )
 
         return self.actor_issues[issue][actor]
 
-    def add_exchange(self, i, j, p, q, groups) -> NoReturn:
+    def copy_actor_issues(self, prototype: "AbstractModel") -> None:
+        """Start from the actors, issues and actor issues of a prototype with the same store and
+        numeric mode. The actors and issues do not change during a run and are shared, only the
+        positions are copied.
+
+        :param prototype: a model that is filled by the factory and never runs
+        """
+        self.actors = dict(prototype.actors)
+        self.issues = dict(prototype.issues)
+
+        if self.store is not None:
+            self.store = prototype.store.copy()
+
+            for issue, actor_issues in prototype.actor_issues.items():
+                self.actor_issues[issue] = {
+                    actor: StoredActorIssue(actor, issue, self.store) for actor in actor_issues
+                }
+
+            return
+
+        for issue, actor_issues in prototype.actor_issues.items():
+            self.actor_issues[issue] = {
+                actor: actor_issue.copy() for actor, actor_issue in actor_issues.items()
+            }
+
+    def add_exchange(self, i, j, p, q, groups, state=None) -> NoReturn:
         """Add an exchange pair to the model
         :param i:
         :param j:
         :param p:
         :param q:
         :param groups:
+        :param state: the state of the exchange when it is calculated elsewhere, see calculate_from
         :return:
         """
         e = self.new_exchange_factory(i, j, p, q, self, groups)
-        e.calculate()
+
+        if state is None:
+            e.calculate()
+        else:
+            e.calculate_from(state)
+
+        self.stats.count("exchanges_created")
         self.eui.append(e.i.eu)
         self.exchanges.append(e)
+
+        if not e.is_valid:
+            self.invalid_exchanges.append(e)
+
         return e
 
     eui = []
@@ -851,19 +1219,46 @@ class AbstractModel:
         """
         Calculate the nash bargaining solution for all the issue
         """
+        self.stats.count("nbs_evaluations", len(self.actor_issues))
+
+        if self.store is not None:
+            self._calc_stored_nbs()
+            return
+
         for issue, actor_issues in self.actor_issues.items():
             self.nbs_denominators[issue] = calculations.calc_nbs_denominator(
                 actor_issues,
             )
 
-            nbs = calculations.nash_bargaining_solution(
-                actor_issues,
-                self.nbs_denominators[issue],
-            )
-            self.nbs[issue] = nbs
+            self.nbs_numerators[issue] = calculations.calc_nbs_numerator(actor_issues)
+
+            denominator = self.nbs_denominators[issue]
+            self.nbs[issue] = self.nbs_numerators[issue] / denominator if denominator != 0 else 0
+
+    def _calc_stored_nbs(self) -> None:
+        """Calculate the nash bargaining solution for all the issues at once from the store."""
+        denominators = self.store.nbs_denominators()
+        numerators = self.store.nbs_numerators()
+
+        for issue in self.actor_issues:
+            index = issue.id
+            denominator = denominators[index]
+
+            self.nbs_denominators[issue] = denominator
+            self.nbs_numerators[issue] = numerators[index]
+            self.nbs[issue] = numerators[index] / denominator if denominator != 0 else 0
 
     def determine_positions(self) -> None:
         """Determine if the position of an actor is left or right of the Nash Bargaining Solution on an issue."""
+        if self.store is not None:
+            nbs = np.zeros(len(self.store.issues), dtype=self.store.dtype)
+
+            for issue, issue_nbs in self.nbs.items():
+                nbs[issue.id] = issue_nbs
+
+            self.store.determine_positions(nbs)
+            return
+
         for issue_name, issue_nbs in self.nbs.items():
             for actor_issue in self.actor_issues[issue_name].values():
                 actor_issue.is_left_to_nbs(issue_nbs)
@@ -872,84 +1267,126 @@ class AbstractModel:
         """Create a list of all possible combinations for the issues."""
         self.issue_combinations = combinations(self.issues, 2)
 
-    def determine_groups_and_calculate_exchanges(self) -> None:
+    def left_matrix(self) -> tuple[list[Actor], dict, np.ndarray, np.ndarray]:
+        """The left flags of all actor issues as a boolean array.
+
+        :return: the actors (rows), the column of each issue, the left and the present (n_actors, n_issues) arrays
+        """
+        if self.store is not None:
+            columns = {issue: issue.id for issue in self.store.issues}
+
+            return self.store.actors, columns, self.store.left, self.store.present
+
+        actors = list(self.actors.values())
+        columns = {issue: column for column, issue in enumerate(self.issues)}
+
+        left = np.zeros((len(actors), len(columns)), dtype=bool)
+        present = np.zeros((len(actors), len(columns)), dtype=bool)
+
+        for row, actor in enumerate(actors):
+            for issue, column in columns.items():
+                actor_issue = self.get_actor_issue(actor=actor, issue=issue)
+
+                if actor_issue is not False:
+                    present[row, column] = True
+                    left[row, column] = actor_issue.left
+
+        return actors, columns, left, present
+
+    def determine_groups_and_calculate_exchanges(self, states: Iterator | None = None) -> None:
         """There are 4 groups: A, B, C, and D.
         An actor is member of group A if his position on both issues is left of the MDS.
         Each actor of group A can exchange with the actors of Group D, the actors of B with C.
+
+        :param states: the calculated states of the candidates in the order of exchange_candidates, e.g. from
+            a CandidatePool. The exchanges are calculated here when None.
         """
-        for combination in self.issue_combinations:
-            pos = [[], [], [], []]
+        for (p, q), i, j, groups in self.exchange_candidates(self.issue_combinations):
+            state = None if states is None else next(states)
 
-            for actor in self.actors.values():
-                a0 = self.get_actor_issue(actor=actor, issue=combination[0])
-                a1 = self.get_actor_issue(actor=actor, issue=combination[1])
+            self.add_exchange(i, j, p, q, groups=groups, state=state)
 
-                # some magic happens here: we have four possibilities and two bytes, so
-                # A = 00 = 0
-                # B = 01 = 1
-                # C = 10 = 2
-                # D = 11 = 3
+            self.actor_issues[p][i].group = groups[0]
+            self.actor_issues[q][j].group = groups[1]
 
-                if a0 is not False and a1 is not False:
-                    position = a0.left | a1.left * 2
-                    pos[position].append(actor)
+    def exchange_candidates(self, combinations) -> Iterator[tuple]:
+        """Divide the actors in groups for each issue combination and yield the pairs that can exchange.
+
+        :param combinations: the issue combinations
+        :return: iterator of (combination, actor i, actor j, groups)
+        """
+        actors, columns, left, present = self.left_matrix()
+
+        for combination in combinations:
+            pos = kernels.group_members(
+                left,
+                present,
+                columns[combination[0]],
+                columns[combination[1]],
+            )
 
             combination_id = f"{combination[0]}-{combination[1]}"
 
             self.groups[combination_id] = {
-                "a": pos[0],
-                "b": pos[1],
-                "c": pos[2],
-                "d": pos[3],
+                group: [actors[row] for row in rows] for group, rows in zip(kernels.GROUPS, pos)
             }
 
-            # all actors of group A and D
-            for i in pos[0]:
-                for j in pos[3]:
-                    self.add_exchange(
-                        i,
-                        j,
-                        combination[0],
-                        combination[1],
-                        groups=["a", "d"],
-                    )
-
-                    self.actor_issues[combination[0]][i].group = "a"
-                    self.actor_issues[combination[1]][j].group = "d"
-
-            # all actors of group B and C
-            for i in pos[1]:
-                for j in pos[2]:
-                    self.add_exchange(
-                        i,
-                        j,
-                        combination[0],
-                        combination[1],
-                        groups=["b", "c"],
-                    )
-                    self.actor_issues[combination[0]][i].group = "b"
-                    self.actor_issues[combination[1]][j].group = "c"
+            # all actors of group A and D, and all actors of group B and C
+            for first, second, groups in (
+                (pos[0], pos[3], ["a", "d"]),
+                (pos[1], pos[2], ["b", "c"]),
+            ):
+                candidates = self.filter_candidates(
+                    *kernels.candidate_pairs(first, second),
+                    columns[combination[0]],
+                    columns[combination[1]],
+                )
 
-    def remove_invalid_exchanges(self, res):
-        """Removes all the invalid exchanges from the exchanges list and return them
-        :param res: a list of exchanges
-        :return: a list with online valid exchanges.
+                for i, j in zip(*candidates):
+                    yield combination, actors[i], actors[j], groups
+
+    def filter_candidates(self, first, second, p: int, q: int) -> tuple[np.ndarray, np.ndarray]:
+        """Hook to drop the candidate pairs that can never give a valid exchange, before they are created.
+
+        :param first: actor rows of the first actor of each pair
+        :param second: actor rows of the second actor of each pair
+        :param p: the column of the first issue
+        :param q: the column of the second issue
+        :return: the remaining pairs
         """
-        length = len(self.exchanges)
+        return first, second
+
+    def remove_invalid_exchanges(self, res):
+        """Recalculate the exchanges after the execution of res and remove the invalid ones.
+
+        Only the exchanges that share an actor and issue with res can change, the exchanges keep an index
+        of these so the other exchanges are not visited. The exchanges with a new gain are moved in the
+        queue of a model that orders them by gain.
 
-        valid_exchanges = []
+        :param res: the executed exchange
+        :return: the exchanges that became invalid
+        """
         invalid_exchanges = []
 
-        for i in range(length):
-            if self.exchanges[i].is_valid:
-                self.exchanges[i].recalculate(res)
+        for exchange in self.exchanges.affected(res):
+            if exchange.is_valid:
+                exchange.recalculate(res)
+
+                if exchange.is_valid:
+                    if exchange.re_calc:
+                        self.exchanges.update(exchange)
+                    continue
+
+                invalid_exchanges.append(exchange)
+
+            self.exchanges.remove(exchange)
 
-                if self.exchanges[i].is_valid:
-                    valid_exchanges.append(self.exchanges[i])
-                else:
-                    invalid_exchanges.append(self.exchanges[i])
+        # the exchanges that became invalid otherwise are dropped silently
+        for exchange in self.invalid_exchanges:
+            if exchange in self.exchanges:
+                self.exchanges.remove(exchange)
 
-        self.exchanges = valid_exchanges
+        self.invalid_exchanges.clear()
 
         return invalid_exchanges
 
@@ -1,4 +1,3 @@
-import copy
 import decimal
 
 from decide.model import base
@@ -57,37 +56,78 @@ def calc_nbs_denominator(actor_issues) -> int:
     return denominator
 
 
-def adjusted_nbs(actor_issues, updates, actor, new_position, denominator):
-    """Adjust the list over actor_issues and calculates the new nash bargaining solution.
+def calc_nbs_numerator(actor_issues):
+    r"""Calculate the numerator for this issue.
+
+    :math:`\\sum_{i=1}^n C_{id} S_{id} X_{id}`
+
+    :param actor_issues: all the other actors on this issue
+    :return: Decimal
+    """
+    numerator = 0
+    for v in actor_issues.values():
+        numerator += v.position * v.salience * v.power
+
+    return numerator
+
+
+def adjusted_numerator(actor_issues, positions, numerator=None):
+    """The numerator of an issue when the actors from positions are on another position.
+
+    With a cached numerator only the actors that moved are visited, the numerator of the other
+    actors stays the same. Without it every actor is summed again, in the same order as
+    calc_nbs_numerator, so the rounding of the Decimal reference model does not change.
+
+    :param actor_issues: all the actors on this issue
+    :param positions: dictionary with key (actor) and value (position)
+    :param numerator: Decimal, the cached numerator, the exact sum is used when omitted
+    :return: Decimal, the numerator with the given positions
+    """
+    if numerator is None:
+        numerator = 0
+
+        for actor, v in actor_issues.items():
+            numerator += positions.get(actor, v.position) * v.salience * v.power
+
+        return numerator
+
+    for actor, position in positions.items():
+        actor_issue = actor_issues[actor]
+        numerator += (position - actor_issue.position) * actor_issue.salience * actor_issue.power
+
+    return numerator
+
+
+def adjusted_nbs(actor_issues, updates, actor, new_position, denominator, numerator=None):
+    """Calculate the new nash bargaining solution when the actors from updates and the given actor move.
 
     :param actor_issues: List[ActorIssue]
     :param updates: dictionary with key (actor) and value (position)
     :param actor: string, current actor
     :param new_position: int, the new position
     :param denominator: Decimal, the cached denominator
+    :param numerator: Decimal, the cached numerator, see adjusted_numerator
     :return: Decimal, the new nash bargaining solution
     """
-    copy_ai = {}
-
-    for v in actor_issues.values():
-        copy_ai[v.actor] = base.ActorIssue(
-            v.actor,
-            v.issue,
-            position=v.position,
-            power=v.power,
-            salience=v.salience,
-        )
-
-    for key, value in updates.items():
-        if key in copy_ai:  # TODO: this should not be possible
-            copy_ai[key].position = value
+    if denominator == 0:
+        return 0
 
-    copy_ai[actor].position = new_position
+    # TODO: an update for an actor that is not on this issue should not be possible
+    positions = {key: value for key, value in updates.items() if key in actor_issues}
+    positions[actor] = new_position
 
-    return nash_bargaining_solution(copy_ai, denominator)
+    return adjusted_numerator(actor_issues, positions, numerator) / denominator
 
 
-def adjusted_nbs_by_position(actor_issues, updates, actor, x_pos, new_nbs, denominator):
+def adjusted_nbs_by_position(
+    actor_issues,
+    updates,
+    actor,
+    x_pos,
+    new_nbs,
+    denominator,
+    numerator=None,
+):
     """Calculate the new position (delta) of the given actor when the MDS is adjusted
     :param actor_issues:
     :param updates:
@@ -95,25 +135,15 @@ def adjusted_nbs_by_position(actor_issues, updates, actor, x_pos, new_nbs, denom
     :param x_pos:
     :param new_nbs:
     :param denominator:
+    :param numerator: the cached numerator, see adjusted_numerator
     :return:
     """
-    copy_ai = copy.deepcopy(actor_issues)
-
-    # to be calculate:
-    copy_ai[actor].position = x_pos
+    positions = {actor: x_pos}
+    positions.update(updates)
 
-    for key, value in updates.items():
-        copy_ai[key].position = value
+    left = (new_nbs * denominator) - adjusted_numerator(actor_issues, positions, numerator)
 
-    nominator = 0
-
-    for key, value in copy_ai.items():
-        if key is not actor:
-            nominator += value.position * value.salience * value.power
-
-    left = (new_nbs * denominator) - nominator
-
-    return left / (copy_ai[actor].salience * copy_ai[actor].power)
+    return left / (actor_issues[actor].salience * actor_issues[actor].power)
 
 
 def reverse_move(actor_issues, actor: base.AbstractExchangeActor, exchange_ratio):
@@ -298,9 +328,16 @@ def exchange_ratio_by_expected_utility(delta_q, sq, sp, utility: int = 0):
     return (utility + (delta_q * sq)) / sp
 
 
-def new_start_position(salience, x, y, salience_weight: float = 0.4, fixed_weight: float = 0.1):
-    sw = decimal.Decimal(salience_weight)
-    fw = decimal.Decimal(fixed_weight)
+def new_start_position(
+    salience,
+    x,
+    y,
+    salience_weight: float = 0.4,
+    fixed_weight: float = 0.1,
+    number=decimal.Decimal,
+):
+    sw = number(salience_weight)
+    fw = number(fixed_weight)
     swv = (1 - salience) * sw * y
     fwv = fw * y
     pv = (1 - (1 - salience) * sw - fw) * x
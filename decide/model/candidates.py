@@ -0,0 +1,139 @@
+"""Calculate the candidate exchanges of an iteration on a pool of processes.
+
+Each worker holds its own copy of the model, built by the same factory. At the start of an iteration the parent
+writes the positions of the actor issues to shared memory, the workers copy them into their model and calculate
+the exchanges of a chunk of the issue combinations. Only the plain results travel back. The parent creates the
+exchanges from these results in the same order as a serial run, the random part of the Randomized Equal Gain
+model is done there, so a seeded model draws the same numbers as without the pool.
+
+Only the float64 store of the Equal Gain model can be shared, the Decimal values are Python objects.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from itertools import repeat
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from decide.data.modelfactory import ModelFactory
+from decide.model.equalgain import EqualGainModel
+
+# the state of a worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(factory: ModelFactory, model_klass, name: str, shape: tuple[int, int]) -> None:
+    model = factory(model_klass=model_klass, store=True, numeric="float64")
+
+    memory = shared_memory.SharedMemory(name=name)
+
+    _worker.update(
+        model=model,
+        memory=memory,
+        position=np.ndarray(shape, dtype=np.float64, buffer=memory.buf),
+        round=None,
+    )
+
+
+def _calculate(round_number: int, indices: list[int]) -> tuple[list[tuple], dict]:
+    """Calculate the candidates of the issue combinations with the given indices.
+
+    :param round_number: the positions are read from the shared memory once per round
+    :return: the states of the candidates and the counters of the worker
+    """
+    model = _worker["model"]
+
+    if _worker["round"] != round_number:
+        model.store.position[:] = _worker["position"]
+        model.calc_nbs()
+        model.determine_positions()
+        model.calc_combinations()
+
+        _worker["combinations"] = list(model.issue_combinations)
+        _worker["round"] = round_number
+
+    model.stats.reset()
+
+    states = model.calculate_candidates([_worker["combinations"][index] for index in indices])
+
+    return states, dict(model.stats.counters)
+
+
+class CandidatePool:
+    """A pool of processes that calculates the candidate exchanges for the ModelLoop."""
+
+    def __init__(self, factory: ModelFactory, workers: int, model_klass=EqualGainModel) -> None:
+        """:param factory: creates the copies of the model in the workers, the same factory as the model itself
+        :param workers: the number of processes
+        :param model_klass: the Equal Gain model or a subclass
+        """
+        if not issubclass(model_klass, EqualGainModel):
+            msg = "The candidates can only be calculated in parallel for the Equal Gain model"
+            raise ValueError(msg)
+
+        model = factory(model_klass=model_klass, store=True, numeric="float64")
+
+        self.workers = workers
+        self.round = 0
+        self.memory = shared_memory.SharedMemory(
+            create=True,
+            size=max(model.store.position.nbytes, 1),
+        )
+        self.position = np.ndarray(model.store.shape, dtype=np.float64, buffer=self.memory.buf)
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(factory, model_klass, self.memory.name, model.store.shape),
+        )
+
+    def chunks(self, size: int) -> list[list[int]]:
+        """Divide the indices of the issue combinations in a few chunks per worker, in order."""
+        count = min(size, self.workers * 4) or 1
+
+        return [list(chunk) for chunk in np.array_split(np.arange(size), count) if len(chunk) > 0]
+
+    def determine_groups_and_calculate_exchanges(self, model: EqualGainModel) -> None:
+        """Replaces model.determine_groups_and_calculate_exchanges, after the positions are determined."""
+        if (
+            not isinstance(model, EqualGainModel)
+            or model.store is None
+            or model.numeric != "float64"
+        ):
+            msg = "The candidate pool needs an Equal Gain model with a float64 store"
+            raise ValueError(msg)
+
+        self.round += 1
+        self.position[:] = model.store.position
+
+        size = len(list(combinations(model.issues, 2)))
+
+        states = []
+
+        for chunk_states, counters in self.executor.map(
+            _calculate,
+            repeat(self.round),
+            self.chunks(size),
+        ):
+            states += chunk_states
+            model.stats.counters.update(counters)
+
+        remaining = iter(states)
+
+        model.determine_groups_and_calculate_exchanges(remaining)
+
+        if next(remaining, None) is not None:
+            msg = "The candidates of the workers do not match the candidates of the model"
+            raise RuntimeError(msg)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "CandidatePool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,180 @@
+"""Write the progress of a run to disk, so an interrupted run can continue where it stopped.
+
+A checkpoint holds the (p, repetition) units that are done, the model, loop counter and convergence
+of the repetition in progress, the model the observers refer to, the values they collected and the
+random state. It also remembers the highest id of each table of the database: the rows written after
+the checkpoint are removed on resume, they are written again.
+"""
+
+import os
+import pickle
+import random
+from datetime import datetime
+from pathlib import Path
+
+import peewee
+
+from decide.data import database as db
+from decide.log import logger
+from decide.model.observers.observer import Observable
+
+# the rows of these tables are shared by all the runs on the data set, they are never removed
+SHARED_TABLES = (db.DataSet, db.Actor, db.Issue)
+
+
+class Checkpoint:
+    """The progress of a run, saved to ``checkpoint.pickle`` in the output directory."""
+
+    FILENAME = "checkpoint.pickle"
+
+    def __init__(self, directory: Path, options: dict, every: int) -> None:
+        """:param directory: the output directory of the run
+        :param options: the options of the run, a resumed run needs the same options
+        :param every: save the checkpoint after this many iterations
+        """
+        self.path = Path(directory) / self.FILENAME
+        self.options = options
+        self.every = every
+
+        self.completed = set()
+        # the p values of which the run is finished, also when not all their repetitions ran
+        self.finished = set()
+        self.current = None
+        self.open = None
+        self.pending = 0
+
+    def start_repetitions(self, randomized_value, start_time: datetime) -> None:
+        self.open = (randomized_value, start_time)
+
+    def finish_repetitions(self) -> None:
+        if self.open is not None:
+            self.finished.add(self.open[0])
+
+        self.open = None
+
+    def iteration(
+        self,
+        event_handler: Observable,
+        unit: tuple,
+        model,
+        iteration: int,
+        convergence=None,
+    ) -> None:
+        """Called after each loop, saves the model of the repetition in progress when the checkpoint is due.
+
+        :param unit: the (p, repetition) of the model
+        :param iteration: the number of iterations that are done
+        :param convergence: the Convergence of the repetition, if any
+        """
+        self.current = (unit, model, iteration, convergence)
+        self.pending += 1
+
+        if self.pending >= self.every:
+            self.save(event_handler)
+
+    def complete(self, event_handler: Observable, unit: tuple, iterations: int = 0) -> None:
+        """Called after the last event of a repetition.
+
+        :param iterations: the iterations to count, for the repetitions that are not counted by iteration
+        """
+        self.completed.add(unit)
+        self.current = None
+        self.pending += iterations
+
+        if self.pending >= self.every:
+            self.save(event_handler)
+
+    def save(self, event_handler: Observable) -> None:
+        # first, the observers may still be writing the events that were fired
+        observers = event_handler.get_state()
+
+        watermarks = {
+            table._meta.table_name: table.select(peewee.fn.MAX(table.id)).scalar() or 0
+            for table in db.Manager.tables
+            if table not in SHARED_TABLES
+        }
+
+        state = {
+            "options": self.options,
+            "every": self.every,
+            "completed": self.completed,
+            "finished": self.finished,
+            "current": self.current,
+            "open": self.open,
+            "model": event_handler.observed_model,
+            "observers": observers,
+            "random": random.getstate(),
+            "watermarks": watermarks,
+        }
+
+        # write next to the checkpoint and swap, an interrupted write leaves the previous checkpoint intact
+        temporary = self.path.with_suffix(".tmp")
+
+        with temporary.open("wb") as file:
+            pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary, self.path)
+
+        self.pending = 0
+
+        logger.info("Checkpoint", path=str(self.path), completed=len(self.completed))
+
+    def remove(self) -> None:
+        """The run is done, there is nothing to resume."""
+        self.path.unlink(missing_ok=True)
+
+    @classmethod
+    def resume(
+        cls,
+        directory: Path,
+        options: dict,
+        event_handler: Observable,
+        every: int = 0,
+    ) -> "Checkpoint":
+        """Load the checkpoint of the directory and restore the observers, the random state and the database.
+
+        Call this after before_model, so the database is open.
+
+        :param every: overrides the interval of the checkpoint when not 0
+        :raises ValueError: when the options differ from the options of the checkpoint
+        """
+        path = Path(directory) / cls.FILENAME
+
+        if not path.is_file():
+            msg = f"There is no checkpoint in {directory}"
+            raise FileNotFoundError(msg)
+
+        with path.open("rb") as file:
+            state = pickle.load(file)
+
+        changed = sorted(
+            key
+            for key in options.keys() | state["options"].keys()
+            if options.get(key) != state["options"].get(key)
+        )
+
+        if changed:
+            msg = f"The options {', '.join(changed)} differ from the options of the checkpoint"
+            raise ValueError(msg)
+
+        checkpoint = cls(directory, state["options"], every or state["every"])
+        checkpoint.completed = state["completed"]
+        checkpoint.finished = state["finished"]
+        checkpoint.current = state["current"]
+        checkpoint.open = state["open"]
+
+        event_handler.update_model_ref(state["model"])
+        event_handler.set_state(state["observers"])
+        random.setstate(state["random"])
+
+        # remove the rows that were written after the checkpoint
+        with db.connection.atomic():
+            for table in db.Manager.tables:
+                if table not in SHARED_TABLES:
+                    watermark = state["watermarks"][table._meta.table_name]
+
+                    table.delete().where(table.id > watermark).execute()
+
+        logger.info("Resume", path=str(path), completed=len(checkpoint.completed))
+
+        return checkpoint
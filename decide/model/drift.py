@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.log import logger
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.utils import ModelLoop
+
+DATA_SETS = ("sample_data.txt", "copenhagen.csv", "cop21.csv")
+
+
+def run_model(
+    data_file: InputDataFile,
+    numeric: str,
+    iterations: int,
+    seed: int = 0,
+    randomized_value=None,
+) -> list[dict]:
+    """Run the Equal Gain model and keep the nbs and the positions after each iteration.
+
+    :param data_file: the parsed input file
+    :param numeric: the numeric mode of the model, decimal or float64
+    :param iterations: the number of rounds
+    :param seed: the seed of the model, so both engines draw the same numbers
+    :param randomized_value: the p value of the model
+    :return: for each iteration a dict with the nbs per issue and the position per actor issue
+    """
+    model = ModelFactory(data_file)(
+        EqualGainModel,
+        randomized_value=randomized_value,
+        numeric=numeric,
+        seed=seed,
+    )
+    model_loop = ModelLoop(model, Observable(model, Path()), 0)
+
+    history = []
+
+    for _ in range(iterations):
+        model_loop.loop()
+
+        history.append(
+            {
+                "nbs": {issue.issue_id: float(nbs) for issue, nbs in model.nbs.items()},
+                "positions": {
+                    (issue.issue_id, actor.actor_id): float(actor_issue.position)
+                    for issue, actor_issues in model.actor_issues.items()
+                    for actor, actor_issue in actor_issues.items()
+                },
+                "ties": model.tie_count,
+            },
+        )
+
+    return history
+
+
+def drift(
+    data_file: InputDataFile,
+    iterations: int = 10,
+    seed: int = 0,
+    randomized_value=None,
+) -> list[dict]:
+    """Calculate the difference between the float64 engine and the Decimal reference engine.
+
+    :return: for each iteration the largest absolute difference of the nbs and of the positions
+    """
+    reference = run_model(data_file, "decimal", iterations, seed, randomized_value)
+    fast = run_model(data_file, "float64", iterations, seed, randomized_value)
+
+    result = []
+
+    for iteration, (expected, actual) in enumerate(zip(reference, fast, strict=True)):
+        result.append(
+            {
+                "iteration": iteration,
+                "nbs": max(
+                    abs(value - actual["nbs"][key]) for key, value in expected["nbs"].items()
+                ),
+                "position": max(
+                    abs(value - actual["positions"][key])
+                    for key, value in expected["positions"].items()
+                ),
+                "ties_decimal": expected["ties"],
+                "ties_float64": actual["ties"],
+            },
+        )
+
+    return result
+
+
+def report(data_sets=DATA_SETS, iterations: int = 10, seed: int = 0) -> dict[str, list[dict]]:
+    """Log the drift of the float64 engine for each of the given (bundled) data sets."""
+    results = {}
+
+    for data_set in data_sets:
+        results[data_set] = drift(
+            InputDataFile.open(input_folder / data_set),
+            iterations=iterations,
+            seed=seed,
+        )
+
+        for row in results[data_set]:
+            logger.info("Drift float64", data_set=data_set, **row)
+
+    return results
+
+
+if __name__ == "__main__":
+    report()
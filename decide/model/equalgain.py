@@ -1,18 +1,23 @@
-import decimal
 import logging
-import random
+from collections.abc import Iterator
 from decimal import Decimal
-from operator import attrgetter
 
+import numpy as np
 from typesystem.fields import Decimal
 
 from decide.model import base
 from decide.model import calculations
+from decide.model import kernels
+from decide.model.queue import ExchangeQueue
 
 
 class EqualGainExchangeActor(base.AbstractExchangeActor):
     """AbstractExchangeActor is the same actor..."""
 
+    __slots__ = ("equal_gain_voting", "z", "u", "v", "eu_max")
+
+    calculated_attributes = (*base.AbstractExchangeActor.calculated_attributes, "equal_gain_voting")
+
     exchange: "EqualGainExchange"
 
     def __init__(
@@ -157,15 +162,17 @@ class EqualGainExchangeActor(base.AbstractExchangeActor):
                     delta = abs(
                         calculations.adjusted_nbs_by_position(
                             actor_issues=self.opposite_actor.actor_issues(),
-                            updates=self.opposite_actor.exchange.updates[
-                                self.opposite_actor.supply.issue
-                            ],
+                            updates=self.opposite_actor.exchange.updates.get(
+                                self.opposite_actor.supply.issue,
+                                {},
+                            ),
                             actor=self.opposite_actor.actor,
                             x_pos=self.opposite_actor.supply.position,
                             new_nbs=self.demand.position,
                             denominator=self.model.nbs_denominators[
                                 self.opposite_actor.supply.issue
                             ],
+                            numerator=self.model.cached_numerator(self.opposite_actor.supply.issue),
                         ),
                     )
 
@@ -237,11 +244,12 @@ class EqualGainExchangeActor(base.AbstractExchangeActor):
                 delta = abs(
                     calculations.adjusted_nbs_by_position(
                         actor_issues=self.actor_issues(),
-                        updates=self.exchange.updates[self.supply.issue],
+                        updates=self.exchange.updates.get(self.supply.issue, {}),
                         actor=self.actor,
                         x_pos=self.supply.position,
                         new_nbs=self.opposite_actor.demand.position,
                         denominator=self.model.nbs_denominators[self.supply.issue],
+                        numerator=self.model.cached_numerator(self.supply.issue),
                     ),
                 )
 
@@ -348,6 +356,8 @@ class EqualGainExchangeActor(base.AbstractExchangeActor):
 
 
 class EqualGainExchange(base.AbstractExchange):
+    __slots__ = ()
+
     actor_class = EqualGainExchangeActor
     i: EqualGainExchangeActor
     j: EqualGainExchangeActor
@@ -358,6 +368,26 @@ class EqualGainExchange(base.AbstractExchange):
         super().__init__(i, j, p, q, m, groups)
 
     def calculate(self) -> None:
+        if self.calculate_equal_gain():
+            self.randomize()
+
+    def calculate_from(self, state: tuple) -> None:
+        """Finish an exchange of which calculate_equal_gain is done in another process.
+
+        :param state: the result of calculate_equal_gain and the calculated state of the exchange
+        """
+        randomize, calculated_state = state
+
+        self.set_calculated_state(calculated_state)
+
+        if randomize:
+            self.randomize()
+
+    def calculate_equal_gain(self) -> bool:
+        """The deterministic part of the calculation, without the random variation of the gain.
+
+        :return: True when the exchange is valid before the nbs check, only then the gain is randomized
+        """
         # first we try to move j to the position of i on issue p
         # we start with the calculation for j
         self.dp = calculations.by_absolute_move(self.j.actor_issues(), self.j)
@@ -401,7 +431,7 @@ class EqualGainExchange(base.AbstractExchange):
         euj = calculations.expected_utility(self.j, self.dp, self.dq)
 
         # since this is the Equal Gain model, the gains should be equal
-        if calculations.is_gain_equal(eui, euj):
+        if calculations.is_gain_equal(eui, euj, self.model.gain_threshold):
             self.gain = abs(eui)
             self.i.eu = self.gain
             self.j.eu = self.gain
@@ -423,12 +453,16 @@ class EqualGainExchange(base.AbstractExchange):
 
             self.is_valid = b1 and b2
         else:
-            return  # stop if its not valid
+            return False  # stop if its not valid
 
+        return True
+
+    def randomize(self) -> None:
+        """Add the random variation of the randomized Equal Gain model to the gain."""
         if self.model.randomized_value is not None and self.model.randomized_value > 0.0:
-            u = random.uniform(0, 1)
-            v = random.uniform(0, 1)
-            z = decimal.Decimal(random.uniform(0, 1))
+            u = self.model.random.uniform(0, 1)
+            v = self.model.random.uniform(0, 1)
+            z = self.model.number(self.model.random.uniform(0, 1))
 
             self.calculate_maximum_utility()
 
@@ -619,12 +653,16 @@ class EqualGainModel(base.AbstractModel):
     """
     ALLOW_RANDOM = True
 
-    def __init__(self, randomized_value=None) -> None:
-        super().__init__()
-        self.exchanges: list[EqualGainExchange]
+    def __init__(self, randomized_value=None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.exchanges: ExchangeQueue = ExchangeQueue()
+        # float64 copies of the store, used to skip the invalid candidates
+        self.candidate_values = None
 
-        if isinstance(randomized_value, str):
-            randomized_value = decimal.Decimal(randomized_value)
+        if isinstance(randomized_value, str) or (
+            randomized_value is not None and self.numeric != "decimal"
+        ):
+            randomized_value = self.number(randomized_value)
 
         self.randomized_value = randomized_value
 
@@ -634,33 +672,78 @@ class EqualGainModel(base.AbstractModel):
             self.model_name += "-" + str(round(randomized_value, 2))
 
     def sort_exchanges(self) -> None:
-        """The exchanges are sorted by there (equal) gain, highest first."""
-        self.exchanges.sort(key=attrgetter("gain"), reverse=True)
+        """The queue keeps the exchanges sorted by there (equal) gain, highest first.
+
+        Only needed when the gain of the exchanges is changed outside the model.
+        """
+        self.exchanges.rekey()
 
     def highest_gain(self) -> EqualGainExchange:
-        """Overrides Abstract # To sort the list in place...
+        """Overrides Abstract
         :return:
         """
-        self.sort_exchanges()
-
-        realize = self.exchanges.pop(0)
+        realize = self.exchanges.pop()
 
         if len(self.exchanges) > 0:
             # in some cases the exchanges have an equal gain, choice randomly between them
             if EqualGainModel.ALLOW_RANDOM:
-                next_exchange = self.exchanges[0]
+                next_exchange = self.exchanges.peek()
 
                 if abs(realize.gain - next_exchange.gain) < 1e-20:
                     self.tie_count += 1
 
-                    if random.random() >= 0.5:
-                        self.exchanges.append(realize)
-                        realize = self.exchanges.pop(0)
-                    else:
-                        self.exchanges.append(next_exchange)
+                    if self.random.random() >= 0.5:
+                        realize = self.exchanges.pushpop(realize)
 
         return realize
 
+    def prepare_candidate_values(self) -> None:
+        """Take the float64 copies of the store that are used by filter_candidates."""
+        if self.store is not None:
+            self.candidate_values = (
+                self.store.position.astype(np.float64),
+                self.store.salience.astype(np.float64),
+                self.store.power.astype(np.float64),
+                self.store.nbs_denominators().astype(np.float64),
+            )
+
+    def determine_groups_and_calculate_exchanges(self, states: Iterator | None = None) -> None:
+        self.prepare_candidate_values()
+
+        super().determine_groups_and_calculate_exchanges(states)
+
+        self.candidate_values = None
+
+    def calculate_candidates(self, combinations) -> list[tuple]:
+        """The deterministic part of the exchanges on the given issue combinations, used by a CandidatePool.
+
+        :param combinations: the issue combinations
+        :return: (reached, calculated state) for each candidate in the order of exchange_candidates
+        """
+        self.prepare_candidate_values()
+
+        states = []
+
+        for (p, q), i, j, groups in self.exchange_candidates(combinations):
+            exchange = self.new_exchange_factory(i, j, p, q, self, groups)
+
+            states.append((exchange.calculate_equal_gain(), exchange.get_calculated_state()))
+
+        self.candidate_values = None
+
+        return states
+
+    def filter_candidates(self, first, second, p: int, q: int) -> tuple[np.ndarray, np.ndarray]:
+        """Skip the pairs of which the exchange is invalid for certain, needs the store."""
+        if self.candidate_values is None:
+            return first, second
+
+        valid = kernels.equal_gain_candidates(*self.candidate_values, first, second, p, q)
+
+        self.stats.count("candidates_skipped", int(len(valid) - valid.sum()))
+
+        return first[valid], second[valid]
+
     @staticmethod
     def new_exchange_factory(i, j, p, q, model, groups) -> EqualGainExchange:
         return EqualGainExchange(i, j, p, q, model, groups)
@@ -0,0 +1,107 @@
+"""Vectorized building blocks for the model loop, working on the (actor, issue) arrays of the store."""
+
+import numpy as np
+
+GROUPS = ("a", "b", "c", "d")
+
+
+def group_members(left: np.ndarray, present: np.ndarray, p: int, q: int) -> list[np.ndarray]:
+    """Divide the actors over the four groups of the issue combination p and q.
+
+    The group is the left flag on p plus two times the left flag on q, so
+    A = 00 = 0, B = 01 = 1, C = 10 = 2 and D = 11 = 3. Actors without a position on both issues are
+    not in a group.
+
+    :param left: (n_actors, n_issues) boolean array, is the position left of the nbs
+    :param present: (n_actors, n_issues) boolean array, has the actor a position on the issue
+    :param p: the column of the first issue
+    :param q: the column of the second issue
+    :return: the actor rows of group A, B, C and D, in row order
+    """
+    both = present[:, p] & present[:, q]
+    group = left[:, p].astype(np.int8) | (left[:, q].astype(np.int8) << 1)
+
+    return [np.flatnonzero(both & (group == g)) for g in range(len(GROUPS))]
+
+
+def candidate_pairs(first: np.ndarray, second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """All the pairs of an actor of the first group and an actor of the second group.
+
+    The pairs are ordered like two nested loops, the first group in the outer loop.
+
+    :return: two index arrays of the same length
+    """
+    return np.repeat(first, len(second)), np.tile(second, len(first))
+
+
+def equal_gain_candidates(
+    position: np.ndarray,
+    salience: np.ndarray,
+    power: np.ndarray,
+    denominators: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    p: int,
+    q: int,
+    slack: float = 1e-11,
+) -> np.ndarray:
+    """Evaluate the first part of ``EqualGainExchange.calculate`` for a batch of candidate pairs in float64.
+
+    The exchange ratios, the moves, the voting positions and the gain are calculated for all the pairs at
+    once. A candidate is rejected only when the exchange is invalid beyond the given slack, so the float64
+    rounding never rejects an exchange that is valid in the Decimal model. The candidates that pass still
+    need to be calculated by the exchange itself, this includes the check against the nbs.
+
+    :param position: (n_actors, n_issues) float64 array
+    :param salience: (n_actors, n_issues) float64 array
+    :param power: (n_actors, n_issues) float64 array
+    :param denominators: the sum of salience times power for each issue
+    :param first: actor rows of the first actor of each pair
+    :param second: actor rows of the second actor of each pair
+    :param p: the column of the first issue
+    :param q: the column of the second issue
+    :param slack: the margin on the validity thresholds
+    :return: boolean array, False when the exchange of the pair is certainly invalid
+    """
+    s, c, x = salience, power, position
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # the actor i of the exchange supplies q and demands p, the actor j supplies p and demands q
+        swap = (s[first, p] / s[first, q]) < (s[second, p] / s[second, q])
+        a = np.where(swap, second, first)
+        b = np.where(swap, first, second)
+
+        # first try to move j to the position of i on issue p
+        move_j = np.abs(x[a, p] - x[b, p])
+        dp = move_j * s[b, p] * c[b, p] / denominators[p]
+        dq = ((s[b, p] + s[a, p]) / (s[b, q] + s[a, q])) * dp
+        move_i = dq * denominators[q] / (c[a, q] * s[a, q])
+
+        # when the move of i exceeds the interval, move i to the position of j on issue q
+        interval_i = np.abs(x[b, q] - x[a, q])
+        exceeds = np.abs(move_i) > interval_i
+
+        dq = np.where(exceeds, interval_i * s[a, q] * c[a, q] / denominators[q], dq)
+        dp = np.where(exceeds, ((s[a, q] + s[b, q]) / (s[a, p] + s[b, p])) * dq, dp)
+        move_i = np.where(exceeds, interval_i, move_i)
+        move_j = np.where(exceeds, dp * denominators[p] / (c[b, p] * s[b, p]), move_j)
+
+        move_i = np.where(x[a, q] > x[b, q], -move_i, move_i)
+        move_j = np.where(x[b, p] > x[a, p], -move_j, move_j)
+
+        y_i = x[a, q] + move_i
+        y_j = x[b, p] + move_j
+
+        gain = np.abs(dq * s[a, q] - dp * s[a, p])
+
+        invalid = gain < 1e-10 - slack
+
+        for move, y in ((move_i, y_i), (move_j, y_j)):
+            invalid |= np.abs(move) > 100 + slack
+            invalid |= np.abs(move) <= 1e-10 - slack
+            invalid |= (y < -slack) | (y > 100 + slack)
+
+        # let the exchange itself handle the pairs that do not give a finite result
+        finite = np.isfinite(gain) & np.isfinite(y_i) & np.isfinite(y_j)
+
+    return ~(invalid & finite)
@@ -2,6 +2,7 @@ import collections
 import csv
 import os
 from collections import defaultdict
+from functools import partial
 
 from decide.model import base
 from decide.model import calculations
@@ -16,13 +17,14 @@ class Externalities(observer.Observer):
 
     def __init__(self, observable: observer.Observable, summary_only: bool = False) -> None:
         super().__init__(observable)
-        self.actor_totals = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        # partial instead of lambda, so the totals can be pickled in a checkpoint
+        self.actor_totals = defaultdict(partial(defaultdict, partial(defaultdict, list)))
         self.summary_only = summary_only
 
     def _setup(self) -> None:
         """Initializes the class attributes for reusable purpose."""
         self.connections = {}
-        self.actors = defaultdict(lambda: defaultdict(int))
+        self.actors = defaultdict(partial(defaultdict, int))
         self.exchanges = []
 
         self.database_objects = []
@@ -150,7 +152,7 @@ class Externalities(observer.Observer):
             ],
         )
 
-    def before_repetitions(self, repetitions, iterations, randomized_value=None) -> None:
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
         """Create storage units for each repetition and each iteration
         :return:
         """
@@ -5,6 +5,7 @@ import os
 from _csv import Writer
 from collections import OrderedDict
 from collections import defaultdict
+from functools import partial
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -39,20 +40,22 @@ class IssueDevelopment(observer.Observer):
         self.issue_obj = None
         self.write_voting_position = write_voting_position
 
+        # partial instead of lambda, so the sums can be pickled in a checkpoint
         self.preference_history_sum = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list)),
+            partial(defaultdict, partial(defaultdict, list)),
         )
         self.voting_history_sum = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list)),
+            partial(defaultdict, partial(defaultdict, list)),
         )
         self.voting_loss_sum = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list)),
+            partial(defaultdict, partial(defaultdict, list)),
         )
         self.preference_loss_sum = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list)),
+            partial(defaultdict, partial(defaultdict, list)),
         )
 
         self.denominator = 0  # TODO remove or document this attribute
+        self.iterations = 0
 
         self.summary_only = summary_only
 
@@ -97,8 +100,8 @@ class IssueDevelopment(observer.Observer):
                 f"{self.output_directory}/issues/{repetition}/charts",
             )
 
-    def before_repetitions(self, repetitions, iterations, randomized_value=None) -> None:
-        pass
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
+        self.iterations = iterations
 
     def before_iterations(self, repetition) -> None:
         """:param repetition:
@@ -197,8 +200,25 @@ class IssueDevelopment(observer.Observer):
             self.voting_loss[issue]["nbs"].append(nbs_var)
             self.voting_loss_sum[issue]["nbs"][iteration].append(nbs_var)
 
+    def _fill_converged_rounds(self) -> None:
+        """Repeat the last round of a repetition that converged in the sums of the remaining rounds,
+        so the averages of the summary are over all the repetitions.
+        """
+        for history, history_sum in (
+            (self.preference_history, self.preference_history_sum),
+            (self.voting_history, self.voting_history_sum),
+            (self.preference_loss, self.preference_loss_sum),
+            (self.voting_loss, self.voting_loss_sum),
+        ):
+            for issue, values in history.items():
+                for key, value in values.items():
+                    for iteration in range(len(value), self.iterations):
+                        history_sum[issue][key][iteration].append(value[-1])
+
     def after_iterations(self, repetition) -> None:
         """Write all the data of this repetition to the filesystem."""
+        self._fill_converged_rounds()
+
         if self.summary_only:
             return
 
@@ -16,6 +16,7 @@ class Observer:
     before_loop()
     after_loop()
     end_loop()
+    loop_statistics()
     after_iterations()
     after_repetitions()
 
@@ -64,13 +65,18 @@ class Observer:
         The next event: before_loop.
         """
 
+    def loop_statistics(self, iteration: int, repetition: int, statistics: dict) -> None:
+        """After the new start positions are calculated, with the wall time per phase and the counters of the loop.
+        :param statistics: dict with the timings per phase, the total and the counters, see ModelStats.to_dict
+        """
+
     def before_iterations(self, repetition) -> None:
         """Before a set of loops starts."""
 
     def after_iterations(self, repetition) -> None:
         """After a set of loops are finished."""
 
-    def before_repetitions(self, repetitions, iterations, randomized_value=None) -> None:
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
         """First event
         :return:
         """
@@ -78,6 +84,14 @@ class Observer:
     def after_repetitions(self) -> None:
         """Last event."""
 
+    def get_state(self) -> dict:
+        """The values the observer collected so far, for a checkpoint. The model is not part of it."""
+        return {key: value for key, value in self.__dict__.items() if key != "model_ref"}
+
+    def set_state(self, state: dict) -> None:
+        """Continue with the values of get_state, when a run is resumed from a checkpoint."""
+        self.__dict__.update(state)
+
     @staticmethod
     def log(message: str) -> None:
         logger.info(message)
@@ -107,6 +121,14 @@ class Observable(Observer):
         self.model_ref = model_ref
         self.output_directory: Path = output_directory
 
+    @property
+    def observed_model(self):
+        """The model the observers refer to."""
+        return self.model_ref
+
+    def flush(self) -> None:
+        """Wait until the observers handled the events, they are handled right away."""
+
     def update_model_ref(self, model) -> None:
         self.model_ref = model
         for observer in self.__observers:
@@ -121,13 +143,26 @@ class Observable(Observer):
     def register(self, observer) -> None:
         self.__observers.append(observer)
 
+    def get_state(self) -> list[tuple[str, dict]]:
+        return [(type(observer).__name__, observer.get_state()) for observer in self.__observers]
+
+    def set_state(self, state: list[tuple[str, dict]]) -> None:
+        names = [type(observer).__name__ for observer in self.__observers]
+
+        if names != [name for name, _ in state]:
+            msg = f"The observers {names} do not match the observers of the state"
+            raise ValueError(msg)
+
+        for observer, (_, observer_state) in zip(self.__observers, state):
+            observer.set_state(observer_state)
+
     def before_model(self) -> None:
         for observer in self.__observers:
             observer.before_model()
 
-    def before_repetitions(self, repetitions, iterations, randomized_value=None) -> None:
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
         for observer in self.__observers:
-            observer.before_repetitions(repetitions, iterations, randomized_value)
+            observer.before_repetitions(repetitions, iterations, randomized_value, seed)
 
     def before_iterations(self, repetition) -> None:
         for observer in self.__observers:
@@ -154,6 +189,10 @@ class Observable(Observer):
         for observer in self.__observers:
             observer.end_loop(iteration, repetition)
 
+    def loop_statistics(self, iteration: int, repetition: int, statistics: dict) -> None:
+        for observer in self.__observers:
+            observer.loop_statistics(iteration, repetition, statistics)
+
     def after_iterations(self, repetition) -> None:
         for observer in self.__observers:
             observer.after_iterations(repetition)
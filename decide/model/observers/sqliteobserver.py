@@ -3,9 +3,9 @@ from collections import defaultdict
 
 from decide import results
 from decide.data import database as db
-from decide.data.database import ExchangeActor
 from decide.data.database import ModelRun
 from decide.data.database import connection
+from decide.data.writer import BulkWriter
 from decide.log import logger
 from decide.model import calculations
 from decide.model.base import AbstractExchange
@@ -15,9 +15,28 @@ from decide.model.observers.observer import Observer
 
 
 class SQLiteObserver(Observer):
-    """Observer to store all the data in a sqlite database."""
+    """Observer to store all the data in a sqlite database.
 
-    def __init__(self, observable: "Observable", output_directory: str) -> None:
+    The rows of an iteration are buffered and written in bulk at the end of the loop. With the fast
+    profile the rows of a repetition are written together, in chunks of at least FAST_FLUSH_ROWS rows.
+
+    With delta snapshots the first before and after snapshot of a repetition have all the actor issues,
+    the later ones only the actor issues that changed since the previous snapshot of their type. The
+    actorissue_full view completes them.
+    """
+
+    FAST_FLUSH_ROWS = 50_000
+
+    def __init__(
+        self,
+        observable: "Observable",
+        output_directory: str,
+        profile: str | None = None,
+        snapshots: str = "full",
+    ) -> None:
+        """:param profile: the storage profile of the database, see database.PROFILES
+        :param snapshots: "full" or "delta", the actor issues of each snapshot or only the changed ones
+        """
         super().__init__(observable)
 
         self.repetitions = {}
@@ -28,6 +47,12 @@ class SQLiteObserver(Observer):
         self.model_run_ids = []
         self.data_set = None
         self.model_run: ModelRun = ModelRun()
+        self.writer = BulkWriter()
+        self.profile = profile
+        self.flush_rows = self.FAST_FLUSH_ROWS if profile == "fast" else 0
+        self.snapshots = snapshots
+        # the last stored power, salience and position per type, issue and actor of the repetition
+        self.stored = {}
 
         if not output_directory.endswith(".db") and output_directory != ":memory:":
             output_directory += "/decide-data.sqlite.db"
@@ -40,7 +65,7 @@ class SQLiteObserver(Observer):
 
     def before_model(self) -> None:
         # initialize the database
-        manager = db.Manager(self.database_path)
+        manager = db.Manager(self.database_path, self.profile)
         manager.init_database()
         manager.create_tables()
 
@@ -69,7 +94,7 @@ class SQLiteObserver(Observer):
                 )
                 self.issues[issue] = issue
 
-    def before_repetitions(self, repetitions, iterations, randomized_value=None) -> None:
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
         """Create a new data set when needed and add all the actors."""
         # setup
         self.repetitions = {}
@@ -82,22 +107,26 @@ class SQLiteObserver(Observer):
                 p=randomized_value or self.model_ref.randomized_value,
                 iterations=iterations,
                 repetitions=repetitions,
+                seed=seed,
+                snapshots=self.snapshots,
                 data_set=self.data_set,
             )
 
     def before_iterations(self, repetition) -> None:
+        self.stored = {}
+
         with db.connection.atomic():
             repetition = db.Repetition.create(
                 pointer=repetition,
                 model_run=self.model_run,
                 p=self.model_ref.randomized_value,
+                seed=self.model_ref.seed,
             )
 
             self.repetitions[repetition] = repetition
 
     def before_loop(self, iteration: int, repetition: int) -> None:
-        with db.connection.atomic():
-            self._write_actor_issues(iteration, repetition)
+        self._write_actor_issues(iteration, repetition)
 
     def after_loop(
         self,
@@ -107,33 +136,39 @@ class SQLiteObserver(Observer):
     ) -> None:
         iteration = self.iterations[repetition][iteration]
 
-        with db.connection.atomic():
-            for exchange in realized:
-                db_exchange = db.Exchange()
-                db_exchange.i = self._create_exchange_actor(exchange.i)
-                db_exchange.j = self._create_exchange_actor(exchange.j)
+        for exchange in realized:
+            db_exchange = self.writer.add(
+                db.Exchange,
+                i=self._create_exchange_actor(exchange.i),
+                j=self._create_exchange_actor(exchange.j),
+                iteration=iteration,
+            )
+
+            self._write_externalities(exchange, db_exchange, iteration)
 
-                if db_exchange.i.eu < 1e-10:
-                    pass
+    def end_loop(self, iteration: int, repetition: int) -> None:
+        self._write_actor_issues(iteration, repetition, "after")
 
-                if db_exchange.j.eu < 1e-10:
-                    pass
+        # a single transaction for all the rows of the iteration, or of more with the fast profile
+        if self.writer.size >= self.flush_rows:
+            self.writer.flush()
 
-                db_exchange.iteration = iteration
-                db_exchange.save()
+    def after_iterations(self, repetition) -> None:
+        self.writer.flush()
 
-                self._write_externalities(exchange, db_exchange)
+        repetition = self.repetitions[repetition]
+        repetition.iterations = len(self.iterations[repetition])
 
-    def end_loop(self, iteration: int, repetition: int) -> None:
         with db.connection.atomic():
-            self._write_actor_issues(iteration, repetition, "after")
+            repetition.save()
 
     def after_repetitions(self) -> None:
         self.model_run.finished_at = datetime.datetime.now(datetime.UTC)
+        self.model_run.repetitions_used = len(self.repetitions)
         self.model_run.save()
         self.model_run_ids.append(self.model_run.id)
 
-        if self.model_run.repetitions <= 1:
+        if self.model_run.repetitions_used <= 1:
             logger.info("Cannot calculate covariance, there is only 1 repetition")
             return
 
@@ -145,37 +180,21 @@ class SQLiteObserver(Observer):
         )
 
     def after_model(self) -> None:
+        # the load is done, the indexes are built at once
+        manager = db.Manager(self.database_path, self.profile)
+        manager.create_indexes()
+        manager.checkpoint()
+
         if len(self.model_run_ids) <= 1:
             logger.info("Cannot calculate summary results, there is only 1 model run")
             return
 
         try:
-            results.externalities.write_summary_result(
-                db.connection,
-                self.model_run_ids,
-                self.output_directory,
-            )
-            results.descriptives.write_summary_result(
-                db.connection,
-                self.model_run_ids,
-                self.output_directory,
-            )
-            results.issuecomparison.write_summary_result(
-                db.connection,
-                self.model_run_ids,
-                self.output_directory,
-            )
-            results.nashbargainingsolution.write_summary_result(
+            results.write_summary_results(
                 db.connection,
                 self.model_run_ids,
                 self.output_directory,
             )
-            results.nashbargainingsolution.write_summary_result(
-                db.connection,
-                self.model_run_ids,
-                self.output_directory,
-                "after",
-            )
         except Exception as e:
             raise e
             logger.exception(e)
@@ -184,7 +203,8 @@ class SQLiteObserver(Observer):
     def _write_externalities(
         self,
         exchange: AbstractExchange,
-        db_exchange: db.Exchange,
+        db_exchange: int,
+        iteration: int,
     ) -> None:
         issue_set_key = self.model_ref.create_existing_issue_set_key(
             exchange.p,
@@ -192,13 +212,11 @@ class SQLiteObserver(Observer):
         )
         inner = exchange.get_inner_groups()
 
+        supply = self.issues[exchange.i.supply.issue]
+        demand = self.issues[exchange.i.demand.issue]
+
         for actor in self.actors:
-            externality = db.Externality()
-            externality.actor = actor
-            externality.exchange = db_exchange
-            externality.supply = db_exchange.i.supply_issue
-            externality.demand = db_exchange.i.demand_issue
-            externality.iteration = db_exchange.iteration
+            externality = {}
 
             externality_size = calculations.actor_externalities(
                 actor,
@@ -213,55 +231,75 @@ class SQLiteObserver(Observer):
             )
 
             if actor.key == exchange.i.actor.actor_id:
-                externality.own = exchange.i.eu
+                externality["own"] = exchange.i.eu
             elif actor.key == exchange.j.actor.actor_id:
-                exchange.own = exchange.j.eu
+                externality["own"] = exchange.j.eu
             elif externality_size < 0:
                 if is_inner:
-                    externality.inner_negative = externality_size
+                    externality["inner_negative"] = externality_size
                 else:
-                    externality.outer_negative = externality_size
+                    externality["outer_negative"] = externality_size
             elif is_inner:
-                externality.inner_positive = externality_size
+                externality["inner_positive"] = externality_size
             else:
-                externality.outer_positive = externality_size
-
-            externality.save()
+                externality["outer_positive"] = externality_size
+
+            self.writer.add(
+                db.Externality,
+                actor=actor,
+                exchange=db_exchange,
+                supply=supply,
+                demand=demand,
+                iteration=iteration,
+                **externality,
+            )
 
     def _write_actor_issues(self, iteration: int, repetition: int, _type: str = "before") -> None:
-        with db.connection.atomic():
-            repetition = self.repetitions[repetition]
-            iteration, _ = db.Iteration.get_or_create(
+        repetition = self.repetitions[repetition]
+
+        # the before and after snapshots of an iteration share its row
+        if iteration not in self.iterations[repetition]:
+            self.iterations[repetition][iteration] = self.writer.add(
+                db.Iteration,
                 pointer=iteration,
                 repetition=repetition,
             )
 
-            self.iterations[repetition][iteration] = iteration
-
-            for (
-                issue_obj,
-                actors,
-            ) in self.model_ref.actor_issues.items():
-                for actor_obj, actor_issue in actors.items():
-                    db.ActorIssue.create(
-                        issue=self.issues[issue_obj.issue_id],
-                        actor=self.actors[actor_obj.actor_id],
-                        power=actor_issue.power,
-                        salience=actor_issue.salience,
-                        position=actor_issue.position,
-                        iteration=iteration,
-                        type=_type,
-                    )
-
-    def _create_exchange_actor(self, i: AbstractExchangeActor) -> ExchangeActor:
-        exchange_actor = db.ExchangeActor()
-        exchange_actor.actor = self.actors[i.actor]
-        exchange_actor.supply_issue = self.issues[i.supply.issue]
-        exchange_actor.demand_issue = self.issues[i.demand.issue]
-        exchange_actor.eu = i.eu
-        exchange_actor.x = i.supply.position
-        exchange_actor.y = i.y
-        exchange_actor.demand_position = i.opposite_actor.demand.position
-        exchange_actor.save()
-
-        return exchange_actor
+        iteration = self.iterations[repetition][iteration]
+
+        for (
+            issue_obj,
+            actors,
+        ) in self.model_ref.actor_issues.items():
+            for actor_obj, actor_issue in actors.items():
+                if self.snapshots == "delta":
+                    key = (_type, issue_obj.issue_id, actor_obj.actor_id)
+                    values = (actor_issue.power, actor_issue.salience, actor_issue.position)
+
+                    if self.stored.get(key) == values:
+                        continue
+
+                    self.stored[key] = values
+
+                self.writer.add(
+                    db.ActorIssue,
+                    issue=self.issues[issue_obj.issue_id],
+                    actor=self.actors[actor_obj.actor_id],
+                    power=actor_issue.power,
+                    salience=actor_issue.salience,
+                    position=actor_issue.position,
+                    iteration=iteration,
+                    type=_type,
+                )
+
+    def _create_exchange_actor(self, i: AbstractExchangeActor) -> int:
+        return self.writer.add(
+            db.ExchangeActor,
+            actor=self.actors[i.actor],
+            supply_issue=self.issues[i.supply.issue],
+            demand_issue=self.issues[i.demand.issue],
+            eu=i.eu,
+            x=i.supply.position,
+            y=i.y,
+            demand_position=i.opposite_actor.demand.position,
+        )
@@ -0,0 +1,55 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from decide.model.observers.observer import Observable
+from decide.model.observers.observer import Observer
+
+
+class StatisticsWriter(Observer):
+    """Collects the timings and counters of every loop and writes them as JSON after the model is done."""
+
+    def __init__(self, observable: Observable, filename: Path) -> None:
+        super().__init__(observable)
+        self.filename = Path(filename)
+        self.randomized_value = None
+        self.iterations = []
+
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
+        self.randomized_value = randomized_value
+
+    def loop_statistics(self, iteration: int, repetition: int, statistics: dict) -> None:
+        self.iterations.append(
+            {
+                "p": self.randomized_value,
+                "repetition": repetition,
+                "iteration": iteration,
+                **statistics,
+            },
+        )
+
+    def summary(self) -> dict:
+        """The timings and counters summed over all the loops."""
+        timings = Counter()
+        counters = Counter()
+
+        for statistics in self.iterations:
+            timings.update(statistics["timings"])
+            counters.update(statistics["counters"])
+
+        return {
+            "timings": dict(timings),
+            "total": sum(timings.values()),
+            "counters": dict(counters),
+        }
+
+    def after_model(self) -> None:
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+
+        with self.filename.open("w") as file:
+            json.dump(
+                {"summary": self.summary(), "iterations": self.iterations},
+                file,
+                indent=2,
+                default=str,
+            )
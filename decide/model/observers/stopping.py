@@ -0,0 +1,68 @@
+import math
+
+from decide.model.observers.observer import Observable
+from decide.model.observers.observer import Observer
+
+
+class RepetitionStopping(Observer):
+    """Tells when the repetitions of a p value are enough: the standard error of the final NBS of
+    every issue is below the target.
+
+    The mean and variance of the final NBS are updated after every repetition with Welford's
+    algorithm, nothing is kept per repetition. The NBS is on the normalized 0-100 scale.
+    """
+
+    def __init__(
+        self,
+        observable: Observable,
+        target_error: float,
+        min_repetitions: int = 10,
+    ) -> None:
+        """:param target_error: the largest standard error of the final NBS of an issue
+        :param min_repetitions: the repetitions before the standard error is trusted
+        """
+        super().__init__(observable)
+        self.target_error = target_error
+        self.min_repetitions = min_repetitions
+        self.repetitions = 0
+        self.nbs = {}
+        self.mean = {}
+        self.m2 = {}
+
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
+        self.repetitions = 0
+        self.nbs = {}
+        self.mean = {}
+        self.m2 = {}
+
+    def end_loop(self, iteration: int, repetition: int) -> None:
+        # the NBS of the voting positions, the last one is the final NBS of the repetition
+        self.nbs = {issue.name: float(nbs) for issue, nbs in self.model_ref.nbs.items()}
+
+    def after_iterations(self, repetition) -> None:
+        self.repetitions += 1
+
+        for issue, nbs in self.nbs.items():
+            mean = self.mean.get(issue, 0.0)
+            delta = nbs - mean
+            mean += delta / self.repetitions
+
+            self.mean[issue] = mean
+            self.m2[issue] = self.m2.get(issue, 0.0) + delta * (nbs - mean)
+
+    def standard_errors(self) -> dict[str, float]:
+        """The standard error of the mean final NBS per issue, infinite before two repetitions."""
+        if self.repetitions < 2:
+            return dict.fromkeys(self.mean, math.inf)
+
+        return {
+            issue: math.sqrt(m2 / (self.repetitions - 1) / self.repetitions)
+            for issue, m2 in self.m2.items()
+        }
+
+    @property
+    def done(self) -> bool:
+        if self.repetitions < max(self.min_repetitions, 2):
+            return False
+
+        return max(self.standard_errors().values(), default=0.0) <= self.target_error
@@ -0,0 +1,24 @@
+import statistics
+
+from decide.model.observers.observer import Observable
+from decide.model.observers.stopping import RepetitionStopping
+
+
+def test_standard_error(model) -> None:
+    stopping = RepetitionStopping(Observable(model, None), target_error=1.0, min_repetitions=3)
+    stopping.before_repetitions(repetitions=10, iterations=1)
+
+    values = [40.0, 44.0, 41.0, 43.0]
+
+    for repetition, value in enumerate(values):
+        assert not stopping.done
+
+        stopping.nbs = {"issue": value}
+        stopping.after_iterations(repetition)
+
+    expected = statistics.stdev(values) / len(values) ** 0.5
+
+    assert abs(stopping.standard_errors()["issue"] - expected) < 1e-12
+    assert abs(stopping.mean["issue"] - statistics.mean(values)) < 1e-12
+    # 0.91 after 4 repetitions
+    assert stopping.done
@@ -0,0 +1,483 @@
+"""Run the repetitions of a model on a process pool and replay their events in the parent process.
+
+The repetitions are independent: each one starts with a fresh model from the factory. A worker runs a
+repetition with a recording event handler, the parent feeds the recorded events to the real observers in
+repetition order, so the observers produce the same output as a serial run.
+
+The same recording lets the observers run on a thread of their own: the AsyncObservable hands the batches
+to the observers on a background thread while the model continues with the next loop.
+"""
+
+import io
+import pickle
+import queue
+import random
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from decide.data.modelfactory import ModelFactory
+from decide.model.observers.observer import Observable
+from decide.model.utils import Convergence
+from decide.model.utils import ModelLoop
+from decide.model.utils import repetition_seed
+
+
+def actor_issues(model) -> list:
+    """The actor issues of the model, in the order of the positions of a Snapshot."""
+    return [
+        actor_issue
+        for issue_actor_issues in model.actor_issues.values()
+        for actor_issue in issue_actor_issues.values()
+    ]
+
+
+def shared_objects(model) -> list:
+    """The objects of the model that keep their identity during a repetition, in a fixed order.
+
+    The batches refer to these objects by their index instead of pickling them.
+    """
+    return [model, *model.actors.values(), *model.issues.values(), *actor_issues(model)]
+
+
+class Snapshot:
+    """The state of the model that changes during a repetition and that the observers read.
+
+    The groups are only part of the snapshot when they changed since the previous one.
+    """
+
+    __slots__ = ("positions", "nbs", "groups")
+
+    def __init__(self, model, groups: bool = True) -> None:
+        self.positions = tuple(actor_issue.position for actor_issue in actor_issues(model))
+        self.nbs = tuple(model.nbs.items())
+        self.groups = tuple(model.groups.items()) if groups else None
+
+    def apply(self, model) -> None:
+        """Bring the model of the full snapshot to the state of this one."""
+        for actor_issue, position in zip(actor_issues(model), self.positions):
+            actor_issue.position = position
+
+        model.nbs = dict(self.nbs)
+
+        if self.groups is not None:
+            model.groups = dict(self.groups)
+
+
+class BatchPickler(pickle.Pickler):
+    """Pickles a batch with references to the shared objects of the model, see ``shared_objects``."""
+
+    def __init__(self, file, objects: dict[int, int]) -> None:
+        """:param objects: the index of each shared object by its id"""
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.objects = objects
+
+    def persistent_id(self, obj) -> int | None:
+        return self.objects.get(id(obj))
+
+
+class BatchReader:
+    """Unpickles the batches of an EventRecorder in the order they were recorded.
+
+    A batch with a full model gives the model to which the Snapshots of the later batches are applied.
+    """
+
+    def __init__(self) -> None:
+        self.model = None
+        self.objects = []
+
+    def load(self, batch: bytes) -> tuple:
+        """:return: the model of the batch, if it has a snapshot, and the events"""
+        unpickler = pickle.Unpickler(io.BytesIO(batch))
+        unpickler.persistent_load = self.objects.__getitem__
+
+        model, events = unpickler.load()
+
+        if isinstance(model, Snapshot):
+            model.apply(self.model)
+            model = self.model
+        elif model is not None:
+            self.model = model
+            self.objects = shared_objects(model)
+
+        return model, events
+
+
+class EventRecorder(Observable):
+    """Event handler for the worker, records the events in batches instead of calling observers.
+
+    Each batch is pickled together with a snapshot of the model as it was when the batch was closed, so the
+    observers read the same model as in a serial run. A snapshot is taken at the events after which the
+    observers read the model. The first one holds the full model, the later ones only the positions, the
+    NBS and the groups, the exchanges in the events refer to the actor issues of the full model. The
+    exchanges that are not realized are not part of a snapshot, the replayed before_loop event does not
+    see them.
+    """
+
+    def __init__(self, model_ref) -> None:
+        super().__init__(model_ref=model_ref, output_directory=None)
+        self.batches: list[bytes] = []
+        self.events = []
+        # the index of each shared object of the model of the full snapshot, by its id
+        self.objects = None
+        self.groups = []
+
+    def update_model_ref(self, model) -> None:
+        super().update_model_ref(model)
+        # the next snapshot holds the full model
+        self.objects = None
+
+    def snapshot(self):
+        """The full model, the first time, and after that a Snapshot."""
+        model = self.model_ref
+        groups = list(model.groups.values())
+
+        # each loop replaces the groups, the ones of the previous snapshot are kept alive to compare
+        changed = len(groups) != len(self.groups) or any(
+            new is not old for new, old in zip(groups, self.groups)
+        )
+        self.groups = groups
+
+        if self.objects is None:
+            self.objects = {id(obj): index for index, obj in enumerate(shared_objects(model))}
+            return model
+
+        return Snapshot(model, groups=changed)
+
+    def dumps(self, state, events: list) -> bytes:
+        if self.objects is None or state is self.model_ref:
+            return pickle.dumps((state, events), pickle.HIGHEST_PROTOCOL)
+
+        file = io.BytesIO()
+        BatchPickler(file, self.objects).dump((state, events))
+
+        return file.getvalue()
+
+    def record(self, event: str, snapshot: bool | None = None, **kwargs) -> None:
+        """Add the event to the current batch, close the batch when snapshot is not None.
+
+        :param event: the name of the Observable method
+        :param snapshot: True to close the batch with the model, False to close it without
+        """
+        self.events.append((event, kwargs))
+
+        if snapshot is not None:
+            state = self.snapshot() if snapshot else None
+            self.batches.append(self.dumps(state, self.events))
+            self.events = []
+
+    def before_iterations(self, repetition) -> None:
+        self.record("before_iterations", snapshot=True, repetition=repetition)
+
+    def before_loop(self, iteration: int, repetition: int | None = None) -> None:
+        self.record("before_loop", iteration=iteration, repetition=repetition)
+
+    def execute_exchange(self, exchange) -> None:
+        self.record("execute_exchange", exchange=exchange)
+
+    def after_loop(self, realized, iteration: int, repetition: int) -> None:
+        self.record(
+            "after_loop",
+            snapshot=True,
+            realized=realized,
+            iteration=iteration,
+            repetition=repetition,
+        )
+
+    def end_loop(self, iteration: int, repetition: int) -> None:
+        self.record("end_loop", snapshot=True, iteration=iteration, repetition=repetition)
+
+    def loop_statistics(self, iteration: int, repetition: int, statistics: dict) -> None:
+        self.record(
+            "loop_statistics",
+            snapshot=False,
+            iteration=iteration,
+            repetition=repetition,
+            statistics=statistics,
+        )
+
+    def after_iterations(self, repetition) -> None:
+        self.record("after_iterations", snapshot=False, repetition=repetition)
+
+
+def run_repetition(
+    factory: ModelFactory,
+    model_klass,
+    randomized_value,
+    repetition: int,
+    iterations: int,
+    seed: int | None = None,
+    convergence: Convergence | None = None,
+    **kwargs,
+) -> list[bytes]:
+    """Run a single repetition and return the recorded batches of events.
+
+    :param factory: creates the fresh model of the repetition
+    :param seed: the seed of the run, the model gets the seed derived for this repetition
+    :param convergence: stops the repetition when it converged, an unused one
+    :param kwargs: passed to the factory, e.g. numeric
+    """
+    if seed is None:
+        # forked workers share the random state of the parent, draw a new one for each repetition
+        random.seed()
+    else:
+        seed = repetition_seed(seed, randomized_value, repetition)
+
+    model = factory(
+        model_klass=model_klass,
+        randomized_value=randomized_value,
+        seed=seed,
+        **kwargs,
+    )
+
+    return record_repetition(model, repetition, iterations, convergence=convergence)
+
+
+def record_repetition(
+    model,
+    repetition: int,
+    iterations: int,
+    candidate_pool=None,
+    convergence: Convergence | None = None,
+) -> list[bytes]:
+    """Run a repetition of the model and return the recorded batches of events."""
+    event_handler = EventRecorder(model)
+
+    model_loop = ModelLoop(model, event_handler, repetition, candidate_pool, convergence)
+
+    event_handler.before_iterations(repetition)
+
+    for _ in range(iterations):
+        if model_loop.converged:
+            break
+
+        model_loop.loop()
+
+    event_handler.after_iterations(repetition)
+
+    return event_handler.batches
+
+
+def schedule(units: list[tuple]) -> list[tuple]:
+    """Order the (p, repetition) units of work of a sweep, the highest p first.
+
+    A higher p gives more variation between the exchanges and the runs take longer, starting with them keeps
+    the workers busy until the end of the sweep. The repetitions of a p stay together and in order.
+    """
+    return sorted(units, key=lambda unit: float(unit[0]), reverse=True)
+
+
+def run_sweep(
+    workers: int,
+    factory: ModelFactory,
+    model_klass,
+    units: list[tuple],
+    iterations: int,
+    seed: int | None = None,
+    convergence: Convergence | None = None,
+    stopped: set | None = None,
+    **kwargs,
+) -> Iterator[tuple]:
+    """Spread the (p, repetition) units of work of a sweep over a pool of workers.
+
+    The units are submitted in the order of ``schedule`` and yielded in the same order, so the results
+    of a p arrive together and the parent can replay them while the workers continue with the next p.
+    At most two units per worker are in flight, the batches of the later units are not held in memory.
+
+    :param convergence: an unused Convergence, each repetition gets its own copy through pickling
+    :param stopped: the p values that have enough repetitions, their remaining units are skipped
+
+    :return: iterator of (p, repetition, batches)
+    """
+    units = iter(schedule(units))
+    futures = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def submit() -> None:
+            for randomized_value, repetition in units:
+                if stopped and randomized_value in stopped:
+                    continue
+
+                future = executor.submit(
+                    run_repetition,
+                    factory,
+                    model_klass,
+                    randomized_value,
+                    repetition,
+                    iterations,
+                    seed,
+                    convergence,
+                    **kwargs,
+                )
+                futures.append((randomized_value, repetition, future))
+                return
+
+        # the window of units in flight
+        for _ in range(2 * workers):
+            submit()
+
+        # pop the futures, so the batches of a replayed repetition can be released
+        while futures:
+            randomized_value, repetition, future = futures.popleft()
+
+            if stopped and randomized_value in stopped:
+                future.cancel()
+                submit()
+                continue
+
+            batches = future.result()
+            # the workers continue with the next unit while the parent replays this one
+            submit()
+
+            yield randomized_value, repetition, batches
+
+
+def replay(
+    event_handler: Observable,
+    batches: list[bytes],
+    reader: BatchReader | None = None,
+) -> None:
+    """Fire the recorded events of a repetition on the event handler.
+
+    :param reader: the reader of the earlier batches of the recording, when they are replayed in parts
+    """
+    if isinstance(event_handler, AsyncObservable):
+        # unpickle the batches on the thread of the observers
+        event_handler.submit(replay, event_handler.observable, batches)
+        return
+
+    if reader is None:
+        reader = BatchReader()
+
+    for batch in batches:
+        model, events = reader.load(batch)
+
+        if model is not None:
+            event_handler.update_model_ref(model)
+
+        for event, kwargs in events:
+            getattr(event_handler, event)(**kwargs)
+
+
+class AsyncObservable(EventRecorder):
+    """Event handler that hands the events to the observers on a background thread.
+
+    The events are recorded in batches as in a worker, each closed batch is put on a bounded queue and a
+    single thread replays the batches on the observers, so they see the events in the same order as without
+    the thread. A batch is pickled when it is closed: the thread gets its own copy of the model once per
+    repetition and after that only the compact snapshots and the realized exchanges, it never reads the
+    model that the model thread changes. The model waits when the queue is full. The observers are only
+    read after a flush, which waits until they handled every event.
+
+    The error of an observer is raised on the model thread at the next submit or flush, an observer that
+    fails on one of the last events raises at the after_model event. That event waits for the observers
+    and stops the thread, also after an error.
+    """
+
+    def __init__(self, model_ref, output_directory, maxsize: int = 64) -> None:
+        """:param maxsize: the maximum number of tasks on the queue before the model waits"""
+        super().__init__(model_ref)
+        self.output_directory = output_directory
+        # the observers register at this one, it is only called from the thread
+        self.observable = Observable(model_ref=model_ref, output_directory=output_directory)
+        self.queue = queue.Queue(maxsize)
+        # only used on the thread, it holds the copy of the model the observers read
+        self.reader = BatchReader()
+        self.error = None
+        self.thread = threading.Thread(target=self._consume, name="observers", daemon=True)
+        self.thread.start()
+
+    def _consume(self) -> None:
+        while True:
+            task = self.queue.get()
+
+            try:
+                if task is None:
+                    return
+
+                # after an error the tasks are dropped, the model learns about it at the next submit
+                if self.error is None:
+                    function, args = task
+                    function(*args)
+            except Exception as e:  # noqa: BLE001
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, function, *args) -> None:
+        """Call the function on the thread of the observers, after the tasks that are already queued.
+
+        :raises Exception: the error of an observer in an earlier task
+        """
+        self._raise_error()
+        self.queue.put((function, args))
+
+    def flush(self) -> None:
+        """Wait until the observers handled every event that was fired."""
+        self.queue.join()
+        self._raise_error()
+
+    def record(self, event: str, snapshot: bool | None = None, **kwargs) -> None:
+        super().record(event, snapshot, **kwargs)
+
+        if self.batches:
+            self.submit(replay, self.observable, self.batches, self.reader)
+            self.batches = []
+
+    @property
+    def observed_model(self):
+        return self.observable.model_ref
+
+    def register(self, observer) -> None:
+        self.observable.register(observer)
+
+    def update_model_ref(self, model) -> None:
+        # the model of the recorded snapshots, the observers get a snapshot before they read it
+        self.model_ref = model
+        self.objects = None
+        self.submit(self.observable.update_model_ref, model)
+
+    def update_output_directory(self, output_directory) -> None:
+        self.output_directory = output_directory
+        self.submit(self.observable.update_output_directory, output_directory)
+
+    def get_state(self) -> list[tuple[str, dict]]:
+        self.flush()
+        return self.observable.get_state()
+
+    def set_state(self, state: list[tuple[str, dict]]) -> None:
+        self.flush()
+        self.observable.set_state(state)
+
+    def before_model(self) -> None:
+        self.submit(self.observable.before_model)
+
+    def before_repetitions(self, repetitions, iterations, randomized_value=None, seed=None) -> None:
+        self.submit(
+            self.observable.before_repetitions,
+            repetitions,
+            iterations,
+            randomized_value,
+            seed,
+        )
+
+    def after_repetitions(self) -> None:
+        self.submit(self.observable.after_repetitions)
+
+    def after_model(self) -> None:
+        """The last event, waits until the observers handled every event and stops the thread.
+
+        :raises Exception: the error of an observer that was not raised yet
+        """
+        try:
+            self.submit(self.observable.after_model)
+            self.flush()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
@@ -0,0 +1,293 @@
+from collections import defaultdict
+from itertools import count
+
+
+class ExchangeQueue:
+    """Indexed priority queue of exchanges, the exchange with the highest gain first.
+
+    The exchanges are kept in a binary heap on ``(-gain, place)``. The place breaks the ties between
+    equal gains the same way as the stable sort of the list this replaces, which was sorted again
+    before every exchange was taken. A new exchange is placed behind the exchanges it ties with.
+    When the gain of an exchange changes, it moves to the front of its new gain when the gain went
+    down and to the back when it went up, since the old gain put it before or behind those
+    exchanges in the sorted list. The position of every exchange in the heap is indexed, so when
+    the gain of an exchange changes only that exchange is moved (:meth:`update`) and an exchange
+    can be removed from the middle of the queue (:meth:`remove`).
+
+    The queue also keeps a reverse index from each (actor, issue) pair to the exchanges in which the actor
+    supplies or demands that issue, so :meth:`affected` finds the exchanges an executed exchange can change.
+    """
+
+    def __init__(self, exchanges=()) -> None:
+        # [(-gain, place), exchange, round of the base key, key at the start of that round]
+        self._heap = []
+        self._index = {}  # id(exchange) -> position in the heap
+        self._sequence = count()
+        # the number of exchanges taken, the list was sorted again before each of them
+        self._round = 0
+        self._dependencies = defaultdict(dict)  # (actor, issue) -> {id(exchange): exchange}
+
+        for exchange in exchanges:
+            self.append(exchange)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return len(self._heap) > 0
+
+    def __contains__(self, exchange) -> bool:
+        return id(exchange) in self._index
+
+    def __iter__(self):
+        """Iterate over the exchanges, highest gain first."""
+        return (entry[1] for entry in sorted(self._heap, key=self._entry_key))
+
+    def values(self):
+        """Iterate over the exchanges in the (unsorted) order of the heap."""
+        return (entry[1] for entry in self._heap)
+
+    def __getitem__(self, index: int):
+        """The exchange at the given rank, 0 is the exchange with the highest gain."""
+        if index == 0 and self._heap:
+            return self._heap[0][1]
+
+        return list(self)[index]
+
+    @staticmethod
+    def _entry_key(entry):
+        return entry[0]
+
+    def _rekey(self, entry) -> bool:
+        """Give the entry the key of the current gain of its exchange, False when it did not change.
+
+        The place depends on the key the exchange had when the list was last sorted, so an exchange
+        of which the gain changes twice within a round is placed as if it changed once.
+        """
+        if entry[2] != self._round:
+            entry[2] = self._round
+            entry[3] = entry[0]
+
+        base = entry[3]
+        gain = -entry[1].gain
+
+        if base is None:
+            # not sorted yet, stays on its place in the list
+            key = gain, entry[0][1]
+        elif gain == base[0]:
+            key = base
+        elif gain > base[0]:
+            # the gain went down, the old gain sorted it before the exchanges with the new gain
+            key = gain, (-self._round, base)
+        else:
+            key = gain, (2 * self._round, base)
+
+        if key == entry[0]:
+            return False
+
+        entry[0] = key
+        return True
+
+    @staticmethod
+    def _dependency_keys(exchange):
+        """The (actor, issue) pairs of the exchange: both actors supply one issue and demand the other."""
+        for actor in (exchange.i.actor, exchange.j.actor):
+            yield actor, exchange.p
+            yield actor, exchange.q
+
+    def affected(self, exchange) -> list:
+        """The exchanges in the queue that share an (actor, issue) pair with the given exchange.
+
+        These are the only exchanges that can change when the given exchange is executed.
+
+        :return: the exchanges, highest gain first
+        """
+        affected = {}
+
+        for key in self._dependency_keys(exchange):
+            affected.update(self._dependencies.get(key, {}))
+
+        return sorted(affected.values(), key=lambda e: self._heap[self._index[id(e)]][0])
+
+    def append(self, exchange) -> None:
+        """Add the exchange to the queue, behind the exchanges with the same gain."""
+        place = 2 * self._round + 1, next(self._sequence)
+
+        self._heap.append([(-exchange.gain, place), exchange, self._round, None])
+        self._index[id(exchange)] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+        for key in self._dependency_keys(exchange):
+            self._dependencies[key][id(exchange)] = exchange
+
+    def peek(self):
+        """The exchange with the highest gain, without removing it."""
+        return self._heap[0][1]
+
+    def pop(self):
+        """Remove and return the exchange with the highest gain, this starts a new round."""
+        self._round += 1
+
+        return self._remove_at(0)
+
+    def pushpop(self, exchange):
+        """Put the exchange that was just taken back behind the exchanges with the same gain and
+        return the exchange with the highest gain instead, within the same round.
+        """
+        self.append(exchange)
+
+        return self._remove_at(0)
+
+    def remove(self, exchange) -> None:
+        """Remove the given exchange from the queue."""
+        self._remove_at(self._index[id(exchange)])
+
+    def update(self, exchange) -> None:
+        """Move the exchange to its new place in the queue after its gain has changed."""
+        position = self._index[id(exchange)]
+
+        if not self._rekey(self._heap[position]):
+            return
+
+        self._sift_up(position)
+        self._sift_down(self._index[id(exchange)])
+
+    def rekey(self) -> None:
+        """Read the gain of every exchange again and restore the heap, for gains changed outside the queue."""
+        for entry in self._heap:
+            self._rekey(entry)
+
+        self._heap.sort(key=self._entry_key)
+        self._index = {id(entry[1]): position for position, entry in enumerate(self._heap)}
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._index.clear()
+        self._round = 0
+        self._dependencies.clear()
+
+    def _remove_at(self, position: int):
+        entry = self._heap[position]
+        last = self._heap.pop()
+
+        del self._index[id(entry[1])]
+
+        for key in self._dependency_keys(entry[1]):
+            dependencies = self._dependencies[key]
+            del dependencies[id(entry[1])]
+
+            if not dependencies:
+                del self._dependencies[key]
+
+        if last is not entry:
+            self._heap[position] = last
+            self._index[id(last[1])] = position
+
+            self._sift_up(position)
+            self._sift_down(self._index[id(last[1])])
+
+        return entry[1]
+
+    def _swap(self, a: int, b: int) -> None:
+        heap = self._heap
+        heap[a], heap[b] = heap[b], heap[a]
+
+        self._index[id(heap[a][1])] = a
+        self._index[id(heap[b][1])] = b
+
+    def _sift_up(self, position: int) -> None:
+        heap = self._heap
+
+        while position > 0:
+            parent = (position - 1) >> 1
+
+            if heap[position][0] < heap[parent][0]:
+                self._swap(position, parent)
+                position = parent
+            else:
+                break
+
+    def _sift_down(self, position: int) -> None:
+        heap = self._heap
+        size = len(heap)
+
+        while True:
+            child = 2 * position + 1
+
+            if child >= size:
+                break
+
+            if child + 1 < size and heap[child + 1][0] < heap[child][0]:
+                child += 1
+
+            if heap[child][0] < heap[position][0]:
+                self._swap(position, child)
+                position = child
+            else:
+                break
+
+
+class ExchangeList:
+    """The exchanges in the order they were added, for the models that do not take the highest gain.
+
+    Keeps the same reverse index as ExchangeQueue, so :meth:`affected` finds the exchanges an executed
+    exchange can change without a scan over all the exchanges.
+    """
+
+    def __init__(self, exchanges=()) -> None:
+        self._exchanges = {}  # id(exchange) -> (sequence, exchange), in the order they were added
+        self._sequence = count()
+        self._dependencies = defaultdict(dict)  # (actor, issue) -> {id(exchange): exchange}
+
+        for exchange in exchanges:
+            self.append(exchange)
+
+    def __len__(self) -> int:
+        return len(self._exchanges)
+
+    def __bool__(self) -> bool:
+        return len(self._exchanges) > 0
+
+    def __contains__(self, exchange) -> bool:
+        return id(exchange) in self._exchanges
+
+    def __iter__(self):
+        return (exchange for _, exchange in self._exchanges.values())
+
+    def values(self):
+        return iter(self)
+
+    def __getitem__(self, index: int):
+        return list(self)[index]
+
+    def affected(self, exchange) -> list:
+        """The exchanges that share an (actor, issue) pair with the given exchange, oldest first."""
+        affected = {}
+
+        for key in ExchangeQueue._dependency_keys(exchange):
+            affected.update(self._dependencies.get(key, {}))
+
+        return sorted(affected.values(), key=lambda e: self._exchanges[id(e)][0])
+
+    def append(self, exchange) -> None:
+        self._exchanges[id(exchange)] = (next(self._sequence), exchange)
+
+        for key in ExchangeQueue._dependency_keys(exchange):
+            self._dependencies[key][id(exchange)] = exchange
+
+    def remove(self, exchange) -> None:
+        del self._exchanges[id(exchange)]
+
+        for key in ExchangeQueue._dependency_keys(exchange):
+            dependencies = self._dependencies[key]
+            del dependencies[id(exchange)]
+
+            if not dependencies:
+                del self._dependencies[key]
+
+    def update(self, exchange) -> None:
+        """The order does not depend on the gain, nothing to do."""
+
+    def clear(self) -> None:
+        self._exchanges.clear()
+        self._dependencies.clear()
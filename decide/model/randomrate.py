@@ -1,5 +1,4 @@
 import logging
-import random
 import uuid
 from collections import defaultdict
 from decimal import *
@@ -17,6 +16,8 @@ class RandomRateExchangeActor(base.AbstractExchangeActor):
     the utility here is calculated on a random exchange ratio.
     """
 
+    __slots__ = ()
+
     def __str__(self) -> str:
         return f"{self.actor.name} {self.supply.issue} {self.supply.position:.1f} {self.y:.1f} ({self.opposite_actor.demand.position:.1f}) {self.eu:.10f} "
 
@@ -87,6 +88,9 @@ class RandomRateExchangeActor(base.AbstractExchangeActor):
                 self.exchange.is_valid = False
             self.nbs_1 = new_outcome
 
+        if not self.exchange.is_valid:
+            self.exchange.model.invalid_exchanges.append(self.exchange)
+
     def adjust_utility(self, delta_o) -> None:
         self.eu += abs(delta_o) * self.supply.salience
         self.opposite_actor.eu -= delta_o
@@ -95,6 +99,8 @@ class RandomRateExchangeActor(base.AbstractExchangeActor):
 class RandomRateExchange(base.AbstractExchange):
     """An exchange for the random rate model."""
 
+    __slots__ = ("key",)
+
     actor_class = RandomRateExchangeActor
     """ For the factory, so the Abstract know's which type he has to create  """
 
@@ -119,8 +125,8 @@ class RandomRateExchange(base.AbstractExchange):
             if b > a:
                 a, b = b, a
 
-            self.dp = Decimal(random.uniform(a, b))
-            self.dq = Decimal(random.uniform(a, b))
+            self.dp = self.model.number(self.model.random.uniform(a, b))
+            self.dq = self.model.number(self.model.random.uniform(a, b))
 
         self.i.move = calculations.reverse_move(
             self.model.actor_issues[self.i.supply_issue],
@@ -243,8 +249,8 @@ class RandomRateExchange(base.AbstractExchange):
 class RandomRateModel(base.AbstractModel):
     """The Random Rate implementation."""
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
         self.model_name = "random"
 
     def _get_sorted_exchange_actor_list(self):
@@ -375,9 +381,9 @@ class RandomRateModel(base.AbstractModel):
         return RandomRateExchange(i, j, p, q, model, groups)
 
     def remove_exchange_by_key(self, key) -> None:
-        for __, exchange in enumerate(self.exchanges):
+        for exchange in self.exchanges:
             if key == exchange.key:
-                del self.exchanges[__]
+                self.exchanges.remove(exchange)
                 return
 
     @staticmethod
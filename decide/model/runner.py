@@ -0,0 +1,246 @@
+"""Run the (p, repetition) units of a sweep and fire their events on the event handler.
+
+The units of a p value run together, between its before_repetitions and after_repetitions events.
+A unit runs in this process, optionally with a pool that calculates the candidate exchanges, or on a
+pool of workers of which the recorded events are replayed in the parent process.
+"""
+
+import copy
+from datetime import UTC
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+from decide.data.modelfactory import ModelFactory
+from decide.log import logger
+from decide.model import parallel
+from decide.model.candidates import CandidatePool
+from decide.model.checkpoint import Checkpoint
+from decide.model.observers.observer import Observable
+from decide.model.observers.stopping import RepetitionStopping
+from decide.model.utils import Convergence
+from decide.model.utils import ModelLoop
+from decide.model.utils import repetition_seed
+
+
+class Runner:
+    """Runs the units of a sweep with the same factory, model class and options."""
+
+    def __init__(
+        self,
+        event_handler: Observable,
+        factory: ModelFactory,
+        model_klass,
+        output_directory: Path,
+        repetitions: int,
+        iterations: int,
+        seed: int | None = None,
+        convergence: Convergence | None = None,
+        checkpoint: Checkpoint | None = None,
+        stopping: RepetitionStopping | None = None,
+        **model_kwargs,
+    ) -> None:
+        """:param output_directory: the output of a p value goes to a directory of this one
+        :param seed: the seed of the run, each repetition derives its own seed from it
+        :param convergence: an unused Convergence, each repetition gets its own copy
+        :param stopping: stops the repetitions of a p value when they are enough
+        :param model_kwargs: passed to the factory, e.g. numeric
+        """
+        self.event_handler = event_handler
+        self.factory = factory
+        self.model_klass = model_klass
+        self.output_directory = output_directory
+        self.repetitions = repetitions
+        self.iterations = iterations
+        self.seed = seed
+        self.convergence = convergence
+        self.checkpoint = checkpoint
+        self.stopping = stopping
+        self.model_kwargs = model_kwargs
+
+    def before_repetitions(self, randomized_value: str) -> datetime:
+        """Start the run of a single p value, returns the start time."""
+        checkpoint = self.checkpoint
+        run_output_dir = self.output_directory / str(randomized_value)
+
+        if checkpoint is not None and checkpoint.open and checkpoint.open[0] == randomized_value:
+            # resumed, the run of this p value is already started
+            self.event_handler.update_output_directory(run_output_dir)
+            return checkpoint.open[1]
+
+        start_time = datetime.now(UTC)
+
+        run_output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.event_handler.update_output_directory(run_output_dir)
+
+        self.event_handler.log(message=f"Start calculation at {start_time}")
+        self.event_handler.log(message="Parsed file")
+
+        self.event_handler.before_repetitions(
+            repetitions=self.repetitions,
+            iterations=self.iterations,
+            randomized_value=randomized_value,
+            seed=self.seed,
+        )
+
+        if checkpoint is not None:
+            checkpoint.start_repetitions(randomized_value, start_time)
+
+        return start_time
+
+    def after_repetitions(self, start_time: datetime) -> None:
+        self.event_handler.after_repetitions()
+
+        if self.checkpoint is not None:
+            self.checkpoint.finish_repetitions()
+
+        self.event_handler.log(message=f"Finished in {datetime.now(UTC) - start_time}")
+
+    def enough_repetitions(self, randomized_value) -> bool:
+        """True when the remaining repetitions of the p value can be skipped."""
+        if self.stopping is None:
+            return False
+
+        # the observers may still be handling the last repetition
+        self.event_handler.flush()
+
+        if not self.stopping.done:
+            return False
+
+        logger.info(
+            "Enough repetitions",
+            p=randomized_value,
+            repetitions=self.stopping.repetitions,
+            standard_error=max(self.stopping.standard_errors().values(), default=0.0),
+        )
+
+        return True
+
+    def run(self, units: list[tuple], workers: int = 1, candidate_workers: int = 1) -> None:
+        """Run the units, on a pool of workers or in this process.
+
+        :param workers: the processes of the pool that runs the units, 1 runs them in this process
+        :param candidate_workers: the processes of the pool that calculates the candidate exchanges
+        """
+        if workers > 1:
+            self.run_parallel(units, workers)
+            return
+
+        candidate_pool = None
+
+        if candidate_workers > 1:
+            candidate_pool = CandidatePool(self.factory, candidate_workers, self.model_klass)
+
+        try:
+            self.run_serial(units, candidate_pool)
+        finally:
+            if candidate_pool is not None:
+                candidate_pool.close()
+
+    def run_parallel(self, units: list[tuple], workers: int) -> None:
+        """Run the units on a pool of workers, the highest p first, and replay their events."""
+        # the p values with enough repetitions, the sweep skips their remaining units
+        stopped = set()
+
+        results = parallel.run_sweep(
+            workers,
+            self.factory,
+            self.model_klass,
+            units,
+            self.iterations,
+            self.seed,
+            self.convergence,
+            stopped,
+            **self.model_kwargs,
+        )
+
+        for randomized_value, p_results in groupby(results, key=itemgetter(0)):
+            start_time = self.before_repetitions(randomized_value)
+
+            for _, repetition, batches in p_results:
+                parallel.replay(self.event_handler, batches)
+
+                if self.checkpoint is not None:
+                    self.checkpoint.complete(
+                        self.event_handler,
+                        (randomized_value, repetition),
+                        self.iterations,
+                    )
+
+                if self.enough_repetitions(randomized_value):
+                    stopped.add(randomized_value)
+                    break
+
+            self.after_repetitions(start_time)
+
+    def run_serial(self, units: list[tuple], candidate_pool: CandidatePool | None = None) -> None:
+        """Run the units in this process."""
+        for randomized_value, p_units in groupby(units, key=itemgetter(0)):
+            start_time = self.before_repetitions(randomized_value)
+
+            for unit in p_units:
+                if self.enough_repetitions(randomized_value):
+                    break
+
+                self.run_unit(unit, candidate_pool)
+
+            self.after_repetitions(start_time)
+
+    def run_unit(self, unit: tuple, candidate_pool: CandidatePool | None = None) -> None:
+        """Run a single repetition, or continue the repetition of the checkpoint."""
+        randomized_value, repetition = unit
+        checkpoint = self.checkpoint
+        done = 0
+        convergence = copy.copy(self.convergence)
+
+        if checkpoint is not None and checkpoint.current and checkpoint.current[0] == unit:
+            # continue the repetition that was in progress
+            _, model, done, convergence = checkpoint.current
+        else:
+            model_seed = None
+
+            if self.seed is not None:
+                model_seed = repetition_seed(self.seed, randomized_value, repetition)
+
+            model = self.factory(
+                model_klass=self.model_klass,
+                randomized_value=randomized_value,
+                seed=model_seed,
+                **self.model_kwargs,
+            )
+
+        self.event_handler.update_model_ref(model)
+
+        model_loop = ModelLoop(model, self.event_handler, repetition, candidate_pool, convergence)
+        model_loop.iteration_number = done
+
+        if done == 0:
+            self.event_handler.before_iterations(repetition)
+
+        for iteration_number in range(done, self.iterations):
+            if model_loop.converged:
+                logger.info("Converged", repetition=repetition, iterations=iteration_number)
+                break
+
+            logger.info(
+                "Round completed",
+                repetition=repetition,
+                iteration_number=iteration_number,
+            )
+            model_loop.loop()
+
+            if checkpoint is not None:
+                checkpoint.iteration(
+                    self.event_handler,
+                    unit,
+                    model,
+                    model_loop.iteration_number,
+                    convergence,
+                )
+
+        self.event_handler.after_iterations(repetition)
+
+        if checkpoint is not None:
+            checkpoint.complete(self.event_handler, unit)
@@ -0,0 +1,39 @@
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class ModelStats:
+    """Wall time per phase and event counters of the model, for the current iteration.
+
+    The ModelLoop resets the statistics at the start of each iteration and times its phases, the model counts
+    the events (created exchanges, recalculations, nbs evaluations) while it runs.
+    """
+
+    def __init__(self) -> None:
+        self.timings = {}
+        self.counters = Counter()
+
+    def reset(self) -> None:
+        self.timings = {}
+        self.counters = Counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the wall time of the with-block to the given phase."""
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def to_dict(self) -> dict:
+        return {
+            "timings": dict(self.timings),
+            "total": sum(self.timings.values()),
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class ActorIssueStore:
+    """Dense storage of the actor issue values of a model.
+
+    The position, salience and power of every actor on every issue are kept in ``(n_actors, n_issues)``
+    arrays. The dense ids the model gives its actors and issues, ``Actor.id`` and ``Issue.id``, are the
+    row and column numbers of the arrays. The ``present`` mask tells which actor has a position on which
+    issue, the ``left`` mask is filled by ``determine_positions``.
+
+    The default dtype is ``object`` so the arrays can hold the Decimal values of the reference model.
+    """
+
+    def __init__(self, dtype=object) -> None:
+        self.dtype = dtype
+
+        # reverse lookup: id -> object
+        self.actors = []
+        self.issues = []
+
+        self.position = self._empty(0, 0)
+        self.salience = self._empty(0, 0)
+        self.power = self._empty(0, 0)
+        self.present = np.zeros((0, 0), dtype=bool)
+        self.left = np.zeros((0, 0), dtype=bool)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.actors), len(self.issues)
+
+    def _empty(self, n_actors: int, n_issues: int) -> np.ndarray:
+        return np.zeros((n_actors, n_issues), dtype=self.dtype)
+
+    def _resize(self, n_actors: int, n_issues: int) -> None:
+        """Grow all the arrays to the given shape, the existing values are kept."""
+        old_actors, old_issues = self.position.shape
+
+        for name in ("position", "salience", "power", "present", "left"):
+            old = getattr(self, name)
+            new = np.zeros((n_actors, n_issues), dtype=old.dtype)
+            new[:old_actors, :old_issues] = old
+            setattr(self, name, new)
+
+    def add_actor(self, actor) -> int:
+        """Add a row for the actor when it is new, the actors are added in the order of their id."""
+        if actor.id == len(self.actors):
+            self.actors.append(actor)
+            self._resize(*self.shape)
+
+        return actor.id
+
+    def add_issue(self, issue) -> int:
+        """Add a column for the issue when it is new, the issues are added in the order of their id."""
+        if issue.id == len(self.issues):
+            self.issues.append(issue)
+            self._resize(*self.shape)
+
+        return issue.id
+
+    def add(self, actor, issue, position, salience, power) -> tuple[int, int]:
+        """Store the values of an actor on an issue and return the (actor, issue) index."""
+        index = self.add_actor(actor), self.add_issue(issue)
+
+        self.position[index] = position
+        self.salience[index] = salience
+        self.power[index] = power
+        self.present[index] = True
+
+        return index
+
+    def copy(self) -> "ActorIssueStore":
+        """A store that shares the actors, the salience and the power with this one and has its own
+        positions. The shared values are not changed by a run, do not add actors or issues to a copy.
+        """
+        store = ActorIssueStore.__new__(ActorIssueStore)
+        store.__dict__.update(self.__dict__)
+        store.position = self.position.copy()
+        store.left = self.left.copy()
+
+        return store
+
+    @staticmethod
+    def index(actor, issue) -> tuple[int, int]:
+        return actor.id, issue.id
+
+    def nbs_denominators(self) -> np.ndarray:
+        r""":math:`\\sum_{i=1}^n C_{id} S_{id}` for each issue."""
+        return (self.salience * self.power).sum(axis=0)
+
+    def nbs_numerators(self) -> np.ndarray:
+        r""":math:`\\sum_{i=1}^n C_{id} S_{id} X_{id}` for each issue."""
+        return (self.position * self.salience * self.power).sum(axis=0)
+
+    def determine_positions(self, nbs: np.ndarray) -> None:
+        """Mark for each actor issue if the position is left of the given Nash bargaining solution per issue."""
+        self.left = (self.position <= nbs).astype(bool) & self.present
@@ -38,3 +38,13 @@ def test_actor_functions() -> None:
 
     with pytest.raises(ValueError):
         assert actor1 < Issue("Mock")
+
+
+def test_actor_ids(model) -> None:
+    actors = list(model.actors.values())
+
+    assert [actor.id for actor in actors] == list(range(len(actors)))
+    assert [issue.id for issue in model.issues.values()] == list(range(len(model.issues)))
+
+    # adding the same actor again keeps its id
+    assert model.add_actor(actors[1].actor_id).id == 1
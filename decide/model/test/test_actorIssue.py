@@ -25,3 +25,23 @@ class TestActorIssue(TestCase):
         assert actorIssue.position == position
 
         assert actorIssue.is_left_to_nbs(51), position
+
+    def test_supply_view(self) -> None:
+        actor_issue = base.ActorIssue(
+            actor=base.Actor("Test"),
+            issue=base.Issue("Test"),
+            position=50,
+            power=0.10,
+            salience=0.25,
+        )
+
+        supply = base.SupplyActorIssue(actor_issue)
+
+        # the view moves without changing the underlying actor issue
+        supply.position = 60
+
+        assert supply.salience is actor_issue.salience
+        assert supply.actor is actor_issue.actor
+        assert actor_issue.position == 50
+        assert supply == actor_issue
+        assert not hasattr(supply, "__dict__")
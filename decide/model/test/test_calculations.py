@@ -92,6 +92,40 @@ def test_calc_adjusted_nbs(test_model) -> None:
     ) == decimal.Decimal(200) / decimal.Decimal(3)
 
 
+def test_calc_adjusted_nbs_cached_numerator(test_model) -> None:
+    numerator = calculations.calc_nbs_numerator(test_model.actor_issues)
+
+    assert numerator == 200
+    assert calculations.adjusted_nbs(
+        test_model.actor_issues,
+        {"a": 100},
+        "c",
+        0,
+        test_model.denominator,
+        numerator=numerator,
+    ) == calculations.adjusted_nbs(
+        test_model.actor_issues,
+        {"a": 100},
+        "c",
+        0,
+        test_model.denominator,
+    )
+
+    # the actor itself is counted on x_pos, the delta is the move needed to reach the new nbs
+    assert (
+        calculations.adjusted_nbs_by_position(
+            test_model.actor_issues,
+            {},
+            "a",
+            0,
+            100,
+            test_model.denominator,
+            numerator=numerator,
+        )
+        == 100
+    )
+
+
 def test_by_absolute_move(sample_model) -> None:
     model = sample_model
 
@@ -0,0 +1,45 @@
+import pytest
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model.candidates import CandidatePool
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.randomrate import RandomRateModel
+from decide.model.utils import ModelLoop
+
+
+def run(factory, candidate_pool=None) -> list:
+    model = factory(EqualGainModel, randomized_value="0.5", store=True, numeric="float64", seed=7)
+    event_handler = Observable(model_ref=model, output_directory=None)
+    model_loop = ModelLoop(model, event_handler, 0, candidate_pool)
+
+    positions = []
+
+    for _ in range(3):
+        model_loop.loop()
+
+        positions.append(
+            {
+                (str(issue), str(actor)): actor_issue.position
+                for issue, actor_issues in model.actor_issues.items()
+                for actor, actor_issue in actor_issues.items()
+            },
+        )
+
+    return positions
+
+
+def test_pool_matches_serial_run() -> None:
+    factory = ModelFactory(InputDataFile.open(input_folder / "sample_data.txt"))
+
+    with CandidatePool(factory, 2) as candidate_pool:
+        assert run(factory, candidate_pool) == run(factory)
+
+
+def test_pool_needs_equal_gain() -> None:
+    factory = ModelFactory(InputDataFile.open(input_folder / "sample_data.txt"))
+
+    with pytest.raises(ValueError):
+        CandidatePool(factory, 2, RandomRateModel)
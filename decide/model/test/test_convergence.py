@@ -0,0 +1,40 @@
+from decide.model.observers.observer import Observable
+from decide.model.utils import Convergence
+from decide.model.utils import ModelLoop
+
+
+def test_convergence(model) -> None:
+    convergence = Convergence(tolerance=0.0, rounds=2)
+
+    model.calc_nbs()
+    convergence.update(model)
+    assert convergence.still == 0
+
+    # nothing moved
+    convergence.update(model)
+    assert convergence.still == 1
+    assert not convergence.converged
+
+    convergence.update(model)
+    assert convergence.converged
+
+    # the NBS is read from the model, calc_nbs is not repeated
+    issue = next(iter(model.nbs))
+    model.nbs[issue] += 1
+
+    convergence.update(model)
+    assert convergence.still == 0
+
+
+def test_loop_converges(model) -> None:
+    model_loop = ModelLoop(model, Observable(model, None), 0, convergence=Convergence(0.0))
+    model_loop.loop()
+
+    # the first round realizes exchanges, the positions moved
+    assert not model_loop.converged
+
+    model_loop = ModelLoop(model, Observable(model, None), 0, convergence=Convergence(100.0))
+    model_loop.loop()
+
+    # on the normalized scale a position cannot move more than 100
+    assert model_loop.converged
@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.utils import ModelLoop
+
+# the positions after 10 rounds without random tie breaks, written before the optimizations
+REFERENCE = json.loads((Path(__file__).parent / "decimal_reference.json").read_text())
+
+
+@pytest.mark.parametrize("store", [False, True])
+@pytest.mark.parametrize("data_file", sorted(REFERENCE))
+def test_decimal_model_matches_the_reference(data_file, store, tmp_path, monkeypatch) -> None:
+    # many exchanges of these data sets have an equal gain, so a change in rounding or order shows
+    monkeypatch.setattr(EqualGainModel, "ALLOW_RANDOM", False)
+
+    factory = ModelFactory(InputDataFile.open(input_folder / data_file))
+    model = factory(EqualGainModel, store=store)
+
+    model_loop = ModelLoop(model, Observable(model, tmp_path), 0)
+
+    for _ in range(10):
+        model_loop.loop()
+
+    positions = {
+        f"{issue.name}|{actor.actor_id}": str(actor_issue.position)
+        for issue, actor_issues in model.actor_issues.items()
+        for actor, actor_issue in actor_issues.items()
+    }
+
+    assert positions == REFERENCE[data_file]
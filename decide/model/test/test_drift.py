@@ -0,0 +1,32 @@
+import pytest
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model.drift import drift
+from decide.model.equalgain import EqualGainModel
+
+
+@pytest.fixture
+def data_file() -> InputDataFile:
+    return InputDataFile.open(input_folder / "sample_data.txt")
+
+
+def test_float64_model(data_file) -> None:
+    factory = ModelFactory(data_file)
+    reference = factory(EqualGainModel)
+    model = factory(EqualGainModel, numeric="float64")
+
+    reference.calc_nbs()
+    model.calc_nbs()
+
+    for issue, nbs in model.nbs.items():
+        assert isinstance(nbs, float)
+        assert nbs == pytest.approx(float(reference.nbs[issue]), abs=1e-9)
+
+
+def test_drift(data_file) -> None:
+    result = drift(data_file, iterations=2)
+
+    assert [row["iteration"] for row in result] == [0, 1]
+    assert all(row["nbs"] >= 0 and row["position"] >= 0 for row in result)
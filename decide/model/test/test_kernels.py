@@ -0,0 +1,53 @@
+import numpy as np
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model import kernels
+from decide.model.equalgain import EqualGainModel
+
+
+def test_group_members() -> None:
+    left = np.array(
+        [
+            [False, False],
+            [True, False],
+            [False, True],
+            [True, True],
+            [True, True],
+        ],
+    )
+    present = np.ones((5, 2), dtype=bool)
+    present[4, 1] = False
+
+    a, b, c, d = kernels.group_members(left, present, 0, 1)
+
+    assert a.tolist() == [0]
+    assert b.tolist() == [1]
+    assert c.tolist() == [2]
+    # the last actor has no position on the second issue
+    assert d.tolist() == [3]
+
+
+def test_candidate_pairs() -> None:
+    i, j = kernels.candidate_pairs(np.array([0, 1]), np.array([5, 6, 7]))
+
+    assert list(zip(i.tolist(), j.tolist())) == [(0, 5), (0, 6), (0, 7), (1, 5), (1, 6), (1, 7)]
+
+
+def test_equal_gain_candidates_keep_valid_exchanges() -> None:
+    factory = ModelFactory(InputDataFile.open(input_folder / "sample_data.txt"))
+
+    def exchanges(model):
+        model.calc_nbs()
+        model.determine_positions()
+        model.calc_combinations()
+        model.determine_groups_and_calculate_exchanges()
+
+        return [(str(e), e.is_valid) for e in model.exchanges]
+
+    reference = exchanges(factory(EqualGainModel))
+    filtered = exchanges(factory(EqualGainModel, store=True))
+
+    assert len(filtered) < len(reference)
+    assert [e for e in reference if e[1]] == [e for e in filtered if e[1]]
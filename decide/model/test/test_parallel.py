@@ -0,0 +1,229 @@
+import io
+import pickle
+import random
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model import parallel
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.observers.observer import Observer
+from decide.model.utils import ModelLoop
+
+
+class History(Observer):
+    def __init__(self, observable: Observable) -> None:
+        super().__init__(observable)
+        self.events = []
+
+    def before_iterations(self, repetition) -> None:
+        self.events.append(("before_iterations", repetition, self.model_ref.randomized_value))
+
+    def execute_exchange(self, exchange) -> None:
+        self.events.append(("execute_exchange", str(exchange)))
+
+    def after_loop(self, realized, iteration: int, repetition: int) -> None:
+        self.events.append(("after_loop", iteration, repetition, [str(e) for e in realized]))
+
+    def end_loop(self, iteration: int, repetition: int) -> None:
+        positions = {
+            (str(issue), str(actor)): actor_issue.position
+            for issue, actor_issues in self.model_ref.actor_issues.items()
+            for actor, actor_issue in actor_issues.items()
+        }
+        self.events.append(("end_loop", iteration, repetition, positions, dict(self.model_ref.nbs)))
+
+    def after_iterations(self, repetition) -> None:
+        self.events.append(("after_iterations", repetition))
+
+
+def factory():
+    return ModelFactory(InputDataFile.open(input_folder / "sample_data.txt"))
+
+
+def test_replay_matches_serial_run(monkeypatch, tmp_path) -> None:
+    # keep the random state of the test, so both runs flip the same coins
+    monkeypatch.setattr(parallel, "random", SimpleNamespace(seed=lambda: None))
+
+    random.seed(42)
+    model = factory()(EqualGainModel, randomized_value="0.5")
+    serial = Observable(model_ref=model, output_directory=tmp_path)
+    expected = History(serial)
+
+    model_loop = ModelLoop(model, serial, 0)
+    serial.before_iterations(0)
+    for _ in range(3):
+        model_loop.loop()
+    serial.after_iterations(0)
+
+    random.seed(42)
+    batches = parallel.run_repetition(factory(), EqualGainModel, "0.5", 0, 3)
+    replayed = Observable(model_ref=None, output_directory=tmp_path)
+    actual = History(replayed)
+
+    parallel.replay(replayed, batches)
+
+    assert actual.events == expected.events
+
+
+def test_only_the_first_batch_holds_the_model() -> None:
+    model = factory()(EqualGainModel, randomized_value="0.5", seed=1)
+    batches = parallel.record_repetition(model, 0, 3)
+
+    states = []
+
+    for batch in batches:
+        # keep the references to the shared objects of the model
+        unpickler = pickle.Unpickler(io.BytesIO(batch))
+        unpickler.persistent_load = lambda index: index
+        states.append(unpickler.load()[0])
+
+    assert isinstance(states[0], EqualGainModel)
+    assert all(state is None or isinstance(state, parallel.Snapshot) for state in states[1:])
+
+    snapshots = [state for state in states if state is not None][1:]
+    # after_loop and end_loop of each loop, the groups only change before the after_loop
+    assert len(snapshots) == 6
+    assert [snapshot.groups is not None for snapshot in snapshots] == [True, False] * 3
+
+
+def test_schedule_highest_p_first() -> None:
+    units = [(p, repetition) for p in ["0.0", "0.5", "0.25"] for repetition in range(2)]
+
+    assert parallel.schedule(units) == [
+        ("0.5", 0),
+        ("0.5", 1),
+        ("0.25", 0),
+        ("0.25", 1),
+        ("0.0", 0),
+        ("0.0", 1),
+    ]
+
+
+def test_run_sweep(tmp_path) -> None:
+    event_handler = Observable(model_ref=None, output_directory=tmp_path)
+    history = History(event_handler)
+
+    units = []
+
+    for randomized_value, repetition, batches in parallel.run_sweep(
+        2, factory(), EqualGainModel, [("0.0", 0), ("0.0", 1), ("0.5", 0), ("0.5", 1)], 2
+    ):
+        units.append((randomized_value, repetition))
+        parallel.replay(event_handler, batches)
+
+    assert units == [("0.5", 0), ("0.5", 1), ("0.0", 0), ("0.0", 1)]
+    assert [str(e[2]) for e in history.events if e[0] == "before_iterations"] == [
+        "0.5",
+        "0.5",
+        "0.0",
+        "0.0",
+    ]
+    assert [(e[1], e[2]) for e in history.events if e[0] == "end_loop"] == [
+        (0, 0),
+        (1, 0),
+        (0, 1),
+        (1, 1),
+    ] * 2
+
+
+def test_run_sweep_keeps_a_window_of_units_in_flight(monkeypatch) -> None:
+    submitted = []
+
+    class Executor:
+        def __init__(self, max_workers: int) -> None:
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args) -> None:
+            pass
+
+        def submit(self, function, factory, model_klass, randomized_value, repetition, *args):
+            submitted.append((randomized_value, repetition))
+
+            future = Future()
+            future.set_result([])
+
+            return future
+
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", Executor)
+
+    units = [(p, repetition) for p in ("0.0", "0.5") for repetition in range(10)]
+    stopped = set()
+
+    sweep = parallel.run_sweep(2, None, EqualGainModel, units, 1, stopped=stopped)
+
+    assert next(sweep) == ("0.5", 0, [])
+    # two units per worker and the one that follows the yielded unit
+    assert len(submitted) == 5
+
+    stopped.add("0.5")
+
+    assert [unit[:2] for unit in sweep] == [("0.0", repetition) for repetition in range(10)]
+    # the units of the stopped p that were not submitted yet are skipped
+    assert len(submitted) == 15
+
+
+def test_async_observable_matches_serial_run(tmp_path) -> None:
+    serial = Observable(model_ref=None, output_directory=tmp_path)
+    expected = History(serial)
+
+    model = factory()(EqualGainModel, randomized_value="0.5", seed=1)
+    parallel.replay(serial, parallel.record_repetition(model, 0, 3))
+
+    model = factory()(EqualGainModel, randomized_value="0.5", seed=1)
+    event_handler = parallel.AsyncObservable(model_ref=model, output_directory=tmp_path, maxsize=1)
+    actual = History(event_handler)
+
+    model_loop = ModelLoop(model, event_handler, 0)
+    event_handler.before_iterations(0)
+    for _ in range(3):
+        model_loop.loop()
+    event_handler.after_iterations(0)
+
+    event_handler.after_model()
+
+    assert actual.events == expected.events
+    assert not event_handler.thread.is_alive()
+    # the observers read their own copy of the model
+    assert event_handler.observed_model is not model
+
+
+def test_async_observable_raises_the_error_of_an_observer(tmp_path) -> None:
+    class Failing(Observer):
+        def before_model(self) -> None:
+            msg = "observer failed"
+            raise ValueError(msg)
+
+    event_handler = parallel.AsyncObservable(model_ref=None, output_directory=tmp_path)
+    Failing(event_handler)
+
+    event_handler.before_model()
+
+    with pytest.raises(ValueError, match="observer failed"):
+        event_handler.flush()
+
+
+def test_async_observable_raises_the_error_of_the_last_event_at_after_model(tmp_path) -> None:
+    class Failing(Observer):
+        def after_repetitions(self) -> None:
+            msg = "observer failed"
+            raise ValueError(msg)
+
+    event_handler = parallel.AsyncObservable(model_ref=None, output_directory=tmp_path)
+    Failing(event_handler)
+
+    # the error happens on the thread, the model continues until the next submit or flush
+    event_handler.after_repetitions()
+
+    with pytest.raises(ValueError, match="observer failed"):
+        event_handler.after_model()
+
+    assert not event_handler.thread.is_alive()
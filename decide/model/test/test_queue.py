@@ -0,0 +1,160 @@
+import random
+from decimal import Decimal
+
+from decide.model.queue import ExchangeList
+from decide.model.queue import ExchangeQueue
+
+
+class ExchangeActor:
+    def __init__(self, actor) -> None:
+        self.actor = actor
+
+
+class Exchange:
+    def __init__(self, name, gain, i="i", j="j", p="p", q="q") -> None:
+        self.name = name
+        self.gain = gain
+        self.i = ExchangeActor(i)
+        self.j = ExchangeActor(j)
+        self.p = p
+        self.q = q
+
+
+def test_queue_order() -> None:
+    a = Exchange("a", Decimal(1))
+    b = Exchange("b", Decimal(3))
+    c = Exchange("c", Decimal(1))
+    d = Exchange("d", Decimal(2))
+
+    queue = ExchangeQueue([a, b, c, d])
+
+    assert len(queue) == 4
+    assert queue[0] is b
+    assert [e.name for e in queue] == ["b", "d", "a", "c"]
+
+    # equal gains leave the queue in the order they entered it
+    assert queue.pop() is b
+    assert queue.pop() is d
+    assert queue.pop() is a
+    assert queue.pop() is c
+    assert len(queue) == 0
+
+
+def test_queue_update_and_remove() -> None:
+    a = Exchange("a", 1)
+    b = Exchange("b", 2)
+    c = Exchange("c", 3)
+
+    queue = ExchangeQueue([a, b, c])
+
+    a.gain = 4
+    queue.update(a)
+    assert queue.peek() is a
+
+    queue.remove(a)
+    assert a not in queue
+    assert [e.name for e in queue] == ["c", "b"]
+
+    # appended again, behind the exchanges with the same gain
+    b.gain = 3
+    queue.update(b)
+    queue.remove(b)
+    queue.append(b)
+    assert [e.name for e in queue] == ["c", "b"]
+
+
+def test_queue_matches_sorted_list() -> None:
+    rng = random.Random(42)
+
+    exchanges = [Exchange(str(n), rng.randint(0, 20)) for n in range(200)]
+    queue = ExchangeQueue(exchanges)
+    expected = list(exchanges)
+
+    while expected:
+        for exchange in rng.sample(expected, min(len(expected), 5)):
+            exchange.gain = rng.randint(0, 20)
+            queue.update(exchange)
+
+        removed = rng.choice(expected)
+        queue.remove(removed)
+        expected.remove(removed)
+
+        if not expected:
+            break
+
+        # the list was sorted again before every pop, equal gains keep their order of the last sort
+        expected.sort(key=lambda e: -e.gain)
+
+        assert queue.pop() is expected.pop(0)
+
+
+def test_queue_affected() -> None:
+    a = Exchange("a", 1, i="x", j="y", p="p", q="q")
+    b = Exchange("b", 2, i="y", j="z", p="q", q="r")
+    c = Exchange("c", 3, i="z", j="w", p="p", q="r")
+
+    queue = ExchangeQueue([a, b, c])
+
+    # y on q is shared with b, x on p only with a itself
+    assert [e.name for e in queue.affected(a)] == ["b", "a"]
+    assert [e.name for e in queue.affected(Exchange("d", 0, i="w", j="v", p="s", q="t"))] == []
+
+    queue.remove(b)
+    assert [e.name for e in queue.affected(a)] == ["a"]
+
+
+def test_list_affected() -> None:
+    a = Exchange("a", 1, i="x", j="y", p="p", q="q")
+    b = Exchange("b", 2, i="y", j="z", p="q", q="r")
+    c = Exchange("c", 3, i="z", j="w", p="p", q="r")
+
+    exchanges = ExchangeList([a, b, c])
+
+    # in the order they were added instead of by gain
+    assert [e.name for e in exchanges] == ["a", "b", "c"]
+    assert [e.name for e in exchanges.affected(a)] == ["a", "b"]
+
+    exchanges.remove(b)
+
+    assert b not in exchanges
+    assert [e.name for e in exchanges.affected(a)] == ["a"]
+    assert [e.name for e in exchanges] == ["a", "c"]
+
+
+def test_queue_ties_follow_the_sorted_list() -> None:
+    a = Exchange("a", 1)
+    b = Exchange("b", 3)
+    c = Exchange("c", 2)
+    d = Exchange("d", 2)
+
+    queue = ExchangeQueue([a, b, c, d])
+
+    assert queue.pop() is b
+
+    # a went up to 2, the sorted list had it behind c and d
+    a.gain = 2
+    queue.update(a)
+    assert [e.name for e in queue] == ["c", "d", "a"]
+
+    assert queue.pop() is c
+
+    # d went down to 1 and a up to 1 and back to 2 within the same round, a keeps its place
+    d.gain = 1
+    queue.update(d)
+    a.gain = 1
+    queue.update(a)
+    a.gain = 2
+    queue.update(a)
+
+    e = Exchange("e", 1)
+    queue.append(e)
+
+    # d moved in front of the exchanges of its new gain, e is added behind them
+    assert [e.name for e in queue] == ["a", "d", "e"]
+
+    assert queue.pop() is a
+
+    # put back behind the exchanges with the same gain
+    a.gain = 1
+    assert queue.pushpop(a) is d
+    assert [e.name for e in queue] == ["e", "a"]
@@ -1,5 +1,47 @@
-from unittest import TestCase
+import random
+from pathlib import Path
 
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model.equalgain import EqualGainModel
+from decide.model.observers.observer import Observable
+from decide.model.utils import ModelLoop
+from decide.model.utils import repetition_seed
 
-class TestRandomizedEqualGain(TestCase):
-    pass
+
+def run(factory, seed, iterations=3):
+    model = factory(EqualGainModel, randomized_value="0.5", seed=seed)
+    model_loop = ModelLoop(model, Observable(model, Path()), 0)
+
+    for _ in range(iterations):
+        model_loop.loop()
+
+    return {
+        (issue.issue_id, actor.actor_id): actor_issue.position
+        for issue, actor_issues in model.actor_issues.items()
+        for actor, actor_issue in actor_issues.items()
+    }
+
+
+def test_seeded_model_is_reproducible() -> None:
+    factory = ModelFactory(InputDataFile.open(input_folder / "sample_data.txt"))
+
+    first = run(factory, seed=3)
+
+    assert factory(EqualGainModel, seed=3).seed == 3
+
+    # the global random module does not take part in a seeded model
+    random.seed(99)
+    assert run(factory, seed=3) == first
+    assert run(factory, seed=4) != first
+
+
+def test_repetition_seed() -> None:
+    seed = repetition_seed(1, "0.5", 0)
+
+    assert seed == repetition_seed(1, "0.50", 0)
+    assert seed != repetition_seed(1, "0.5", 1)
+    assert seed != repetition_seed(1, "0.55", 0)
+    assert seed != repetition_seed(2, "0.5", 0)
+    assert 0 <= seed < 2**63
@@ -0,0 +1,35 @@
+import json
+
+from decide.model.observers.observer import Observable
+from decide.model.observers.statistics import StatisticsWriter
+from decide.model.utils import ModelLoop
+
+
+def test_loop_statistics(model, tmp_path) -> None:
+    event_handler = Observable(model_ref=model, output_directory=tmp_path)
+    writer = StatisticsWriter(event_handler, tmp_path / "stats.json")
+
+    event_handler.before_repetitions(repetitions=1, iterations=2, randomized_value="0.0")
+
+    model_loop = ModelLoop(model, event_handler, 0)
+    model_loop.loop()
+    model_loop.loop()
+
+    event_handler.after_model()
+
+    assert [(s["iteration"], s["repetition"]) for s in writer.iterations] == [(0, 0), (1, 0)]
+
+    first = writer.iterations[0]
+
+    assert {"calc_nbs", "realize_exchanges", "observers"} <= first["timings"].keys()
+    assert first["total"] == sum(first["timings"].values())
+    assert first["counters"]["exchanges_created"] > 0
+    assert first["counters"]["exchanges_realized"] > 0
+
+    with (tmp_path / "stats.json").open() as file:
+        data = json.load(file)
+
+    assert len(data["iterations"]) == 2
+    assert data["summary"]["counters"]["exchanges_realized"] == sum(
+        s["counters"]["exchanges_realized"] for s in writer.iterations
+    )
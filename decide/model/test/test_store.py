@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+import pytest
+
+from decide import input_folder
+from decide.data.modelfactory import ModelFactory
+from decide.data.reader import InputDataFile
+from decide.model.base import Actor
+from decide.model.base import Issue
+from decide.model.base import StoredActorIssue
+from decide.model.equalgain import EqualGainModel
+from decide.model.store import ActorIssueStore
+
+
+@pytest.fixture
+def factory() -> ModelFactory:
+    return ModelFactory(date_file=InputDataFile.open(input_folder / "sample_data.txt"))
+
+
+def test_store_add() -> None:
+    store = ActorIssueStore()
+
+    a, b = Actor("a"), Actor("b")
+    p, q = Issue("p"), Issue("q")
+
+    for id_, item in enumerate((a, b)):
+        item.id = id_
+
+    for id_, item in enumerate((p, q)):
+        item.id = id_
+
+    assert store.add(a, p, Decimal(10), Decimal(1), Decimal(2)) == (0, 0)
+    assert store.add(b, q, Decimal(20), Decimal(3), Decimal(4)) == (1, 1)
+    assert store.add(a, q, Decimal(30), Decimal(5), Decimal(6)) == (0, 1)
+
+    assert store.shape == (2, 2)
+    assert store.position[0, 0] == 10
+    assert store.position[1, 1] == 20
+    assert store.present.tolist() == [[True, True], [False, True]]
+    assert store.actors == [a, b]
+    assert store.issues == [p, q]
+
+    assert store.nbs_denominators().tolist() == [2, 42]
+    assert store.nbs_numerators().tolist() == [20, 20 * 12 + 30 * 30]
+
+
+def test_stored_model_equals_reference(factory) -> None:
+    reference = factory(EqualGainModel)
+    model = factory(EqualGainModel, store=True)
+
+    reference.calc_nbs()
+    reference.determine_positions()
+    model.calc_nbs()
+    model.determine_positions()
+
+    for issue, actor_issues in reference.actor_issues.items():
+        assert model.nbs[issue] == reference.nbs[issue]
+        assert model.nbs_denominators[issue] == reference.nbs_denominators[issue]
+
+        for actor, actor_issue in actor_issues.items():
+            stored = model.actor_issues[issue][actor]
+
+            assert isinstance(stored, StoredActorIssue)
+            assert stored.position == actor_issue.position
+            assert stored.left == actor_issue.left
+            assert model.get_value(actor, issue, "s") == reference.get_value(actor, issue, "s")
+
+
+def test_stored_actor_issue_is_a_view(factory) -> None:
+    model = factory(EqualGainModel, store=True)
+
+    issue = model.issues["tolheffing-binnenstad"]
+    actor = model.actors["Wcentr"]
+
+    actor_issue = model.actor_issues[issue][actor]
+    actor_issue.position = Decimal(42)
+
+    assert model.store.position[model.store.index(actor, issue)] == 42
+    assert model.get_value(actor, issue, "x") == 42
@@ -1,47 +1,160 @@
 import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from decide.model import candidates
+    from decide.model.observers import observer
+
+
+def repetition_seed(seed: int, randomized_value, repetition: int) -> int:
+    """Derive the seed of a single repetition from the seed of the run, the p value and the repetition.
+
+    :param seed: the seed given to the run
+    :param randomized_value: the p value of the model, None counts as 0
+    :param repetition: the index of the repetition
+    :return: a 63 bit integer, it fits in a SQLite integer column
+    """
+    p = round(float(randomized_value or 0) * 10_000)
+
+    state = np.random.SeedSequence(seed, spawn_key=(p, repetition)).generate_state(1, np.uint64)
+
+    return int(state[0] >> np.uint64(1))
+
+
+class Convergence:
+    """Tells when a repetition stands still, so it can stop before the last iteration.
+
+    After each round the start positions of the next round and the Nash bargaining solution of the round
+    are compared with those of the previous round. A round in which nothing moved more than the
+    tolerance is a still round, the repetition has converged after the given number of consecutive
+    still rounds. A round without realized exchanges moves nothing and is always a still round.
+    """
+
+    def __init__(self, tolerance: float = 0.0, rounds: int = 1) -> None:
+        """:param tolerance: the largest change of a position or NBS in a still round
+        :param rounds: the number of consecutive still rounds before the repetition is converged
+        """
+        self.tolerance = tolerance
+        self.rounds = rounds
+        self.still = 0
+        self.positions = None
+        self.nbs = None
+
+    @property
+    def converged(self) -> bool:
+        return self.still >= self.rounds
+
+    def update(self, model) -> None:
+        """Compare the state of the model with the state of the previous call.
+
+        The NBS is read from the model, so it needs a calc_nbs after the positions changed.
+        """
+        tolerance = model.number(str(self.tolerance))
+
+        positions = [
+            actor_issue.position
+            for actor_issues in model.actor_issues.values()
+            for actor_issue in actor_issues.values()
+        ]
+
+        nbs = list(model.nbs.values())
+
+        if self.positions is not None:
+            moved = max(
+                (abs(new - old) for new, old in zip(positions, self.positions)),
+                default=0,
+            )
+            shifted = max((abs(new - old) for new, old in zip(nbs, self.nbs)), default=0)
+
+            if moved <= tolerance and shifted <= tolerance:
+                self.still += 1
+            else:
+                self.still = 0
+
+        self.positions = positions
+        self.nbs = nbs
 
 
 class ModelLoop:
     """Helps performing all the actions in the correct order."""
 
-    def __init__(self, model, event_handler: "observer.Observable", repetition: int) -> None:
+    def __init__(
+        self,
+        model,
+        event_handler: "observer.Observable",
+        repetition: int,
+        candidate_pool: "candidates.CandidatePool | None" = None,
+        convergence: Convergence | None = None,
+    ) -> None:
+        """:param candidate_pool: calculates the candidate exchanges on a process pool when given
+        :param convergence: tracks if the repetition converged, a new one for each repetition
+        """
         self.model = model
         self.event_handler = event_handler
         self.iteration_number = 0
         self.repetition_number = repetition
+        self.candidate_pool = candidate_pool
+        self.convergence = convergence
+
+    @property
+    def converged(self) -> bool:
+        """True when the repetition stands still and the remaining iterations can be skipped."""
+        return self.convergence is not None and self.convergence.converged
 
     def loop(self) -> None:
-        self.model.calc_nbs()
-        self.model.determine_positions()
-        self.model.calc_combinations()
-        self.model.determine_groups_and_calculate_exchanges()
+        stats = self.model.stats
+        stats.reset()
+
+        with stats.phase("calc_nbs"):
+            self.model.calc_nbs()
+
+        if self.convergence is not None and self.convergence.positions is None:
+            # the begin state of the repetition
+            self.convergence.update(self.model)
+        with stats.phase("determine_positions"):
+            self.model.determine_positions()
+        with stats.phase("calc_combinations"):
+            self.model.calc_combinations()
+        with stats.phase("determine_groups_and_calculate_exchanges"):
+            if self.candidate_pool is None:
+                self.model.determine_groups_and_calculate_exchanges()
+            else:
+                self.candidate_pool.determine_groups_and_calculate_exchanges(self.model)
 
         realized = []
 
         # call the event for beginning the loop
-        self.event_handler.before_loop(self.iteration_number, self.repetition_number)
+        with stats.phase("observers"):
+            self.event_handler.before_loop(self.iteration_number, self.repetition_number)
 
-        while len(self.model.exchanges) > 0:
-            realize_exchange = self.model.highest_gain()  # type: base.AbstractExchange
+        with stats.phase("realize_exchanges"):
+            while len(self.model.exchanges) > 0:
+                realize_exchange = self.model.highest_gain()  # type: base.AbstractExchange
 
-            if realize_exchange and realize_exchange.is_valid:
-                removed_exchanges = self.model.remove_invalid_exchanges(
-                    realize_exchange,
-                )
+                if realize_exchange and realize_exchange.is_valid:
+                    removed_exchanges = self.model.remove_invalid_exchanges(
+                        realize_exchange,
+                    )
 
-                realized.append(realize_exchange)
+                    realized.append(realize_exchange)
 
-                self.event_handler.removed_exchanges(removed_exchanges)
-                self.event_handler.execute_exchange(realize_exchange)
-            elif self.model.VERBOSE:
-                logging.info(realize_exchange)
+                    stats.count("exchanges_realized")
+                    stats.count("exchanges_invalidated", len(removed_exchanges))
+
+                    self.event_handler.removed_exchanges(removed_exchanges)
+                    self.event_handler.execute_exchange(realize_exchange)
+                elif self.model.VERBOSE:
+                    logging.info(realize_exchange)
 
         # call the event for ending the loop
-        self.event_handler.after_loop(
-            realized=realized,
-            iteration=self.iteration_number,
-            repetition=self.repetition_number,
-        )
+        with stats.phase("observers"):
+            self.event_handler.after_loop(
+                realized=realized,
+                iteration=self.iteration_number,
+                repetition=self.repetition_number,
+            )
 
         for exchange in realized:
             self.model.actor_issues[exchange.i.supply.issue][
@@ -52,18 +165,30 @@ class ModelLoop:
             ].position = exchange.j.y
 
         # calc the new MDS on the voting positions and fire the event for ending this loop
-        self.model.calc_nbs()
-        self.event_handler.end_loop(
+        with stats.phase("calc_nbs"):
+            self.model.calc_nbs()
+        with stats.phase("observers"):
+            self.event_handler.end_loop(
+                iteration=self.iteration_number,
+                repetition=self.repetition_number,
+            )
+
+        # calculate for each realized exchange there new start positions
+        with stats.phase("new_start_positions"):
+            for exchange in realized:
+                pi = exchange.i.new_start_position()
+                self.model.actor_issues[exchange.i.supply.issue][exchange.i.actor].position = pi
+
+                pj = exchange.j.new_start_position()
+                self.model.actor_issues[exchange.j.supply.issue][exchange.j.actor].position = pj
+
+        self.event_handler.loop_statistics(
             iteration=self.iteration_number,
             repetition=self.repetition_number,
+            statistics=stats.to_dict(),
         )
 
-        # calculate for each realized exchange there new start positions
-        for exchange in realized:
-            pi = exchange.i.new_start_position()
-            self.model.actor_issues[exchange.i.supply.issue][exchange.i.actor].position = pi
-
-            pj = exchange.j.new_start_position()
-            self.model.actor_issues[exchange.j.supply.issue][exchange.j.actor].position = pj
+        if self.convergence is not None:
+            self.convergence.update(self.model)
 
         self.iteration_number += 1
@@ -3,3 +3,17 @@ from . import descriptives
 from . import externalities
 from . import issuecomparison
 from . import nashbargainingsolution
+
+
+def write_summary_results(connection, model_run_ids: list[int], output_directory) -> None:
+    """Write the summaries that compare the model runs."""
+    externalities.write_summary_result(connection, model_run_ids, output_directory)
+    descriptives.write_summary_result(connection, model_run_ids, output_directory)
+    issuecomparison.write_summary_result(connection, model_run_ids, output_directory)
+    nashbargainingsolution.write_summary_result(connection, model_run_ids, output_directory)
+    nashbargainingsolution.write_summary_result(
+        connection,
+        model_run_ids,
+        output_directory,
+        "after",
+    )
@@ -12,6 +12,7 @@ from decide import data_folder
 from decide.data.database import Manager
 from decide.data.database import connection
 from decide.log import logger
+from decide.results.helpers import actor_issue_table
 
 pd.set_option("display.max_rows", 500)
 pd.set_option("display.max_columns", 500)
@@ -23,8 +24,10 @@ def write_result(
     model_run_id,
     output_directory: Path,
 ) -> None:
+    table = actor_issue_table(conn, [model_run_id])
+
     df = pd.read_sql(
-        """
+        f"""
     SELECT
         a.p as p,
         a.issue as issue,
@@ -37,19 +40,23 @@ def write_result(
             i2.pointer                                AS iteration,
             m.p,
             i.name as issue
-          FROM actorissue ai
+          FROM {table} ai
             LEFT JOIN issue i ON ai.issue_id = i.id
             LEFT JOIN actor a ON ai.actor_id = a.id
             LEFT JOIN iteration i2 ON ai.iteration_id = i2.id
             LEFT JOIN repetition r ON i2.repetition_id = r.id
             LEFT JOIN modelrun m ON r.model_run_id = m.id
-          WHERE  ai.type = 'after' AND i2.pointer = ? AND m.id = ?
+          WHERE  ai.type = 'after' AND m.id = ? AND i2.pointer = MIN(
+            ?,
+            -- the last iteration of a repetition that converged before the last iteration
+            (SELECT MAX(last.pointer) FROM iteration last WHERE last.repetition_id = r.id)
+          )
          GROUP BY m.id,r.id, i2.id, i.id) a
     """,
         conn._state.conn,
         params=(
-            last_iteration,
             model_run_id,
+            last_iteration,
         ),
         index_col=["p"],
         columns=["issue"],
@@ -1,5 +1,7 @@
 from collections.abc import Iterable
 
+import pandas as pd
+
 
 def get_all_actors(connection, model_run_ids=None, data_set_id=None):
     assert not (model_run_ids and data_set_id), "Provide only one of both arguments"
@@ -46,6 +48,51 @@ def list_to_sql_param(list_object) -> str:
     return ",".join([f"'{x}'" for x in list_object])
 
 
+def actor_issue_table(conn, model_run_ids: list[int]) -> str:
+    """The table to read the actor issues of the model runs from.
+
+    The actorissue_full view completes the delta snapshots, the table itself is faster to read when
+    all the model runs stored complete snapshots.
+    """
+    cursor = conn.execute_sql(
+        f"""SELECT COUNT(*)
+    FROM modelrun m
+    WHERE m.id IN ({list_to_sql_param(model_run_ids)}) AND m.snapshots = 'delta'""",
+    )
+
+    return "actorissue_full" if cursor.fetchone()[0] > 0 else "actorissue"
+
+
+def fill_converged_rounds(df: pd.DataFrame, keys: list[str], value: str) -> pd.DataFrame:
+    """Repeat the last round of the repetitions that converged before the last round of their p.
+
+    A converged repetition stands still, without the repeated rounds the averages of the later
+    rounds would only hold the repetitions that did not converge yet.
+
+    :param df: a row per round of each repetition, with a p index and a round column
+    :param keys: the columns that identify a repetition, like ["issue", "repetion"]
+    :param value: the column with the values
+    :return: the same frame when no repetition converged early
+    """
+    frame = df.reset_index()
+    rounds = frame.pivot_table(
+        index=["p", *keys],
+        columns="round",
+        values=value,
+        aggfunc="first",
+    )
+
+    if not rounds.isna().to_numpy().any():
+        return df
+
+    last_round = frame.groupby("p")["round"].max()
+
+    filled = rounds.ffill(axis=1).stack().rename(value).reset_index()
+    filled = filled[filled["round"] <= filled["p"].map(last_round)]
+
+    return filled.set_index("p")
+
+
 def handle_data_frame(df, file_name, title) -> None:
     df.to_csv(str(file_name).format("csv"))
 
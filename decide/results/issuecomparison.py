@@ -10,17 +10,33 @@ from peewee import DatabaseProxy
 from decide import data_folder
 from decide.data.database import Manager
 from decide.data.database import connection
+from decide.results.helpers import actor_issue_table
+from decide.results.helpers import fill_converged_rounds
 from decide.results.helpers import list_to_sql_param
 
 pd.set_option("display.max_rows", 500)
 pd.set_option("display.max_columns", 500)
 
 
-def write_summary_result(
-    conn: DatabaseProxy, model_run_ids: list[int], output_directory: Path
-) -> None:
-    df = pd.read_sql(
-        f"""
+def has_converged_repetitions(conn: DatabaseProxy, model_run_ids: list[int]) -> bool:
+    """True when a repetition of the model runs stopped before the last iteration."""
+    cursor = conn.execute_sql(
+        f"""SELECT COUNT(*)
+    FROM repetition r
+             JOIN modelrun m on r.model_run_id = m.id
+    WHERE m.id IN ({list_to_sql_param(model_run_ids)}) AND r.iterations < m.iterations""",
+    )
+
+    return cursor.fetchone()[0] > 0
+
+
+def read_positions(conn: DatabaseProxy, model_run_ids: list[int], ai_type: str) -> pd.DataFrame:
+    """The average position of each actor on each issue per round and p."""
+    table = actor_issue_table(conn, model_run_ids)
+
+    if not has_converged_repetitions(conn, model_run_ids):
+        return pd.read_sql(
+            f"""
     SELECT
             a.name AS actor,
             i.name as issue,
@@ -28,50 +44,62 @@ def write_summary_result(
             i2.pointer + 1                                AS round,
             m.p,
             m.id
-          FROM actorissue ai
+          FROM {table} ai
             LEFT JOIN issue i ON ai.issue_id = i.id
             LEFT JOIN actor a ON ai.actor_id = a.id
             LEFT JOIN iteration i2 ON ai.iteration_id = i2.id
             LEFT JOIN repetition r ON i2.repetition_id = r.id
             LEFT JOIN modelrun m ON r.model_run_id = m.id
-          WHERE  ai.type = 'before' AND m.id IN({list_to_sql_param(model_run_ids)})
+          WHERE  ai.type = '{ai_type}' AND m.id IN({list_to_sql_param(model_run_ids)})
          GROUP BY m.id, i2.pointer, a.id, i.id;
     """,
-        conn._state.conn,
-        index_col=["issue", "actor", "p"],
-        columns=["position"],
-    )
-
-    table = pd.pivot_table(
-        df,
-        index=["issue", "actor", "round"],
-        columns=["p"],
-        values=["position"],
-    )
-    table.to_csv(output_directory / "issues_preference.csv")
+            conn._state.conn,
+            index_col=["issue", "actor", "p"],
+            columns=["position"],
+        )
 
+    # the positions per repetition, to repeat the last round of the converged repetitions
     df = pd.read_sql(
         f"""
     SELECT
             a.name AS actor,
             i.name as issue,
-            AVG(ai.position) as position,
+            ai.position as position,
             i2.pointer + 1                                AS round,
-            m.p,
-            m.id
-          FROM actorissue ai
+            r.pointer as repetion,
+            m.p
+          FROM {table} ai
             LEFT JOIN issue i ON ai.issue_id = i.id
             LEFT JOIN actor a ON ai.actor_id = a.id
             LEFT JOIN iteration i2 ON ai.iteration_id = i2.id
             LEFT JOIN repetition r ON i2.repetition_id = r.id
             LEFT JOIN modelrun m ON r.model_run_id = m.id
-          WHERE  ai.type = 'after' AND m.id IN({list_to_sql_param(model_run_ids)})
-         GROUP BY m.id, i2.pointer, a.id, i.id;
+          WHERE  ai.type = '{ai_type}' AND m.id IN({list_to_sql_param(model_run_ids)});
     """,
         conn._state.conn,
-        index_col=["issue", "actor", "p"],
-        columns=["position"],
+        index_col="p",
+    )
+    df = fill_converged_rounds(df, ["issue", "actor", "repetion"], "position")
+
+    return (
+        df.groupby(["issue", "actor", "p", "round"])["position"].mean().reset_index(level="round")
+    )
+
+
+def write_summary_result(
+    conn: DatabaseProxy, model_run_ids: list[int], output_directory: Path
+) -> None:
+    df = read_positions(conn, model_run_ids, "before")
+
+    table = pd.pivot_table(
+        df,
+        index=["issue", "actor", "round"],
+        columns=["p"],
+        values=["position"],
     )
+    table.to_csv(output_directory / "issues_preference.csv")
+
+    df = read_positions(conn, model_run_ids, "after")
 
     table = pd.pivot_table(
         df,
@@ -12,6 +12,8 @@ from decide import data_folder
 from decide.data.database import Manager
 from decide.data.database import connection
 from decide.log import logger
+from decide.results.helpers import actor_issue_table
+from decide.results.helpers import fill_converged_rounds
 from decide.results.helpers import list_to_sql_param
 
 
@@ -19,6 +21,7 @@ def write_summary_result(
     conn: DatabaseProxy, model_run_ids: list[int], output_directory: Path, ai_type="before"
 ) -> None:
     x_type = "preference" if ai_type == "before" else "voting"
+    table = actor_issue_table(conn, model_run_ids)
 
     df = pd.read_sql(
         f"""
@@ -35,7 +38,7 @@ def write_summary_result(
             i2.pointer + 1                                AS round,
             m.p,
       i.name as issue
-          FROM actorissue ai
+          FROM {table} ai
             LEFT JOIN issue i ON ai.issue_id = i.id
             LEFT JOIN actor a ON ai.actor_id = a.id
             LEFT JOIN iteration i2 ON ai.iteration_id = i2.id
@@ -48,6 +51,8 @@ def write_summary_result(
         index_col="p",
         columns=["mds"],
     )
+    df = fill_converged_rounds(df, ["issue", "repetion"], "mds")
+
     try:
         table_avg = pd.pivot_table(
             df,
@@ -85,42 +90,13 @@ ORDER BY issue.name"""
 
     # %%
 
-    for name, issue_id in issues:
-        df = pd.read_sql(
-            f"""SELECT a.p                         as p,
-       a.issue                     as issue,
-       a.round                 as round,
-       a.repetion                  as repetion,
-       a.numerator / a.denominator AS mds
-FROM (SELECT sum(ai.position * ai.power * ai.salience) AS numerator,
-             sum(ai.salience * ai.power)
-                                                       AS denominator,
-             r.pointer
-                                                       AS repetion,
-             i2.pointer +1
-                                                       AS round,
-             m.p,
-             i.name                                    as issue
-      FROM actorissue ai
-               LEFT JOIN issue i ON ai.issue_id = i.id
-               LEFT JOIN actor a ON ai.actor_id = a.id
-               LEFT JOIN iteration i2 ON ai.iteration_id = i2.id
-               LEFT JOIN repetition r ON i2.repetition_id = r.id
-               LEFT JOIN modelrun m ON r.model_run_id = m.id
-               LEFT JOIN dataset d ON a.data_set_id = d.id
-      WHERE ai.type = '{ai_type}'
-        AND m.id IN({list_to_sql_param(model_run_ids)})
-        AND i.id = {issue_id}
-      GROUP BY m.id, r.id, i2.id, i.id) a
-        """,
-            conn._state.conn,
-            index_col="p",
-            columns=["mds"],
-        )
+    # the rows of an issue are already in the frame, a query per issue would scan actorissue again
+    for name, _ in issues:
+        issue_df = df[df["issue"] == name]
 
         try:
             table = pd.pivot_table(
-                df,
+                issue_df,
                 index=["round"],
                 columns=["p"],
                 values=["mds"],
@@ -0,0 +1,19 @@
+import pytest
+
+
+def read_csv_files(directory) -> dict:
+    return {path.relative_to(directory): path.read_text() for path in directory.rglob("*.csv")}
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_async_observers(sample_run, workers) -> None:
+    args = ["--workers", workers, "--checkpoint-every", "2"]
+
+    expected = sample_run("sync", *args)
+
+    assert sample_run("async", *args, "--async-observers") == expected
+
+    files = read_csv_files(sample_run.output("sync"))
+
+    assert files
+    assert read_csv_files(sample_run.output("async")) == files
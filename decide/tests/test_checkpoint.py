@@ -0,0 +1,42 @@
+from decide.model.checkpoint import Checkpoint
+from decide.model.utils import ModelLoop
+
+
+def test_resume(sample_run, monkeypatch) -> None:
+    expected = sample_run("full")
+
+    loop = ModelLoop.loop
+    calls = []
+
+    def interrupted(self) -> None:
+        calls.append(1)
+
+        # stop in the second repetition of p=0.5, the last checkpoint is in the middle of the first
+        if len(calls) == 10:
+            raise KeyboardInterrupt
+
+        loop(self)
+
+    monkeypatch.setattr(ModelLoop, "loop", interrupted)
+
+    output = ["--output-dir", str(sample_run.tmp_path / "resumed")]
+
+    result = sample_run.invoke(*sample_run.ARGS, *output, "--checkpoint-every", "4")
+    assert result.exit_code != 0
+
+    directory = sample_run.output("resumed")
+    assert (directory / Checkpoint.FILENAME).is_file()
+
+    # a resumed run needs the same options
+    result = sample_run.invoke(
+        *sample_run.ARGS[2:], "--iterations", "4", "--resume", str(directory)
+    )
+    assert result.exit_code != 0
+
+    monkeypatch.setattr(ModelLoop, "loop", loop)
+
+    result = sample_run.invoke(*sample_run.ARGS, "--resume", str(directory))
+    assert result.exit_code == 0, result.output
+
+    assert sample_run.dump() == expected
+    assert not (directory / Checkpoint.FILENAME).exists()
@@ -0,0 +1,72 @@
+import pandas as pd
+from typer.testing import CliRunner
+
+from decide.cli import app
+from decide.data import database as db
+from decide.results.helpers import fill_converged_rounds
+
+runner = CliRunner()
+
+
+def test_converged_repetitions(tmp_path) -> None:
+    result = runner.invoke(
+        app,
+        [
+            "--iterations",
+            "5",
+            "--repetitions",
+            "2",
+            "--start",
+            "0.0",
+            "--step",
+            "0.5",
+            "--stop",
+            "0.5",
+            "--seed",
+            "1",
+            # a position cannot move more than 100, every round stands still
+            "--convergence-tolerance",
+            "100",
+            "--convergence-rounds",
+            "2",
+            "--output-dir",
+            str(tmp_path),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    repetitions = list(db.Repetition.select())
+
+    assert len(repetitions) == 4
+    assert {repetition.iterations for repetition in repetitions} == {2}
+    assert db.Iteration.select().count() == 4 * 2
+
+    # the summary repeats the last round of the converged repetitions
+    summary = next((tmp_path / "sample_data" / "0.0" / "issues" / "summary" / "csv").iterdir())
+
+    assert "rnd-4" in summary.read_text()
+
+
+def test_fill_converged_rounds() -> None:
+    df = pd.DataFrame(
+        {
+            "p": [0.0] * 5,
+            "issue": ["a"] * 5,
+            "repetion": [0, 0, 0, 1, 1],
+            "round": [1, 2, 3, 1, 2],
+            "mds": [10.0, 20.0, 30.0, 15.0, 25.0],
+        },
+    ).set_index("p")
+
+    filled = fill_converged_rounds(df, ["issue", "repetion"], "mds")
+
+    assert filled.pivot_table(index="round", values="mds").to_dict()["mds"] == {
+        1: 12.5,
+        2: 22.5,
+        3: 27.5,
+    }
+
+    # nothing to fill
+    complete = df[df["repetion"] == 0]
+
+    assert fill_converged_rounds(complete, ["issue", "repetion"], "mds") is complete
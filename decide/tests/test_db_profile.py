@@ -0,0 +1,66 @@
+import pytest
+
+from decide.data import database as db
+
+
+def pragma(name: str):
+    (value,) = db.connection.execute_sql(f"PRAGMA {name}").fetchone()
+
+    return value
+
+
+@pytest.mark.parametrize(
+    ("profile", "journal_mode", "synchronous"),
+    [
+        # the defaults of SQLite, synchronous=FULL
+        (None, "delete", 2),
+        ("safe", "delete", 2),
+        ("wal", "wal", 1),
+        ("fast", "wal", 0),
+    ],
+)
+def test_profile_pragmas(tmp_path, profile, journal_mode, synchronous) -> None:
+    manager = db.Manager(f"sqlite:///{tmp_path / 'profile.db'}", profile)
+    manager.init_database()
+    manager.create_tables()
+
+    assert pragma("journal_mode") == journal_mode
+    assert pragma("synchronous") == synchronous
+
+    if journal_mode == "wal":
+        assert pragma("cache_size") == db.PROFILES[profile]["cache_size"]
+        # MEMORY
+        assert pragma("temp_store") == 2
+
+    # the log is next to the database while it is open
+    assert (tmp_path / "profile.db-wal").exists() == (journal_mode == "wal")
+
+
+def test_db_profile(sample_run) -> None:
+    expected = sample_run("safe")
+    expected_indexes = sample_run.indexes()
+
+    # an existing database keeps its rollback journal
+    assert pragma("journal_mode") == "delete"
+    assert not (sample_run.output("safe") / "decide-data.sqlite.db-wal").exists()
+
+    assert sample_run("fast", "--db-profile", "fast") == expected
+    # the indexes are built after the load
+    assert sample_run.indexes() == expected_indexes
+    assert "actorissue_iteration_id" in expected_indexes
+
+    assert pragma("journal_mode") == "wal"
+    assert not (sample_run.output("fast") / "decide-data.sqlite.db-wal").stat().st_size
+
+
+def test_fast_profile_defers_the_indexes(sample_run, tmp_path) -> None:
+    manager = db.Manager(f"sqlite:///{tmp_path / 'fast.db'}", "fast")
+    manager.init_database()
+    manager.create_tables()
+
+    assert "actorissue_iteration_id" not in sample_run.indexes()
+    assert "iteration_repetition_id" in sample_run.indexes()
+
+    manager.create_indexes()
+
+    assert "actorissue_iteration_id" in sample_run.indexes()
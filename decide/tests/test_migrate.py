@@ -0,0 +1,83 @@
+from decide.data import database as db
+
+
+def column_types(table: type[db.BaseModel]) -> dict[str, str]:
+    return {
+        column.name: column.data_type
+        for column in db.connection.get_columns(table._meta.table_name)
+    }
+
+
+def decimal_schema() -> None:
+    """Turn the REAL columns of the database back into the DECIMAL columns of an older version."""
+    db.connection.execute_sql("PRAGMA writable_schema = ON")
+    db.connection.execute_sql(
+        "UPDATE sqlite_master SET sql = replace(sql, ' REAL', ' DECIMAL(20, 15)') "
+        "WHERE type = 'table'"
+    )
+    db.connection.execute_sql("PRAGMA writable_schema = OFF")
+    db.connection.close()
+
+
+def test_migrate_numeric_columns(sample_run, tmp_path) -> None:
+    manager = db.Manager(f"sqlite:///{tmp_path / 'old.db'}")
+    manager.init_database()
+    manager.create_tables()
+
+    expected_indexes = sample_run.indexes()
+
+    decimal_schema()
+    manager.init_database()
+
+    db.connection.execute_sql(
+        "INSERT INTO actorissue (issue_id, actor_id, power, position, salience, iteration_id, "
+        "type) VALUES (1, 2, 0.25, 12.5, 0.75, 3, 'before')"
+    )
+
+    assert column_types(db.ActorIssue)["position"] == "DECIMAL(20, 15)"
+    assert set(manager.decimal_columns()) == {db.ActorIssue, db.ExchangeActor, db.Externality}
+
+    assert manager.migrate_numeric_columns() == ["actorissue", "exchangeactor", "externality"]
+
+    assert not manager.decimal_columns()
+    assert column_types(db.ActorIssue)["position"] == "REAL"
+    assert column_types(db.Externality)["own"] == "REAL"
+    # the other columns keep their type
+    assert column_types(db.ActorIssue)["type"] == "VARCHAR(255)"
+
+    row = db.ActorIssue.get()
+    assert (row.issue_id, row.actor_id, row.iteration_id) == (1, 2, 3)
+    assert (row.power, row.position, row.salience) == (0.25, 12.5, 0.75)
+
+    assert sample_run.indexes() == expected_indexes
+    assert db.connection.execute_sql("SELECT count(*) FROM actorissue_full").fetchone() == (0,)
+    assert db.connection.execute_sql("PRAGMA integrity_check").fetchone() == ("ok",)
+
+
+def test_migrate(sample_run) -> None:
+    expected = sample_run("run")
+    expected_indexes = sample_run.indexes()
+
+    decimal_schema()
+
+    database = sample_run.output("run") / "decide-data.sqlite.db"
+
+    manager = db.Manager(f"sqlite:///{database}")
+    manager.init_database()
+
+    assert column_types(db.ActorIssue)["power"] == "DECIMAL(20, 15)"
+    assert db.Externality in manager.decimal_columns()
+
+    db.connection.close()
+
+    result = sample_run.invoke("migrate", str(database))
+    assert result.exit_code == 0, result.output
+
+    manager.init_database()
+
+    assert not manager.decimal_columns()
+    assert column_types(db.ActorIssue)["power"] == "REAL"
+    assert sample_run.dump() == expected
+    assert sample_run.indexes() == expected_indexes
+    assert db.connection.execute_sql("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert not db.connection.execute_sql("PRAGMA foreign_key_check").fetchall()
@@ -0,0 +1,28 @@
+import json
+
+from decide.model.equalgain import EqualGainModel
+
+
+def skipped(path) -> int:
+    return json.loads(path.read_text())["summary"]["counters"].get("candidates_skipped", 0)
+
+
+def test_float64_prefilters_the_candidates(sample_run, monkeypatch) -> None:
+    stats = sample_run.tmp_path / "prefilter.json"
+
+    expected = sample_run("prefilter", "--numeric", "float64", "--stats", str(stats))
+
+    assert skipped(stats) > 0
+
+    # without the float64 copies of the store every candidate is calculated
+    monkeypatch.setattr(EqualGainModel, "prepare_candidate_values", lambda self: None)
+
+    stats = sample_run.tmp_path / "all.json"
+
+    assert sample_run("all", "--numeric", "float64", "--stats", str(stats)) == expected
+    assert skipped(stats) == 0
+
+    for path in sample_run.output("prefilter").rglob("*.csv"):
+        other = sample_run.output("all") / path.relative_to(sample_run.output("prefilter"))
+
+        assert other.read_text() == path.read_text(), path.name
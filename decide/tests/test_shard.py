@@ -0,0 +1,69 @@
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from decide.cli import app
+from decide.cli import shard_param
+from decide.cli import shard_units
+from decide.data import database as db
+
+runner = CliRunner()
+
+
+def test_shard_units() -> None:
+    units = shard_units(["0.0", "0.5"], 3)
+
+    shards = [shard_units(["0.0", "0.5"], 3, (k, 4)) for k in range(1, 5)]
+
+    assert sorted(unit for shard in shards for unit in shard) == units
+    assert shards[0] == [("0.0", 0), ("0.5", 1)]
+
+
+def test_shard_param() -> None:
+    assert shard_param(None) is None
+    assert shard_param("2/4") == (2, 4)
+
+    with pytest.raises(typer.BadParameter):
+        shard_param("5/4")
+
+    with pytest.raises(typer.BadParameter):
+        shard_param("a/4")
+
+
+def test_merge(tmp_path) -> None:
+    for shard in ("1/2", "2/2"):
+        result = runner.invoke(
+            app,
+            [
+                "--iterations",
+                "1",
+                "--repetitions",
+                "3",
+                "--seed",
+                "1",
+                "--shard",
+                shard,
+                "--output-dir",
+                str(tmp_path),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+
+    databases = sorted(str(path) for path in tmp_path.glob("*/shard-*/decide-data.sqlite.db"))
+
+    result = runner.invoke(app, ["merge", *databases, "--output-dir", str(tmp_path / "merged")])
+    assert result.exit_code == 0, result.output
+
+    model_runs = list(db.ModelRun.select())
+
+    assert len(model_runs) == 1
+    assert model_runs[0].repetitions_used == 3
+    assert sorted(r.pointer for r in db.Repetition.select()) == [0, 1, 2]
+    assert db.Iteration.select().count() == 3
+    assert db.ActorIssue.select().count() > 0
+
+    # the model runs of the target could be mistaken for those of the shards
+    result = runner.invoke(app, ["merge", *databases, "--output-dir", str(tmp_path / "merged")])
+    assert result.exit_code != 0
+    assert "already has model runs" in result.output
+    assert db.ModelRun.select().count() == 1
@@ -0,0 +1,113 @@
+from decide.data import database as db
+
+
+def test_full_view_completes_the_delta_snapshots(tmp_path) -> None:
+    manager = db.Manager(f"sqlite:///{tmp_path / 'delta.db'}")
+    manager.init_database()
+    manager.create_tables()
+
+    data_set = db.DataSet.create(name="delta")
+    issue = db.Issue.create(name="x", key="x", lower=0, upper=100, data_set=data_set)
+    a, b = (db.Actor.create(name=key, key=key, data_set=data_set) for key in "ab")
+    model_run = db.ModelRun.create(
+        p=0, iterations=3, repetitions=2, snapshots="delta", data_set=data_set
+    )
+
+    # (repetition, iteration, type) -> the stored positions, an actor that did not move is missing
+    stored = {
+        (0, 0, "before"): {a: 10, b: 20},
+        (0, 1, "before"): {a: 15},
+        (0, 2, "before"): {b: 25},
+        (0, 0, "after"): {a: 11, b: 21},
+        (0, 2, "after"): {a: 12},
+        (1, 0, "before"): {a: 30, b: 40},
+    }
+
+    iterations = {}
+
+    for pointer in range(2):
+        repetition = db.Repetition.create(pointer=pointer, model_run=model_run)
+
+        for iteration in range(3):
+            iterations[pointer, iteration] = db.Iteration.create(
+                pointer=iteration, repetition=repetition
+            )
+
+    for (repetition, iteration, type_), positions in stored.items():
+        for actor, position in positions.items():
+            db.ActorIssue.create(
+                issue=issue,
+                actor=actor,
+                power=1,
+                salience=1,
+                position=position,
+                iteration=iterations[repetition, iteration],
+                type=type_,
+            )
+
+    cursor = db.connection.execute_sql(
+        """SELECT r.pointer, i.pointer, ai.type, a.key, ai.position
+    FROM actorissue_full ai
+        JOIN iteration i ON ai.iteration_id = i.id
+        JOIN repetition r ON i.repetition_id = r.id
+        JOIN actor a ON ai.actor_id = a.id"""
+    )
+
+    # every snapshot has every actor, with the position of the last snapshot of its type that has it
+    assert sorted(cursor.fetchall()) == sorted(
+        [
+            (0, 0, "before", "a", 10.0),
+            (0, 0, "before", "b", 20.0),
+            (0, 1, "before", "a", 15.0),
+            (0, 1, "before", "b", 20.0),
+            (0, 2, "before", "a", 15.0),
+            (0, 2, "before", "b", 25.0),
+            (0, 0, "after", "a", 11.0),
+            (0, 0, "after", "b", 21.0),
+            (0, 1, "after", "a", 11.0),
+            (0, 1, "after", "b", 21.0),
+            (0, 2, "after", "a", 12.0),
+            (0, 2, "after", "b", 21.0),
+            # the other repetition does not see the snapshots of the first
+            (1, 0, "before", "a", 30.0),
+            (1, 0, "before", "b", 40.0),
+            (1, 1, "before", "a", 30.0),
+            (1, 1, "before", "b", 40.0),
+            (1, 2, "before", "a", 30.0),
+            (1, 2, "before", "b", 40.0),
+        ]
+    )
+
+
+def snapshots(table: str) -> list[tuple]:
+    cursor = db.connection.execute_sql(
+        f"""SELECT m.p, r.pointer, i.pointer, ai.type, ai.issue_id, ai.actor_id, ai.power,
+        ai.salience, ai.position
+    FROM {table} ai
+        JOIN iteration i ON ai.iteration_id = i.id
+        JOIN repetition r ON i.repetition_id = r.id
+        JOIN modelrun m ON r.model_run_id = m.id
+    ORDER BY m.p, r.pointer, i.pointer, ai.type, ai.issue_id, ai.actor_id""",
+    )
+
+    return cursor.fetchall()
+
+
+def test_delta_snapshots(sample_run) -> None:
+    sample_run("full")
+
+    expected = snapshots("actorissue")
+
+    assert snapshots("actorissue_full") == expected
+
+    sample_run("delta", "--snapshots", "delta")
+
+    assert snapshots("actorissue_full") == expected
+    # the actors that did not move are left out after the first snapshot of a repetition
+    assert db.ActorIssue.select().count() < len(expected)
+    assert {model_run.snapshots for model_run in db.ModelRun.select()} == {"delta"}
+
+    for path in sample_run.output("full").rglob("*.csv"):
+        delta = sample_run.output("delta") / path.relative_to(sample_run.output("full"))
+
+        assert delta.read_text() == path.read_text(), path.name
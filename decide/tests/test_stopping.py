@@ -0,0 +1,52 @@
+import pytest
+from typer.testing import CliRunner
+
+from decide.cli import app
+from decide.data import database as db
+
+runner = CliRunner()
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_enough_repetitions(tmp_path, workers) -> None:
+    result = runner.invoke(
+        app,
+        [
+            "--iterations",
+            "2",
+            "--repetitions",
+            "6",
+            "--start",
+            "0.0",
+            "--step",
+            "0.5",
+            "--stop",
+            "0.5",
+            "--seed",
+            "1",
+            "--workers",
+            workers,
+            # the final NBS is on the 0-100 scale, the standard error is always below 100
+            "--target-error",
+            "100",
+            "--min-repetitions",
+            "3",
+            "--output-dir",
+            str(tmp_path),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    model_runs = list(db.ModelRun.select())
+
+    assert len(model_runs) == 2
+    assert [(m.repetitions, m.repetitions_used) for m in model_runs] == [(6, 3), (6, 3)]
+    assert db.Repetition.select().count() == 2 * 3
+
+
+def test_target_error_needs_all_shards(tmp_path) -> None:
+    result = runner.invoke(
+        app,
+        ["--target-error", "1", "--shard", "1/2", "--output-dir", str(tmp_path)],
+    )
+    assert result.exit_code != 0
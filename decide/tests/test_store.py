@@ -0,0 +1,23 @@
+from decide.model.base import AbstractModel
+
+
+def test_store(sample_run, monkeypatch) -> None:
+    calc_stored_nbs = AbstractModel._calc_stored_nbs
+    calls = []
+
+    def spy(self) -> None:
+        calls.append(1)
+        calc_stored_nbs(self)
+
+    monkeypatch.setattr(AbstractModel, "_calc_stored_nbs", spy)
+
+    expected = sample_run("objects")
+    assert not calls
+
+    assert sample_run("store", "--store") == expected
+    assert calls
+
+    for path in sample_run.output("objects").rglob("*.csv"):
+        stored = sample_run.output("store") / path.relative_to(sample_run.output("objects"))
+
+        assert stored.read_text() == path.read_text(), path.name